@@ -0,0 +1,98 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from typing import Optional
+import json
+import logging
+import math
+
+from app.services.ai_advisor import ai_advisor, advisor_gate, AdvisorBusy
+from app.services.answer_cache import answer_cache
+from app.services.advisor_context import context_assembler
+from app.services.llm_scheduler import Priority, SchedulerOverloaded
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# --- Pydantic Schemas for Validation ---
+
+class AdviceRequest(BaseModel):
+    question: str = Field(..., min_length=3, max_length=1000)
+    context: Optional[dict] = None
+    language: str = Field("en", pattern="^(en|hi|te)$")
+    # When given, weather, mandi prices and related posts are looked up for the prompt
+    location: Optional[str] = Field(None, max_length=100)
+    crop: Optional[str] = Field(None, max_length=50)
+
+# --- Helpers ---
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# --- Endpoints ---
+
+@router.post("/ask")
+async def ask_advisor(request: AdviceRequest):
+    """
+    Streams the advisor's answer as server-sent events: a `context` event
+    naming any context sources that were unavailable, `token` events with
+    text chunks, then `done` (or `error` if generation fails midway).
+    Returns 429 with Retry-After when the advisor is saturated, or 503 when
+    the shared model quota is exhausted. Near-duplicate
+    questions asked under similar conditions are answered from cache.
+    """
+    context = request.context
+    if request.location or request.crop:
+        context = {**await context_assembler.assemble(request.location, request.crop, request.question), **(context or {})}
+
+    cached = answer_cache.lookup(request.question, request.language, context)
+    if cached is not None:
+        async def replay():
+            yield sse("context", {"missing": (context or {}).get("missing", {})})
+            yield sse("token", {"text": cached.answer})
+            yield sse("done", {"cached": True})
+        return StreamingResponse(replay(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    try:
+        lease = await advisor_gate.acquire()
+    except AdvisorBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    try:
+        stream = await ai_advisor.open_stream(request.question, context, request.language, Priority.INTERACTIVE)
+    except SchedulerOverloaded as e:
+        lease.release()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except Exception as e:
+        lease.release()
+        logger.error(f"Advisor generation failed to start: {e}")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="The AI advisor is unavailable right now.")
+
+    async def events():
+        try:
+            yield sse("context", {"missing": (context or {}).get("missing", {})})
+            async for text in stream:
+                yield sse("token", {"text": text})
+            yield sse("done", {"cached": False})
+        except Exception as e:
+            logger.error(f"Advisor stream failed: {e}")
+            yield sse("error", {"message": "I'm sorry, I'm having trouble connecting to my knowledge base."})
+        finally:
+            lease.release()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Frees the slot even if the client disconnects before the first chunk
+        background=BackgroundTask(lease.release),
+    )
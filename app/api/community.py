@@ -1,8 +1,18 @@
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, HTTPException, status, Query, Response
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 import uuid
+import orjson
+
+from app.services import posts, comments
+from app.services.reactions import reaction_buffer
+from app.services.trending import trending
+from app.services.search_index import search_index
+from app.services.pretranslate import pretranslation, PENDING
+from app.services.feed_cache import feed_cache
+from app.api.fields import parse_fields
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -15,11 +25,19 @@ class AuthorSchema(BaseModel):
 
 class CommentSchema(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    author: str
+    author: AuthorSchema
     content: str
     createdAt: datetime = Field(default_factory=datetime.now)
     isAnswer: bool = False
 
+class CommentCreate(BaseModel):
+    content: str = Field(..., min_length=2, max_length=5000)
+    isAnswer: bool = False
+
+class CommentPage(BaseModel):
+    comments: List[CommentSchema]
+    nextCursor: Optional[str] = None
+
 class PostCreate(BaseModel):
     title: str = Field(..., min_length=5, max_length=100)
     content: str = Field(..., min_length=10)
@@ -34,29 +52,68 @@ class PostResponse(PostCreate):
     views: int = 0
     reactionCount: int = 0
     commentCount: int = 0
-    comments: List[CommentSchema] = []
+    # The first few answers only; the full thread is paginated separately
+    commentPreview: List[CommentSchema] = []
     createdAt: datetime
     isResolved: bool = False
+    translationStatus: Optional[str] = None
+    displayLanguage: Optional[str] = None
+
+class FeedPage(BaseModel):
+    posts: List[PostResponse]
+    nextCursor: Optional[str] = None
 
-# --- Mock Database ---
-# In a real app, this would be replaced by MongoDB or PostgreSQL logic
-db_posts: List[dict] = []
+# Feed pages skip model validation; these mirror PostResponse's fields and defaults
+POST_DEFAULTS = {
+    name: field.get_default(call_default_factory=True)
+    for name, field in PostResponse.model_fields.items()
+    if not field.is_required()
+}
+POST_FIELDS = tuple(PostResponse.model_fields)
+
+def encode_feed_page(page: List[dict], next_cursor: Optional[str], fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    names = fields or POST_FIELDS
+    body = {
+        "posts": [{name: post.get(name, POST_DEFAULTS.get(name)) for name in names} for post in page],
+        "nextCursor": next_cursor,
+    }
+    return orjson.dumps(body)
 
 # --- Endpoints ---
 
-@router.get("/feed", response_model=List[PostResponse])
+@router.get("/feed", response_model=FeedPage)
 async def get_community_feed(
     category: Optional[str] = None,
-    limit: int = Query(20, gt=0, le=100)
+    language: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's nextCursor"),
+    limit: int = Query(20, gt=0, le=100),
+    lang: Optional[str] = Query(None, description="Serve titles and content translated into this language"),
+    fields: Optional[str] = Query(None, description="Comma-separated post fields to return, e.g. id,title,reactionCount")
 ):
     """
-    Retrieves the community feed with optional category filtering.
+    Retrieves the community feed, newest first, with optional category and
+    language filtering. Pass `nextCursor` back as `cursor` to scroll.
+    `lang` serves the stored translation, or the original while it is pending.
+    `fields` returns only the named post fields (plus `id`), and only those
+    are read from the database.
     """
-    if category and category != "all":
-        filtered_posts = [p for p in db_posts if p["category"] == category]
-        return filtered_posts[-limit:]
-    
-    return db_posts[-limit:]
+    if category == "all":
+        category = None
+    selected = parse_fields(fields, POST_FIELDS, always=("id",))
+
+    # Hot pages are served as pre-encoded bytes (see app/services/feed_cache.py)
+    key = (category, language, lang, cursor, limit, selected)
+    body = feed_cache.get(key)
+    if body is None:
+        generation = feed_cache.generation_for(category)
+        try:
+            page, next_cursor = await posts.find_feed(category, language, cursor, limit, lang, selected)
+        except posts.InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        body = encode_feed_page(page, next_cursor, selected)
+        feed_cache.put(key, generation, body)
+
+    return Response(content=body, media_type="application/json")
 
 @router.post("/posts", status_code=status.HTTP_201_CREATED, response_model=PostResponse)
 async def create_community_post(post_data: PostCreate):
@@ -64,7 +121,7 @@ async def create_community_post(post_data: PostCreate):
     Creates a new community post with validated data.
     """
     new_post = {
-        "id": str(uuid.uuid4()),
+        "_id": str(uuid.uuid4()),
         "author": {
             "name": "Medhansh Reddy", # Mocked current user
             "role": "farmer",
@@ -74,38 +131,83 @@ async def create_community_post(post_data: PostCreate):
         "views": 0,
         "reactionCount": 0,
         "commentCount": 0,
-        "comments": [],
-        "createdAt": datetime.now(),
-        "isResolved": False
+        "commentPreview": [],
+        "createdAt": posts.now_millis(),
+        "isResolved": False,
+        "translations": {},
+        "translationStatus": PENDING
     }
-    
-    db_posts.insert(0, new_post) # Add to the top of the feed
-    return new_post
+
+    await posts.insert_post(new_post)
+    feed_cache.bump([new_post["category"]])
+    reaction_buffer.remember(new_post)
+    trending.record(new_post["tags"], new_post["category"], new_post["language"])
+    search_index.add_post(new_post)
+    pretranslation.submit(new_post)
+    return posts.localize(posts.to_api(new_post), None)
 
 @router.post("/react/{post_id}", status_code=status.HTTP_200_OK)
-async def react_to_post(post_id: str, type: str = "like"):
+async def react_to_post(post_id: str, type: str = Query("like", pattern="^[a-z_]{1,20}$")):
     """
     Increments the reaction count for a specific post.
+    The count is buffered and written to MongoDB in periodic bulk flushes.
     """
-    for post in db_posts:
-        if post["id"] == post_id:
-            post["reactionCount"] += 1
-            return {"success": True, "new_count": post["reactionCount"]}
+    new_count = await reaction_buffer.react(post_id, type)
+    if new_count is not None:
+        meta = reaction_buffer.index.get(post_id)
+        if meta is not None:
+            trending.record(meta.tags, meta.category, meta.language, settings.TRENDING_REACTION_WEIGHT)
+        return {"success": True, "new_count": new_count}
             
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND, 
         detail=f"Post with id {post_id} not found"
     )
 
-@router.get("/trending", response_model=dict)
-async def get_trending_tags():
+@router.get("/posts/{post_id}/comments", response_model=CommentPage)
+async def get_post_comments(
+    post_id: str,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's nextCursor"),
+    limit: int = Query(20, gt=0, le=100)
+):
+    """
+    One page of a post's comment thread, oldest first.
+    """
+    try:
+        page, next_cursor = await comments.find_thread(post_id, cursor, limit)
+    except posts.InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"comments": page, "nextCursor": next_cursor}
+
+@router.post("/posts/{post_id}/comments", status_code=status.HTTP_201_CREATED, response_model=CommentSchema)
+async def add_post_comment(post_id: str, comment_data: CommentCreate):
     """
-    Returns simulated trending tags for the sidebar.
+    Adds a comment to a post's thread and updates the post's commentCount
+    (and its answer preview, for answers).
     """
-    return {
-        "tags": [
-            {"_id": "chilli", "count": 42},
-            {"_id": "gadwal", "count": 28},
-            {"_id": "organic", "count": 15}
-        ]
+    author = {
+        "name": "Medhansh Reddy", # Mocked current user
+        "role": "farmer",
+        "profilePicture": None
     }
+    added = await comments.add_comment(post_id, author, comment_data.content, comment_data.isAnswer)
+    if added is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Post with id {post_id} not found"
+        )
+    comment, post = added
+    feed_cache.bump([post.get("category")])
+    return posts.to_api(comment)
+
+@router.get("/trending", response_model=dict)
+async def get_trending_tags(
+    category: Optional[str] = None,
+    language: Optional[str] = None,
+    limit: int = Query(10, gt=0, le=50)
+):
+    """
+    Returns trending tags for the sidebar, weighted towards recent posts and
+    reactions (see app/services/trending.py).
+    """
+    return {"tags": trending.top(category, language, limit)}
@@ -0,0 +1,23 @@
+from typing import Iterable, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+def parse_fields(raw: Optional[str], allowed: Iterable[str], always: Iterable[str] = ()) -> Optional[Tuple[str, ...]]:
+    """
+    Turns a `fields=a,b` sparse fieldset into a tuple in the response's own
+    field order (so equal selections share cache entries), or None when no
+    selection was made. Unknown names are a 400.
+    """
+    if raw is None or not raw.strip():
+        return None
+    allowed = tuple(allowed)
+    requested = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Choose from: {', '.join(allowed)}",
+        )
+    requested.update(always)
+    return tuple(f for f in allowed if f in requested)
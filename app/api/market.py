@@ -1,24 +1,45 @@
 
-from fastapi import APIRouter
-import requests
-import os
+from fastapi import APIRouter, Query
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.services.market_data import market_data
+from app.services.market_history import price_analytics
+from app.api.fields import parse_fields
 
 router = APIRouter()
 
-# Data.gov.in API for Agmarknet
-AGMARKNET_API_KEY = os.getenv("AGMARKNET_API_KEY", "your_api_key_here")
+# --- Pydantic Schemas for Validation ---
+
+class AnalyticsRequest(BaseModel):
+    states: List[str] = Field(..., min_length=1, max_length=40)
+    commodities: List[str] = Field(..., min_length=1, max_length=100)
+    days: int = Field(30, ge=1, le=365)
+    percentiles: List[float] = Field(default=[10, 25, 75, 90], max_length=10)
+
+PRICE_FIELDS = ("success", "commodity", "analysis", "freshness", "raw_data")
+
+# --- Endpoints ---
 
 @router.get("/prices/{state}/{commodity}")
-async def get_mandi_prices(state: str, commodity: str):
-    # This is a sample URL for the Govt of India Data Portal
-    url = f"https://api.data.gov.in/resource/9ef842fd-551f-497c-8069-14353d9e86c0?api-key={AGMARKNET_API_KEY}&format=json&filters[state]={state}&filters[commodity]={commodity}"
-    
+async def get_mandi_prices(
+    state: str,
+    commodity: str,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields, e.g. analysis,freshness")
+):
+    """
+    Current mandi prices with a short analysis. `fields` trims the response
+    (e.g. drop `raw_data` on slow connections); `success` is always returned.
+    """
+    selected = parse_fields(fields, PRICE_FIELDS, always=("success",))
     try:
-        res = requests.get(url).json()
-        records = res.get("records", [])
+        # Served from the local Agmarknet snapshot (see app/services/market_data.py)
+        snapshot = await market_data.get_prices(state, commodity)
+        records = snapshot.records
+        freshness = snapshot.freshness(market_data.fresh_ttl)
         
         if not records:
-            return {"success": False, "message": "No data available for this selection."}
+            return {"success": False, "message": "No data available for this selection.", "freshness": freshness}
 
         # Real-time Analysis: Calculate Average Price & Identify Best Market
         prices = [int(r['modal_price']) for r in records]
@@ -27,7 +48,7 @@ async def get_mandi_prices(state: str, commodity: str):
         # Find the market with the highest price for the farmer
         best_market = max(records, key=lambda x: int(x['modal_price']))
 
-        return {
+        response = {
             "success": True,
             "commodity": commodity,
             "analysis": {
@@ -36,7 +57,27 @@ async def get_mandi_prices(state: str, commodity: str):
                 "best_market_location": f"{best_market['market']}, {best_market['district']}",
                 "price_unit": "INR/Quintal"
             },
+            "freshness": freshness,
             "raw_data": records[:5] # Send top 5 recent records
         }
+        if selected:
+            response = {name: response[name] for name in selected}
+        return response
     except Exception as e:
         return {"success": False, "error": "Unable to fetch market data."}
+
+
+@router.post("/analytics")
+async def get_price_analytics(request: AnalyticsRequest):
+    """
+    Batch price statistics (median, percentiles, spread, moving averages and
+    best market) for many commodities and states from the local price history.
+    """
+    percentiles = [q for q in request.percentiles if 0 <= q <= 100]
+    results = await price_analytics(request.states, request.commodities, request.days, percentiles)
+    return {
+        "success": True,
+        "window_days": request.days,
+        "price_unit": "INR/Quintal",
+        "results": results,
+    }
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel
+from typing import List, Optional
+import time
+
+from app.services.search_index import search_index
+
+router = APIRouter()
+
+# --- Pydantic Schemas for Validation ---
+
+class SearchResult(BaseModel):
+    id: str
+    type: str
+    title: str
+    snippet: str
+    language: Optional[str] = None
+    tags: List[str] = []
+    score: float
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    total: int
+    tookMs: float
+
+# --- Endpoints ---
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query("", max_length=200, description='Free text; wrap phrases in "double quotes"'),
+    type: Optional[str] = Query(None, pattern="^(post|wiki)$"),
+    language: Optional[str] = None,
+    tags: Optional[str] = Query(None, description="Comma-separated tags that must all be present"),
+    limit: int = Query(20, gt=0, le=100)
+):
+    """
+    Full-text search over community posts and the crop wiki (English, Hindi
+    and Telugu, with transliterated spellings matched to native script).
+    """
+    tag_list = [t for t in (tags or "").split(",") if t.strip()]
+    if not q.strip() and not tag_list:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provide a query or at least one tag")
+    if not search_index.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Search index is still loading")
+
+    started = time.perf_counter()
+    hits, total = search_index.search(q, doc_type=type, language=language, tags=tag_list, limit=limit)
+    return {
+        "results": [hit.__dict__ for hit in hits],
+        "total": total,
+        "tookMs": round((time.perf_counter() - started) * 1000, 2),
+    }
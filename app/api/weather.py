@@ -1,53 +1,88 @@
 
-from fastapi import APIRouter, HTTPException
-import requests
-import os
+from fastapi import APIRouter, HTTPException, Query
 from datetime import datetime
+from typing import Optional
 
-router = APIRouter()
+from app.core.http_client import UpstreamError
+from app.services.weather_data import weather_data, CityNotFound
+from app.services.advisory import advisory_engine, advisory_service
 
-# You would get this from https://openweathermap.org/api
-OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "your_api_key_here")
+router = APIRouter()
 
-def analyze_farming_conditions(temp, humidity, rain):
+def analyze_farming_conditions(temp, humidity, rain, wind=0.0, crop="general"):
     """
     Business logic to provide actionable advice to farmers.
+    Matches one reading against the crop rule table (app/data/crop_rules.csv).
     """
-    advice = "Conditions are normal for general farming."
-    if rain > 0:
-        advice = "Rain detected. Avoid spraying pesticides or fertilizers today."
-    elif humidity > 80 and temp > 25:
-        advice = "High humidity & heat: Increased risk of fungal infections in crops like Chillies."
-    elif temp > 35:
-        advice = "Extreme heat: Ensure evening irrigation to prevent crop wilting."
-        
-    return advice
+    matches = advisory_engine.evaluate_point(crop, temp, humidity, rain, wind)
+    if not matches:
+        return "Conditions are normal for general farming."
+    return matches[0][1]
 
 @router.get("/current/{city}")
 async def get_weather_analysis(city: str):
-    url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={OPENWEATHER_API_KEY}&units=metric"
-    
     try:
-        response = requests.get(url).json()
-        if response.get("cod") != 200:
-            raise HTTPException(status_code=400, detail="City not found")
+        # One cached observation per geographic bucket (see app/services/weather_data.py)
+        place, _, response = await weather_data.current(city)
             
         temp = response["main"]["temp"]
         humidity = response["main"]["humidity"]
         rain = response.get("rain", {}).get("1h", 0)
+        wind = response.get("wind", {}).get("speed", 0.0)
         
-        analysis = analyze_farming_conditions(temp, humidity, rain)
+        analysis = analyze_farming_conditions(temp, humidity, rain, wind)
         
         return {
             "success": True,
             "data": {
-                "city": response["name"],
+                "city": place.name,
+                "station": response.get("name"),
                 "temperature": f"{temp}°C",
                 "humidity": f"{humidity}%",
                 "condition": response["weather"][0]["description"],
                 "farming_advice": analysis,
+                "observed_at": datetime.fromtimestamp(response["dt"]) if "dt" in response else None,
                 "timestamp": datetime.now()
             }
         }
+    except CityNotFound:
+        raise HTTPException(status_code=400, detail="City not found")
+    except UpstreamError as e:
+        if e.status_code == 404:
+            raise HTTPException(status_code=400, detail="City not found")
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/advisory/{city}")
+async def get_crop_advisory(city: str, crops: Optional[str] = Query(None, description="Comma-separated, e.g. chilli,paddy")):
+    """
+    Per-crop advisory windows (spraying, fungal risk, heat stress, irrigation)
+    over the next five days of forecast.
+    """
+    wanted = [c.strip().lower() for c in crops.split(",") if c.strip()] if crops else ["general"]
+    unknown = [c for c in wanted if c not in advisory_engine.rules.crops]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown crops: {', '.join(unknown)}. Supported: {', '.join(advisory_engine.rules.crops)}",
+        )
+
+    try:
+        place = await weather_data.resolve(city)
+        bucket = weather_data.bucket_for(place.lat, place.lon)
+        advisories = await advisory_service.advisory(bucket, wanted)
+    except CityNotFound:
+        raise HTTPException(status_code=400, detail="City not found")
+    except UpstreamError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    return {
+        "success": True,
+        "data": {
+            "city": place.name,
+            "advisories": advisories,
+            "timestamp": datetime.now()
+        }
+    }
@@ -0,0 +1,331 @@
+import asyncio
+import ipaddress
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Never limited: load balancers and scrapers must get through an overload
+EXEMPT_PATHS = frozenset({"/health", "/metrics", "/stats"})
+
+# Upstream statuses that mean a route class is overloaded, not the request wrong
+OVERLOAD_STATUS = {502, 503, 504}
+
+# A limit shrinks at most this often, so one slow burst is not punished many times
+DECREASE_COOLDOWN_SECONDS = 0.5
+
+admission_rejected = registry.counter(
+    "admission_rejected_total", "Requests turned away before being served", ("route_class", "reason")
+)
+admission_limit = registry.gauge("admission_limit", "Current adaptive concurrency limit", ("route_class",))
+admission_in_flight = registry.gauge("admission_in_flight", "Requests being served per route class", ("route_class",))
+event_loop_lag = registry.gauge("event_loop_lag_seconds", "How late the last event-loop lag probe woke up")
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency limit for one class of routes. A request whose time to
+    first byte exceeds `target_seconds`, or that ends in an upstream 5xx,
+    multiplies the limit by `backoff`; other requests add 1/limit while the
+    limit is actually in use, so it regains about one slot per limit's worth
+    of healthy requests.
+    """
+    def __init__(self, name: str, max_limit: int, min_limit: int, target_seconds: float, backoff: float, cost: float = 1.0):
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.target_seconds = target_seconds
+        self.backoff = backoff
+        self.cost = cost
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.counters = {"admitted": 0, "rejected": 0, "decreases": 0}
+        self._last_decrease = 0.0
+        admission_limit.set(name, value=self.limit)
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.target_seconds))
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            self.counters["rejected"] += 1
+            return False
+        self.in_flight += 1
+        self.counters["admitted"] += 1
+        admission_in_flight.inc(self.name)
+        return True
+
+    def release(self, latency: float, status: int):
+        self.in_flight -= 1
+        admission_in_flight.dec(self.name)
+        if latency > self.target_seconds or status in OVERLOAD_STATUS:
+            self.decrease()
+        elif self.in_flight + 1 >= self.limit / 2:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            admission_limit.set(self.name, value=self.limit)
+
+    def decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN_SECONDS:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        self.counters["decreases"] += 1
+        admission_limit.set(self.name, value=self.limit)
+
+    def stats(self) -> dict:
+        return {**self.counters, "limit": round(self.limit, 1), "in_flight": self.in_flight}
+
+
+class ClientLimiter:
+    """
+    Token bucket per client address (`rate` tokens/second, up to `burst`),
+    keeping the `max_clients` most recently seen clients. A rate of 0
+    disables it.
+    """
+    def __init__(self, rate: float, burst: float, max_clients: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, client: str, cost: float) -> float:
+        """
+        Spends `cost` tokens; returns 0 when allowed, otherwise the seconds
+        until the client could afford it.
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / self.rate
+        self.buckets[client] = (tokens, now)
+        if len(self.buckets) > self.max_clients:
+            self.buckets.popitem(last=False)
+        return wait
+
+
+class LoopLagMonitor:
+    """
+    Sleeps `interval` in a loop and measures how late it wakes up: the time
+    every other coroutine on this event loop is also being held up.
+    """
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _loop(self, on_sample):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            event_loop_lag.set(value=self.lag)
+            on_sample(self.lag)
+
+    def start(self, on_sample):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(on_sample))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class AdmissionController:
+    """
+    Decides, before a request reaches the routers, whether to serve it.
+    Routes are grouped into classes by path prefix (first match wins, the
+    last class catches the rest), each with its own AdaptiveLimit. Sustained
+    event-loop lag shrinks every class's limit.
+    """
+    def __init__(
+        self,
+        classes: List[Tuple[str, AdaptiveLimit]],
+        default: AdaptiveLimit,
+        clients: ClientLimiter,
+        lag_monitor: LoopLagMonitor,
+        lag_target: float,
+        trusted_proxies: Iterable[str] = (),
+        enabled: bool = True,
+    ):
+        self.classes = classes
+        self.default = default
+        self.clients = clients
+        self.lag_monitor = lag_monitor
+        self.lag_target = lag_target
+        self.trusted_proxies = [ipaddress.ip_network(p.strip(), strict=False) for p in trusted_proxies if p.strip()]
+        self.enabled = enabled
+        self.counters = {"rate_limited": 0}
+
+    def limits(self) -> List[AdaptiveLimit]:
+        # Several prefixes may share one class
+        unique = {id(limit): limit for _, limit in self.classes}
+        return [*unique.values(), self.default]
+
+    def classify(self, path: str) -> AdaptiveLimit:
+        for prefix, limit in self.classes:
+            if path.startswith(prefix):
+                return limit
+        return self.default
+
+    def _trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def client_key(self, scope: dict) -> str:
+        """
+        The peer address, or for requests relayed by a trusted proxy the
+        nearest X-Forwarded-For hop that is not one of our proxies (earlier
+        hops are whatever the client chose to send).
+        """
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if not self.trusted_proxies or not self._trusted(peer):
+            return peer
+        forwarded = []
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                forwarded += [hop.strip() for hop in value.decode("latin-1").split(",") if hop.strip()]
+        for hop in reversed(forwarded):
+            if not self._trusted(hop):
+                return hop
+        return peer
+
+    def _on_lag(self, lag: float):
+        if lag > self.lag_target:
+            for limit in self.limits():
+                limit.decrease()
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        if self.enabled:
+            self.lag_monitor.start(self._on_lag)
+
+    async def stop(self):
+        await self.lag_monitor.stop()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "loop_lag_ms": round(self.lag_monitor.lag * 1000, 2),
+            "max_loop_lag_ms": round(self.lag_monitor.max_lag * 1000, 2),
+            "classes": {limit.name: limit.stats() for limit in self.limits()},
+            "rate_limited": self.counters["rate_limited"],
+            "tracked_clients": len(self.clients.buckets),
+        }
+
+
+async def reject(send, status: int, message: str, retry_after: int):
+    body = orjson.dumps({"detail": message})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware that answers 429 when a client has used up its token
+    bucket and 503 when the request's route class is at its concurrency
+    limit, both with Retry-After, instead of letting requests queue on the
+    event loop without bound.
+    """
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if scope["type"] != "http" or not controller.enabled or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        limit = controller.classify(scope["path"])
+        wait = controller.clients.take(controller.client_key(scope), limit.cost)
+        if wait > 0:
+            controller.counters["rate_limited"] += 1
+            admission_rejected.inc(limit.name, "rate_limited")
+            await reject(send, 429, "Too many requests, please slow down", math.ceil(wait))
+            return
+        if not limit.try_acquire():
+            admission_rejected.inc(limit.name, "overloaded")
+            await reject(send, 503, "Server is busy, please retry shortly", limit.retry_after)
+            return
+
+        started = time.perf_counter()
+        first_byte: Optional[float] = None
+        status = 500
+
+        async def send_tracked(message):
+            nonlocal first_byte, status
+            if message["type"] == "http.response.start":
+                # Time to headers: streamed answers count as served once they start
+                first_byte = time.perf_counter() - started
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_tracked)
+        finally:
+            latency = first_byte if first_byte is not None else time.perf_counter() - started
+            limit.release(latency, status)
+
+
+def _build_controller() -> AdmissionController:
+    backoff = settings.ADMISSION_BACKOFF
+    ai = AdaptiveLimit(
+        "ai", settings.ADMISSION_AI_LIMIT, settings.ADMISSION_AI_MIN_LIMIT,
+        settings.ADMISSION_AI_TARGET_SECONDS, backoff, cost=settings.ADMISSION_AI_COST,
+    )
+    upstream = AdaptiveLimit(
+        "upstream", settings.ADMISSION_UPSTREAM_LIMIT, settings.ADMISSION_UPSTREAM_MIN_LIMIT,
+        settings.ADMISSION_UPSTREAM_TARGET_SECONDS, backoff,
+    )
+    return AdmissionController(
+        classes=[("/api/v1/advisor", ai), ("/api/v1/market", upstream), ("/api/v1/weather", upstream)],
+        default=AdaptiveLimit(
+            "default", settings.ADMISSION_DEFAULT_LIMIT, settings.ADMISSION_DEFAULT_MIN_LIMIT,
+            settings.ADMISSION_DEFAULT_TARGET_SECONDS, backoff,
+        ),
+        clients=ClientLimiter(settings.ADMISSION_CLIENT_RATE, settings.ADMISSION_CLIENT_BURST, settings.ADMISSION_MAX_CLIENTS),
+        lag_monitor=LoopLagMonitor(settings.ADMISSION_LAG_SAMPLE_SECONDS),
+        lag_target=settings.ADMISSION_LAG_TARGET_SECONDS,
+        trusted_proxies=settings.ADMISSION_TRUSTED_PROXIES.split(","),
+        enabled=settings.ADMISSION_ENABLED,
+    )
+
+
+# Global instance
+admission = _build_controller()
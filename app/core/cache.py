@@ -0,0 +1,282 @@
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.services import services
+
+logger = logging.getLogger(__name__)
+
+# First byte of every stored value says how the rest is encoded
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+
+# After a Redis error, stay on L1 alone for this long before trying again
+L2_RETRY_SECONDS = 5.0
+
+cache_requests = registry.counter(
+    "cache_requests_total", "Cache lookups by namespace and the tier that answered", ("namespace", "result")
+)
+cache_l2_errors = registry.counter("cache_l2_errors_total", "Failed Redis cache operations", ("operation",))
+
+
+def encode(value: Any, compress_min_bytes: int) -> bytes:
+    """
+    orjson, plus zlib for payloads big enough to be worth it.
+    """
+    body = orjson.dumps(value)
+    if len(body) >= compress_min_bytes:
+        return _ZLIB + zlib.compress(body, 1)
+    return _RAW + body
+
+
+def decode(blob: bytes) -> Any:
+    if blob[:1] == _ZLIB:
+        return orjson.loads(zlib.decompress(blob[1:]))
+    return orjson.loads(blob[1:])
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU with a per-entry expiry time.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self.entries.pop(key, None)
+
+
+class CacheNamespace:
+    """
+    One logical cache (market snapshots, weather, translations...) inside the
+    shared backend. Reads try the local L1, then Redis; values found in Redis
+    are copied into L1. Writes go to both. `l1_ttl` caps how long a worker
+    trusts its own copy before re-reading the shared one; without Redis the
+    L1 keeps entries for the full `ttl`.
+    """
+    def __init__(self, backend: "TieredCache", name: str, ttl: float, max_entries: int, l1_ttl: Optional[float] = None):
+        self.backend = backend
+        self.name = name
+        self.ttl = ttl
+        self.l1_ttl = min(ttl, l1_ttl if l1_ttl is not None else settings.CACHE_L1_TTL_SECONDS)
+        self.local = LocalCache(max_entries)
+        self.counters = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "sets": 0}
+
+    def _key(self, key: str) -> str:
+        return f"{self.backend.prefix}:{self.name}:{key}"
+
+    def _local_ttl(self, ttl: float) -> float:
+        return min(ttl, self.l1_ttl) if self.backend.shared else ttl
+
+    def _count(self, result: str, n: int = 1):
+        if n:
+            self.counters[result] += n
+            cache_requests.inc(self.name, result, amount=n)
+
+    def get_local(self, key: str) -> Optional[Any]:
+        """
+        L1 only, without awaiting; for hot paths that can live with a miss.
+        """
+        value = self.local.get(key)
+        if value is not None:
+            self._count("l1_hits")
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        found, remote = {}, []
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                remote.append(key)
+        self._count("l1_hits", len(found))
+        if remote:
+            shared = await self.backend.mget([self._key(k) for k in remote])
+            for key, blob in zip(remote, shared):
+                if blob is None:
+                    continue
+                try:
+                    value = decode(blob)
+                except (ValueError, zlib.error):
+                    continue
+                found[key] = value
+                # Shared entries carry their own expiry; L1 only needs to
+                # re-check them within l1_ttl
+                self.local.set(key, value, self.l1_ttl)
+                self._count("l2_hits")
+            self._count("misses", sum(1 for k in remote if k not in found))
+        return found
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self.set_many({key: value}, ttl)
+
+    async def set_many(self, values: Dict[str, Any], ttl: Optional[float] = None):
+        ttl = ttl or self.ttl
+        for key, value in values.items():
+            self.local.set(key, value, self._local_ttl(ttl))
+        self._count("sets", len(values))
+        if self.backend.shared and values:
+            min_bytes = self.backend.compress_min_bytes
+            await self.backend.mset({self._key(k): encode(v, min_bytes) for k, v in values.items()}, ttl)
+
+    async def delete(self, key: str):
+        """
+        Drops the entry here and in Redis; other workers' L1 copies live out
+        their l1_ttl.
+        """
+        self.local.delete(key)
+        await self.backend.delete(self._key(key))
+
+    def stats(self) -> dict:
+        lookups = self.counters["l1_hits"] + self.counters["l2_hits"] + self.counters["misses"]
+        hits = self.counters["l1_hits"] + self.counters["l2_hits"]
+        return {
+            **self.counters,
+            "entries": len(self.local.entries),
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
+
+
+class TieredCache:
+    """
+    Namespaced cache with an in-process L1 in every worker and, when
+    REDIS_URL is set, a Redis L2 shared by all of them, so adding workers
+    raises hit rates instead of multiplying upstream calls. Redis failures
+    are logged and counted, and the cache carries on with L1 alone.
+    """
+    def __init__(
+        self,
+        redis_url: Optional[str],
+        prefix: str,
+        timeout: float,
+        compress_min_bytes: int,
+        client: Any = None,
+    ):
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.timeout = timeout
+        self.compress_min_bytes = compress_min_bytes
+        # A client can be passed in directly, e.g. fakeredis.FakeAsyncRedis();
+        # otherwise it is created on first use
+        self.client = client
+        self._redis = services.lazy("redis", self._connect) if redis_url and client is None else None
+        self.namespaces: Dict[str, CacheNamespace] = {}
+        self._down_until = 0.0
+
+    @property
+    def shared(self) -> bool:
+        return self.client is not None or self._redis is not None
+
+    def namespace(self, name: str, ttl: float, max_entries: int, l1_ttl: Optional[float] = None) -> CacheNamespace:
+        if name not in self.namespaces:
+            self.namespaces[name] = CacheNamespace(self, name, ttl, max_entries, l1_ttl)
+        return self.namespaces[name]
+
+    # --- L2 Operations ---
+
+    def _connect(self):
+        # Imported here so deployments without REDIS_URL never pay for it
+        import redis.asyncio as aioredis
+
+        client = aioredis.from_url(
+            self.redis_url, socket_timeout=self.timeout, socket_connect_timeout=self.timeout
+        )
+        logger.info("✅ Shared Redis cache enabled.")
+        return client
+
+    def _available(self) -> bool:
+        if time.monotonic() < self._down_until:
+            return False
+        if self.client is None and self._redis is not None:
+            try:
+                self.client = self._redis.get()
+            except ImportError:  # Redis is optional; without it the cache is in-process only
+                logger.warning("REDIS_URL is set but the redis package is not installed; caching in-process only")
+                self._redis = None
+        return self.client is not None
+
+    def _failed(self, operation: str, error: Exception):
+        cache_l2_errors.inc(operation)
+        if time.monotonic() >= self._down_until:
+            logger.warning(f"Redis cache {operation} failed, using local cache only for {L2_RETRY_SECONDS:.0f}s: {error}")
+        self._down_until = time.monotonic() + L2_RETRY_SECONDS
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not self._available():
+            return [None] * len(keys)
+        try:
+            return await self.client.mget(keys)
+        except Exception as e:
+            self._failed("get", e)
+            return [None] * len(keys)
+
+    async def mset(self, values: Dict[str, bytes], ttl: float):
+        if not self._available():
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, blob in values.items():
+                    pipe.set(key, blob, px=int(ttl * 1000))
+                await pipe.execute()
+        except Exception as e:
+            self._failed("set", e)
+
+    async def delete(self, key: str):
+        if not self._available():
+            return
+        try:
+            await self.client.delete(key)
+        except Exception as e:
+            self._failed("delete", e)
+
+    # --- Lifecycle ---
+
+    async def stop(self):
+        if self._redis is not None:
+            client = self._redis.reset()
+            self.client = None
+            if client is not None:
+                await client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self.shared else "memory",
+            "namespaces": {name: ns.stats() for name, ns in self.namespaces.items()},
+        }
+
+
+# Global instance
+cache = TieredCache(
+    redis_url=settings.REDIS_URL,
+    prefix=settings.CACHE_KEY_PREFIX,
+    timeout=settings.CACHE_REDIS_TIMEOUT_SECONDS,
+    compress_min_bytes=settings.CACHE_COMPRESS_MIN_BYTES,
+)
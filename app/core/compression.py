@@ -0,0 +1,136 @@
+import gzip
+import time
+from typing import Dict, Optional
+
+from app.core.metrics import registry
+from app.core.telemetry import route_template
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/javascript", b"image/svg+xml")
+
+compression_cpu_seconds = registry.histogram(
+    "http_compression_cpu_seconds", "CPU time spent compressing response bodies", ("route", "encoding"),
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05),
+)
+compression_bytes = registry.counter(
+    "http_compression_bytes_total", "Response bytes before and after compression", ("route", "stage")
+)
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """
+    Parses Accept-Encoding ('gzip, br;q=0.8') into {encoding: q}.
+    """
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """
+    The supported encoding with the highest q-value, brotli on a tie; None
+    when neither is acceptable or the client explicitly prefers identity.
+    """
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    # max() keeps the first of equal q-values, so brotli wins ties
+    best = max(candidates, key=lambda name: accepted.get(name, wildcard))
+    q = accepted.get(best, wildcard)
+    if q <= 0 or accepted.get("identity", 0.0) > q:
+        return None
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware that compresses complete response bodies of at least
+    `minimum_size` bytes with brotli or gzip, whichever the client gives the
+    higher q-value (brotli on a tie). Streamed responses such as the
+    advisor's server-sent events pass through untouched, so tokens are not
+    held back. CPU time and bytes saved are recorded per route.
+    """
+    def __init__(self, app, minimum_size: int, gzip_level: int, brotli_quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                header = value.decode("latin-1")
+                break
+        encoding = choose_encoding(header) if header else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                start = message
+                return
+
+            body = message.get("body", b"")
+            headers = dict(start.get("headers", []))
+            content_type = headers.get(b"content-type", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or b"content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            route = route_template(scope)
+            started = time.thread_time()
+            compressed = self.compress(body, encoding)
+            compression_cpu_seconds.observe(time.thread_time() - started, route, encoding)
+            compression_bytes.inc(route, "raw", amount=len(body))
+            compression_bytes.inc(route, "sent", amount=len(compressed))
+
+            raw_headers = [(k, v) for k, v in start.get("headers", []) if k not in (b"content-length", b"vary")]
+            vary = headers.get(b"vary")
+            raw_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+            ]
+            await send({**start, "headers": raw_headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
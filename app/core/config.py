@@ -19,10 +19,191 @@ class Settings(BaseSettings):
     # Using PostgresDsn ensures the URL is a valid database connection string
     DATABASE_URL: Optional[str] = Field(default="mongodb://localhost:27017/wikikisan")
     REDIS_URL: Optional[str] = None
+    # Connection pool, timeouts and read routing for the Motor client
+    MONGO_MAX_POOL_SIZE: int = 50
+    MONGO_MIN_POOL_SIZE: int = 5
+    MONGO_MAX_IDLE_TIME_MS: int = 60_000
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 2_000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5_000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5_000
+    MONGO_SOCKET_TIMEOUT_MS: int = 10_000
+    MONGO_READ_PREFERENCE: str = "primaryPreferred"
+    # Command/pool listeners feed latency histograms; commands slower than
+    # MONGO_SLOW_QUERY_MS are logged with their redacted query shape
+    MONGO_MONITORING: bool = True
+    MONGO_SLOW_QUERY_MS: float = 100
+
+    # --- Observability Settings ---
+    # Fraction of requests written to the access log; 5xx and slow requests
+    # are always logged
+    ACCESS_LOG_SAMPLE_RATE: float = 0.01
+    ACCESS_LOG_SLOW_SECONDS: float = 1.0
+    # Shared directory for multi-worker /metrics aggregation (off when unset)
+    METRICS_DIR: Optional[str] = None
+    METRICS_FLUSH_SECONDS: float = 5.0
+
+    # --- Cache Settings ---
+    # Every worker keeps an in-process L1 cache; with REDIS_URL set, workers
+    # also share a Redis L2 and re-read it once their local copy is
+    # CACHE_L1_TTL_SECONDS old
+    CACHE_L1_TTL_SECONDS: float = 60
+    CACHE_KEY_PREFIX: str = "wikikisan"
+    CACHE_REDIS_TIMEOUT_SECONDS: float = 0.25
+    # Values at least this large are zlib-compressed in Redis
+    CACHE_COMPRESS_MIN_BYTES: int = 1024
+
+    # --- Response Compression Settings ---
+    # Bodies at least this large are sent brotli- or gzip-compressed when the
+    # client accepts it; brotli quality 4 is cheap enough for dynamic JSON
+    COMPRESSION_MIN_BYTES: int = 500
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
 
     # --- External API Keys ---
     OPENWEATHER_API_KEY: Optional[str] = None
     AGMARKNET_API_KEY: Optional[str] = None
+    GEMINI_API_KEY: Optional[str] = None
+
+    # --- Upstream HTTP Settings ---
+    # Base URLs can be pointed at scripts/stub_upstream.py for local testing
+    AGMARKNET_BASE_URL: str = "https://api.data.gov.in"
+    OPENWEATHER_BASE_URL: str = "http://api.openweathermap.org"
+    AGMARKNET_TIMEOUT_SECONDS: float = 10.0
+    OPENWEATHER_TIMEOUT_SECONDS: float = 5.0
+    UPSTREAM_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    UPSTREAM_MAX_RETRIES: int = 2
+    UPSTREAM_RETRY_BUDGET_SECONDS: float = 15.0
+    UPSTREAM_MAX_CONNECTIONS: int = 50
+    UPSTREAM_MAX_KEEPALIVE: int = 20
+
+    # --- Mandi Price Snapshot Settings ---
+    # Agmarknet publishes roughly once a day, so snapshots can live for hours
+    MARKET_FRESH_TTL_SECONDS: float = 3 * 3600
+    MARKET_MAX_STALE_SECONDS: float = 36 * 3600
+    MARKET_PREFETCH_INTERVAL_SECONDS: float = 15 * 60
+    MARKET_PREFETCH_TOP_N: int = 300
+
+    # --- Weather Cache Settings ---
+    # OpenWeather refreshes current conditions roughly every 10 minutes
+    WEATHER_BUCKET_DEGREES: float = 0.2
+    WEATHER_CACHE_TTL_SECONDS: float = 600
+    WEATHER_BATCH_WINDOW_SECONDS: float = 0.02
+    WEATHER_FORECAST_TTL_SECONDS: float = 3600
+    # Bucket -> nearest station id, shared so fresh workers batch from the start
+    WEATHER_STATION_TTL_SECONDS: float = 30 * 86400
+    ADVISORY_REFRESH_SECONDS: float = 3600
+
+    # --- Community Settings ---
+    # Reactions are buffered in memory and flushed in bulk; at most one
+    # interval's worth of taps is lost if a worker dies without shutting down
+    REACTION_FLUSH_INTERVAL_SECONDS: float = 1.0
+    REACTION_MAX_PENDING: int = 5000
+    REACTION_INDEX_SIZE: int = 100_000
+    TRENDING_HALF_LIFE_SECONDS: float = 6 * 3600
+    TRENDING_CAPACITY: int = 256
+    TRENDING_SNAPSHOT_INTERVAL_SECONDS: float = 60
+    # A reaction counts as this fraction of a new post for trending
+    TRENDING_REACTION_WEIGHT: float = 0.25
+    # Encoded feed pages; writes invalidate them, the TTL bounds staleness
+    # across workers
+    FEED_CACHE_MAX_ENTRIES: int = 5000
+    FEED_CACHE_TTL_SECONDS: float = 30
+    # Comments live in their own collection; posts carry only the first few
+    # answers, trimmed, so feed pages stay the same size however long a thread gets
+    COMMENT_PREVIEW_SIZE: int = 3
+    COMMENT_PREVIEW_CHARS: int = 280
+
+    # --- Translation Settings ---
+    TRANSLATION_CACHE_SIZE: int = 50_000
+    TRANSLATION_CACHE_TTL_SECONDS: float = 30 * 24 * 3600
+    # Google Translate calls block, so they run on a bounded thread pool
+    TRANSLATION_MAX_WORKERS: int = 8
+    # New posts are translated into every supported language in the background
+    PRETRANSLATE_WORKERS: int = 2
+    PRETRANSLATE_QUEUE_SIZE: int = 1000
+    PRETRANSLATE_MAX_ATTEMPTS: int = 3
+
+    # --- AI Advisor Settings ---
+    GEMINI_MODEL: str = "gemini-2.0-flash"
+    # Streams canned answers locally instead of calling Gemini
+    ADVISOR_FAKE_MODEL: bool = False
+    # Latency and quota-error rate of the fake model, for benchmarks
+    ADVISOR_FAKE_FIRST_TOKEN_SECONDS: float = 0.3
+    ADVISOR_FAKE_ERROR_RATE: float = 0.0
+    # Generations beyond the limit wait in a FIFO line; past the queue depth
+    # or wait time they get a 429 with Retry-After instead
+    ADVISOR_MAX_CONCURRENT: int = 32
+    ADVISOR_MAX_QUEUE: int = 64
+    ADVISOR_MAX_WAIT_SECONDS: float = 5.0
+    # Near-duplicate questions (Jaccard over content words) share an answer
+    ANSWER_CACHE_MAX_ENTRIES: int = 20_000
+    ANSWER_CACHE_TTL_SECONDS: float = 24 * 3600
+    ANSWER_CACHE_SIMILARITY: float = 0.85
+    # Context sources run concurrently; each has its own deadline and the
+    # whole stage never takes longer than the budget
+    ADVISOR_CONTEXT_BUDGET_SECONDS: float = 0.6
+    ADVISOR_WEATHER_DEADLINE_SECONDS: float = 0.5
+    ADVISOR_PRICE_DEADLINE_SECONDS: float = 0.5
+    ADVISOR_SNIPPETS_DEADLINE_SECONDS: float = 0.2
+
+    # --- LLM Quota Settings ---
+    # Provider limits for the shared Gemini key, split evenly between workers
+    GEMINI_RPM: float = 60
+    GEMINI_TPM: float = 1_000_000
+    LLM_WORKER_COUNT: int = 1
+    LLM_EXPECTED_OUTPUT_TOKENS: int = 400
+    LLM_MAX_QUEUE: int = 200
+    # Longest a call of each priority class may wait for quota before it is shed
+    LLM_MAX_WAIT_INTERACTIVE_SECONDS: float = 10.0
+    LLM_MAX_WAIT_STANDARD_SECONDS: float = 30.0
+    LLM_MAX_WAIT_BACKGROUND_SECONDS: float = 120.0
+
+    # --- Admission Control Settings ---
+    # Requests are grouped by path: the advisor is "ai", market and weather
+    # are "upstream", everything else is "default". Each class has a
+    # concurrency limit (requests over it get 503 + Retry-After) that shrinks
+    # by ADMISSION_BACKOFF when event-loop lag or the class's time to first
+    # byte passes its target, and grows back while requests stay healthy.
+    # /health, /metrics and /stats are never limited.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_LAG_SAMPLE_SECONDS: float = 0.1
+    ADMISSION_LAG_TARGET_SECONDS: float = 0.05
+    ADMISSION_BACKOFF: float = 0.75
+    # Room for the advisor gate's running and queued generations
+    ADMISSION_AI_LIMIT: int = 96
+    ADMISSION_AI_MIN_LIMIT: int = 4
+    ADMISSION_AI_TARGET_SECONDS: float = 5.0
+    ADMISSION_UPSTREAM_LIMIT: int = 128
+    ADMISSION_UPSTREAM_MIN_LIMIT: int = 8
+    ADMISSION_UPSTREAM_TARGET_SECONDS: float = 1.0
+    ADMISSION_DEFAULT_LIMIT: int = 512
+    ADMISSION_DEFAULT_MIN_LIMIT: int = 32
+    ADMISSION_DEFAULT_TARGET_SECONDS: float = 0.25
+    # Per-client token bucket (requests/second, burst) answering 429; an
+    # advisor request costs ADMISSION_AI_COST tokens. Off (0) by default:
+    # behind a proxy or carrier NAT many farmers share one address, so only
+    # enable it together with ADMISSION_TRUSTED_PROXIES where that applies
+    ADMISSION_CLIENT_RATE: float = 0
+    ADMISSION_CLIENT_BURST: float = 40
+    ADMISSION_AI_COST: float = 5
+    ADMISSION_MAX_CLIENTS: int = 10_000
+    # Comma-separated addresses or CIDR ranges of our reverse proxies / load
+    # balancers. Requests from them are keyed by the nearest X-Forwarded-For
+    # address that is not itself a trusted proxy
+    ADMISSION_TRUSTED_PROXIES: str = ""
+
+    # --- Startup Settings ---
+    # Clients built in the background once the server accepts traffic;
+    # anything not listed is built on first use ("redis" only exists when
+    # REDIS_URL is set)
+    WARMUP_SERVICES: str = "http.agmarknet,http.openweather,translator,gemini,redis"
+    # Target for process start to the first served /health
+    # (checked by scripts/startup_profile.py, warned about at startup)
+    STARTUP_BUDGET_SECONDS: float = 2.5
+    # A failed search index build (e.g. Mongo down at boot) is retried,
+    # doubling the wait up to the cap
+    SEARCH_BUILD_RETRY_SECONDS: float = 2.0
+    SEARCH_BUILD_MAX_RETRY_SECONDS: float = 60.0
 
     # --- Pydantic Configuration ---
     # Tells Pydantic to read from a .env file if it exists
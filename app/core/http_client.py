@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.services import services
+
+logger = logging.getLogger(__name__)
+
+upstream_seconds = registry.histogram(
+    "upstream_request_seconds", "Latency of each upstream HTTP attempt", ("upstream", "outcome")
+)
+upstream_retries = registry.counter("upstream_retries_total", "Upstream attempts that were retried", ("upstream",))
+
+# Status codes that are worth another attempt; everything else is final.
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """
+    Raised when an upstream call fails for good (non-retryable status or
+    retry budget exhausted).
+    """
+    def __init__(self, upstream: str, message: str, status_code: Optional[int] = None):
+        super().__init__(f"{upstream}: {message}")
+        self.upstream = upstream
+        self.status_code = status_code
+
+
+class Upstream:
+    """
+    A pooled, keep-alive async HTTP client for a single external provider,
+    with its own timeouts and retry/backoff budget.
+    """
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        timeout: float,
+        connect_timeout: float = 3.0,
+        max_retries: int = 2,
+        retry_budget: float = 15.0,
+        backoff_base: float = 0.2,
+        backoff_cap: float = 2.0,
+        max_connections: int = 50,
+        max_keepalive: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+        )
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        # A transport can be passed in directly, e.g. httpx.MockTransport(handler)
+        self.transport = transport
+        # The pool (and its TLS context) is created on the first request
+        self._client = services.lazy(f"http.{name}", self._create_client)
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=self.limits,
+            transport=self.transport,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client.get()
+
+    async def open(self):
+        self._client.get()
+
+    async def close(self):
+        client = self._client.reset()
+        if client is not None:
+            await client.aclose()
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """
+        Full-jitter exponential backoff, honouring a numeric Retry-After header.
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        GETs `path` and returns the decoded JSON body. Transport errors and
+        retryable statuses are retried until `max_retries` or the time budget
+        runs out.
+        """
+        client = self.client
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            response = None
+            attempt_started = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+                upstream_seconds.observe(time.perf_counter() - attempt_started, self.name, str(response.status_code))
+                if response.status_code < 400:
+                    return response.json()
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise UpstreamError(self.name, f"HTTP {response.status_code}", response.status_code)
+                failure = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                upstream_seconds.observe(time.perf_counter() - attempt_started, self.name, type(e).__name__)
+                failure = f"{type(e).__name__}: {e}"
+
+            delay = self._backoff(attempt, response)
+            elapsed = time.perf_counter() - started
+            if attempt >= self.max_retries or elapsed + delay > self.retry_budget:
+                status_code = response.status_code if response is not None else None
+                raise UpstreamError(self.name, f"giving up after {attempt + 1} attempts ({failure})", status_code)
+
+            logger.warning(f"Upstream {self.name} attempt {attempt + 1} failed ({failure}); retrying in {delay:.2f}s")
+            upstream_retries.inc(self.name)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+class HTTPClients:
+    """
+    Registry of the shared upstream clients; each opens its pool on first use
+    and the app lifespan closes them.
+    """
+    upstreams: Dict[str, Upstream] = {}
+
+http_clients = HTTPClients()
+
+
+def _build_upstreams() -> Dict[str, Upstream]:
+    common = dict(
+        connect_timeout=settings.UPSTREAM_CONNECT_TIMEOUT_SECONDS,
+        max_retries=settings.UPSTREAM_MAX_RETRIES,
+        retry_budget=settings.UPSTREAM_RETRY_BUDGET_SECONDS,
+        max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive=settings.UPSTREAM_MAX_KEEPALIVE,
+    )
+    return {
+        "agmarknet": Upstream(
+            "agmarknet",
+            settings.AGMARKNET_BASE_URL,
+            timeout=settings.AGMARKNET_TIMEOUT_SECONDS,
+            **common,
+        ),
+        "openweather": Upstream(
+            "openweather",
+            settings.OPENWEATHER_BASE_URL,
+            timeout=settings.OPENWEATHER_TIMEOUT_SECONDS,
+            **common,
+        ),
+    }
+
+
+async def open_http_clients(warm: bool = True):
+    """
+    Called on app startup to set up the upstream clients; with `warm=False`
+    their pools are left to open on first use.
+    """
+    if not http_clients.upstreams:
+        http_clients.upstreams = _build_upstreams()
+    if warm:
+        for upstream in http_clients.upstreams.values():
+            await upstream.open()
+    logger.info(f"🌐 Upstream clients ready: {', '.join(http_clients.upstreams)}")
+
+
+async def close_http_clients():
+    """
+    Called on app shutdown to drain keep-alive connections.
+    """
+    for upstream in http_clients.upstreams.values():
+        await upstream.close()
+    http_clients.upstreams = {}
+    logger.info("🔌 Upstream clients closed.")
+
+
+def get_upstream(name: str) -> Upstream:
+    """
+    Returns the shared client for a named upstream ('agmarknet', 'openweather').
+    """
+    if not http_clients.upstreams:
+        http_clients.upstreams = _build_upstreams()
+    return http_clients.upstreams[name]
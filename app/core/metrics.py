@@ -0,0 +1,191 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; covers sub-millisecond cache hits up to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        super().__init__(name, help, label_names)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels: str, value: float):
+        self.values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    """
+    Fixed-bucket histogram. Bucket counts are stored per bucket (not
+    cumulative) so an observation is one bisect and two additions.
+    Updates from driver threads are not locked; under the GIL a lost
+    increment is possible but rare, which is acceptable for monitoring.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self.series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def quantile(self, q: float, *labels: str) -> float:
+        """
+        Upper bound of the bucket holding the q-th observation (an estimate).
+        """
+        series = self.series.get(labels)
+        if not series:
+            return 0.0
+        counts = series[0]
+        target = q * sum(counts)
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            if running >= target:
+                return bound
+        return float("inf")
+
+    def summary(self) -> Dict[Labels, dict]:
+        result = {}
+        for labels, (counts, total) in self.series.items():
+            n = sum(counts)
+            result[labels] = {
+                "count": n,
+                "mean_ms": round(total / n * 1000, 2) if n else 0.0,
+                "p95_ms": round(self.quantile(0.95, *labels) * 1000, 2),
+            }
+        return result
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, label_names))
+
+    def gauge(self, name: str, help: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, label_names))
+
+    def histogram(
+        self, name: str, help: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, label_names, buckets))
+
+    def all(self) -> List[Metric]:
+        return list(self.metrics.values())
+
+    # --- Multi-worker Aggregation ---
+
+    def dump(self) -> dict:
+        """
+        JSON-serializable copy of every series, for merging across workers.
+        """
+        dumped = {}
+        for m in self.metrics.values():
+            entry = {"kind": m.kind, "help": m.help, "labels": m.label_names}
+            if isinstance(m, Histogram):
+                entry["buckets"] = m.buckets
+                entry["series"] = [[list(k), v[0], v[1]] for k, v in m.series.items()]
+            else:
+                entry["series"] = [[list(k), v] for k, v in m.values.items()]
+            dumped[m.name] = entry
+        return dumped
+
+    @staticmethod
+    def merge(dumps: Iterable[dict]) -> "MetricsRegistry":
+        """
+        Sums counters, gauges and histogram buckets from several dumps.
+        """
+        merged = MetricsRegistry()
+        for dumped in dumps:
+            for name, entry in dumped.items():
+                if entry["kind"] == "histogram":
+                    metric = merged.histogram(name, entry["help"], entry["labels"], entry["buckets"])
+                    for labels, counts, total in entry["series"]:
+                        series = metric.series.setdefault(tuple(labels), [[0] * len(counts), 0.0])
+                        series[0] = [a + b for a, b in zip(series[0], counts)]
+                        series[1] += total
+                else:
+                    factory = merged.gauge if entry["kind"] == "gauge" else merged.counter
+                    metric = factory(name, entry["help"], entry["labels"])
+                    for labels, value in entry["series"]:
+                        metric.inc(*labels, amount=value)
+        return merged
+
+
+# --- Prometheus Exposition ---
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render_prometheus(metrics: Iterable[Metric]) -> str:
+    """
+    Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    for m in metrics:
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        if isinstance(m, Histogram):
+            for labels, (counts, total) in sorted(m.series.items()):
+                running = 0
+                for bound, count in zip(m.buckets + (float("inf"),), counts):
+                    running += count
+                    le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                    lines.append(f"{m.name}_bucket{_label_text(m.label_names, labels, le)} {running}")
+                lines.append(f"{m.name}_sum{_label_text(m.label_names, labels)} {total}")
+                lines.append(f"{m.name}_count{_label_text(m.label_names, labels)} {running}")
+        else:
+            for labels, value in sorted(m.values.items()):
+                lines.append(f"{m.name}{_label_text(m.label_names, labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# Global instance
+registry = MetricsRegistry()
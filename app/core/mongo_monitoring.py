@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from pymongo import monitoring
+
+from app.core.metrics import registry
+
+logger = logging.getLogger("WikiKisan.mongo")
+
+# Commands whose first field is not a collection name
+_ADMIN_COMMANDS = {"ping", "hello", "ismaster", "isMaster", "buildInfo", "endSessions", "saslStart", "saslContinue"}
+
+# Where each command keeps the part of the query worth logging
+_SHAPE_FIELDS = {
+    "find": ("filter", "sort", "projection", "limit"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "delete": ("deletes",),
+    "update": ("updates",),
+    "findAndModify": ("query", "sort", "update"),
+    "createIndexes": ("indexes",),
+}
+
+command_seconds = registry.histogram(
+    "mongo_command_seconds", "MongoDB command latency", ("collection", "command")
+)
+command_failures = registry.counter(
+    "mongo_command_failures_total", "Failed MongoDB commands", ("collection", "command")
+)
+slow_commands = registry.counter(
+    "mongo_slow_commands_total", "MongoDB commands over the slow threshold", ("collection", "command")
+)
+checkout_seconds = registry.histogram(
+    "mongo_pool_checkout_seconds", "Time spent waiting for a pooled connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.0),
+)
+checkout_failures = registry.counter(
+    "mongo_pool_checkout_failures_total", "Connection checkouts that failed", ("reason",)
+)
+connections_opened = registry.counter("mongo_connections_created_total", "Connections opened by the pool")
+connections_closed = registry.counter("mongo_connections_closed_total", "Connections closed by the pool", ("reason",))
+connections_in_use = registry.gauge("mongo_connections_checked_out", "Connections currently checked out")
+
+
+def redact(value: Any, depth: int = 0) -> Any:
+    """
+    Keeps operators and field names, replaces every literal with '?', so
+    slow queries can be grouped by shape without logging farmer data.
+    """
+    if depth > 6:
+        return "..."
+    if isinstance(value, dict):
+        return {k: redact(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [redact(v, depth + 1) for v in value[:3]]
+        return shapes + ["..."] if len(value) > 3 else shapes
+    return "?"
+
+
+def query_shape(command_name: str, command: dict) -> dict:
+    shape = {}
+    for field in _SHAPE_FIELDS.get(command_name, ()):
+        if field not in command:
+            continue
+        if field in ("sort", "projection", "key", "limit"):
+            shape[field] = command[field]  # structure, not data
+        elif field == "indexes":
+            shape[field] = [i.get("name") for i in command[field]]
+        else:
+            shape[field] = redact(command[field])
+    if command_name == "insert" and "documents" in command:
+        shape["documents"] = len(command["documents"])
+    return shape
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Times every command per (collection, command) and logs the redacted
+    shape of anything slower than `slow_ms`.
+    """
+    def __init__(self, slow_ms: float):
+        self.slow_seconds = slow_ms / 1000
+        self._started: Dict[Tuple[Any, int], Tuple[str, Any]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        name = event.command_name
+        if name in _ADMIN_COMMANDS:
+            return
+        collection = event.command.get("collection") if name == "getMore" else event.command.get(name)
+        # The shape is only worked out if the command turns out to be slow
+        self._started[(event.connection_id, event.request_id)] = (
+            collection if isinstance(collection, str) else "-",
+            event.command,
+        )
+
+    def _finish(self, event, failed: bool):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        collection, command = started
+        seconds = event.duration_micros / 1_000_000
+        command_seconds.observe(seconds, collection, event.command_name)
+        if failed:
+            command_failures.inc(collection, event.command_name)
+        if self.slow_seconds and seconds >= self.slow_seconds:
+            slow_commands.inc(collection, event.command_name)
+            logger.warning(
+                f"🐢 Slow MongoDB {event.command_name} on {collection}: {seconds * 1000:.1f}ms "
+                f"| shape={query_shape(event.command_name, command)}"
+            )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, failed=True)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Checkout wait and connection churn. Checkout start and finish fire on
+    the same driver thread, so the start time is kept thread-locally.
+    """
+    def __init__(self):
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _waited(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_checked_out(self, event):
+        checkout_seconds.observe(self._waited())
+        connections_in_use.inc()
+
+    def connection_check_out_failed(self, event):
+        checkout_seconds.observe(self._waited())
+        checkout_failures.inc(str(event.reason))
+
+    def connection_checked_in(self, event):
+        connections_in_use.dec()
+
+    def connection_created(self, event):
+        connections_opened.inc()
+
+    def connection_closed(self, event):
+        connections_closed.inc(str(event.reason))
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        logger.warning(f"MongoDB pool cleared for {event.address}")
+
+    def pool_closed(self, event):
+        pass
+
+
+def mongo_stats() -> dict:
+    """
+    Compact view for /stats: command latency per collection/command and
+    pool health.
+    """
+    return {
+        "commands": {f"{c}.{op}": s for (c, op), s in command_seconds.summary().items()},
+        "pool": {
+            "checkout": checkout_seconds.summary().get((), {}),
+            "checked_out": connections_in_use.values.get((), 0),
+            "created": connections_opened.values.get((), 0),
+            "closed": sum(connections_closed.values.values()),
+            "checkout_failures": sum(checkout_failures.values.values()),
+        },
+    }
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Iterable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyService(Generic[T]):
+    """
+    A heavy client (Gemini model, translator, HTTP pool...) built by
+    `factory` on first `get()` rather than at import or startup. Safe to
+    call from worker threads; the factory runs once.
+    """
+    def __init__(self, registry: "ServiceRegistry", name: str, factory: Callable[[], T]):
+        self.registry = registry
+        self.name = name
+        self.factory = factory
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not None
+
+    def get(self) -> T:
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    started = time.perf_counter()
+                    self._value = self.factory()
+                    self.registry.init_seconds[self.name] = time.perf_counter() - started
+        return self._value
+
+    def reset(self) -> Optional[T]:
+        """
+        Forgets the built value (so the next get() builds a new one) and
+        returns it for the caller to close.
+        """
+        with self._lock:
+            value, self._value = self._value, None
+        return value
+
+
+class ServiceRegistry:
+    """
+    Keeps track of lazily created clients and of how long startup took, so
+    cold starts stay fast and their cost is visible in /stats.
+    """
+    def __init__(self):
+        self.created_at = time.perf_counter()
+        self.services: Dict[str, LazyService] = {}
+        self.init_seconds: Dict[str, float] = {}
+        self.startup_seconds: Dict[str, float] = {}
+        self.ready_seconds: Optional[float] = None
+
+    def lazy(self, name: str, factory: Callable[[], T]) -> LazyService[T]:
+        service = LazyService(self, name, factory)
+        self.services[name] = service
+        return service
+
+    @contextmanager
+    def timed(self, step: str):
+        """
+        Records how long a startup step took.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_seconds[step] = time.perf_counter() - started
+
+    def mark_ready(self) -> float:
+        """
+        Called once the app accepts traffic; returns seconds since this module
+        was imported, i.e. roughly since the process began loading the app.
+        """
+        self.ready_seconds = time.perf_counter() - self.created_at
+        return self.ready_seconds
+
+    async def warm_up(self, names: Iterable[str]):
+        """
+        Builds the named services in a worker thread so their imports and
+        handshakes do not stall requests already being served.
+        """
+        for name in names:
+            service = self.services.get(name)
+            if service is None:
+                # e.g. "redis" without REDIS_URL
+                logger.debug(f"No service '{name}' to warm up")
+                continue
+            if service.ready:
+                continue
+            try:
+                await asyncio.to_thread(service.get)
+                logger.info(f"🔥 Warmed up {name} in {self.init_seconds[name] * 1000:.0f}ms")
+            except Exception as e:
+                logger.warning(f"Warm-up of {name} failed, it will be retried on first use: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "ready_seconds": round(self.ready_seconds, 3) if self.ready_seconds is not None else None,
+            "startup_ms": {step: round(s * 1000, 1) for step, s in self.startup_seconds.items()},
+            "services": {
+                name: {
+                    "ready": service.ready,
+                    "init_ms": round(self.init_seconds[name] * 1000, 1) if name in self.init_seconds else None,
+                }
+                for name, service in self.services.items()
+            },
+        }
+
+
+# Global instance
+services = ServiceRegistry()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import registry, MetricsRegistry, render_prometheus
+
+logger = logging.getLogger("WikiKisan.access")
+
+request_seconds = registry.histogram(
+    "http_request_seconds", "Request latency by route template", ("method", "route")
+)
+responses_total = registry.counter(
+    "http_responses_total", "Responses by route template and status code", ("method", "route", "status")
+)
+requests_in_flight = registry.gauge("http_requests_in_flight", "Requests currently being served")
+
+
+def route_template(scope: dict) -> str:
+    """
+    The matched route's path template ('/api/v1/market/prices/{state}/{commodity}'),
+    so series do not multiply with path parameters.
+    """
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: times each request with perf_counter, records
+    per-route latency and status counts, and logs a sample of requests
+    (plus every 5xx and slow request) instead of every one.
+    """
+    def __init__(self, app, sample_rate: float, slow_seconds: float):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Time to headers, as the old middleware reported
+                message.setdefault("headers", []).append(
+                    (b"x-process-time", f"{perf_counter() - started:.4f}s".encode())
+                )
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            requests_in_flight.dec()
+            elapsed = perf_counter() - started
+            method = scope["method"]
+            route = route_template(scope)
+            request_seconds.observe(elapsed, method, route)
+            responses_total.inc(method, route, str(status))
+            if status >= 500 or elapsed >= self.slow_seconds or random.random() < self.sample_rate:
+                logger.info(f"Path: {scope['path']} | Route: {route} | Method: {method} | Status: {status} | Time: {elapsed:.4f}s")
+
+
+class WorkerMetricsExporter:
+    """
+    With several uvicorn/gunicorn workers each process has its own registry.
+    When METRICS_DIR is set, every worker writes a snapshot there
+    periodically and /metrics merges all snapshots.
+    """
+    def __init__(self, directory: Optional[str], interval: float):
+        self.directory = Path(directory) if directory else None
+        self.interval = interval
+        self.path = self.directory / f"worker-{os.getpid()}.json" if self.directory else None
+        self._task: Optional[asyncio.Task] = None
+
+    def write(self):
+        # Write-then-rename so readers never see a half-written snapshot
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(registry.dump(), f)
+        os.replace(tmp, self.path)
+
+    def render(self) -> str:
+        if self.directory is None:
+            return render_prometheus(registry.all())
+        self.write()
+        dumps = []
+        for path in self.directory.glob("worker-*.json"):
+            try:
+                dumps.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return render_prometheus(MetricsRegistry.merge(dumps).all())
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Could not write worker metrics: {e}")
+
+    async def start(self):
+        if self.directory is not None and self._task is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            # Departed workers' counters would otherwise be summed forever
+            self.path.unlink(missing_ok=True)
+
+
+# Global instance
+metrics_exporter = WorkerMetricsExporter(settings.METRICS_DIR, settings.METRICS_FLUSH_SECONDS)
@@ -1,6 +1,7 @@
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.core.mongo_monitoring import CommandMetrics, PoolMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -13,25 +14,40 @@ class Database:
 
 db = Database()
 
-async def connect_to_mongo():
+async def connect_to_mongo(ping: bool = True):
     """
-    Called on app startup to initialize the connection pool.
+    Called on app startup to initialize the connection pool. The client
+    connects in the background; with `ping=False` startup does not wait for
+    the server (see ping_mongo).
     """
     try:
+        listeners = [CommandMetrics(settings.MONGO_SLOW_QUERY_MS), PoolMetrics()] if settings.MONGO_MONITORING else []
         db.client = AsyncIOMotorClient(
             settings.DATABASE_URL,
-            maxPoolSize=10,
-            minPoolSize=1,
-            serverSelectionTimeoutMS=5000
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+            readPreference=settings.MONGO_READ_PREFERENCE,
+            event_listeners=listeners,
         )
-        # Check if the connection is successful by pinging the server
-        await db.client.admin.command('ping')
         db.db = db.client.get_database("wikikisan")
-        logger.info("✅ Successfully connected to MongoDB.")
+        if ping:
+            await ping_mongo()
     except Exception as e:
         logger.error(f"❌ Could not connect to MongoDB: {e}")
         raise e
 
+async def ping_mongo():
+    """
+    Checks the connection is usable; raises if no server can be selected.
+    """
+    await db.client.admin.command('ping')
+    logger.info("✅ Successfully connected to MongoDB.")
+
 async def close_mongo_connection():
     """
     Called on app shutdown to close all active connections.
@@ -1,12 +1,35 @@
 import time
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+# Imported first so the registry's clock starts with the app import
+from app.core.services import services
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.api import community, weather, market
-from app.database import connect_to_mongo, close_mongo_connection
+from app.api import community, weather, market, search, advisor
+from app.database import connect_to_mongo, ping_mongo, close_mongo_connection
+from app.core.http_client import open_http_clients, close_http_clients
+from app.services.market_data import market_data
+from app.services import market_history, posts, comments
+from app.services.weather_data import weather_data
+from app.services.advisory import advisory_service
+from app.services.reactions import reaction_buffer
+from app.services.trending import trending
+from app.services.search_index import search_index
+from app.services.translate import translator
+from app.services.pretranslate import pretranslation
+from app.services.ai_advisor import advisor_gate
+from app.services.answer_cache import answer_cache
+from app.services.llm_scheduler import llm_scheduler
+from app.services.feed_cache import feed_cache
+from app.core.mongo_monitoring import mongo_stats
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.telemetry import MetricsMiddleware, metrics_exporter
+from app.core.compression import CompressionMiddleware
+from app.core.admission import AdmissionMiddleware, admission
 
 # --- Advanced Logging Configuration ---
 logging.basicConfig(
@@ -15,16 +38,83 @@ logging.basicConfig(
 )
 logger = logging.getLogger("WikiKisan")
 
+# --- Background Startup ---
+async def restore_state():
+    """
+    Mongo-backed startup work: checking the connection, index builds and
+    restoring trending sketches, pending translations and the search index.
+    """
+    with services.timed("mongo_ping"):
+        try:
+            await ping_mongo()
+        except Exception as e:
+            logger.error(f"❌ Could not connect to MongoDB: {e}")
+    with services.timed("indexes"):
+        try:
+            await market_history.ensure_indexes()
+            await posts.ensure_indexes()
+            await comments.ensure_indexes()
+        except Exception as e:
+            logger.warning(f"Index build failed: {e}")
+    with services.timed("trending"):
+        await trending.start()
+    with services.timed("pretranslation"):
+        await pretranslation.start()
+    # /search answers 503 until it is ready
+    with services.timed("search_index"):
+        await search_index.build_with_retry(settings.SEARCH_BUILD_RETRY_SECONDS, settings.SEARCH_BUILD_MAX_RETRY_SECONDS)
+
+async def warm_up_services():
+    with services.timed("warm_up"):
+        await services.warm_up(name.strip() for name in settings.WARMUP_SERVICES.split(",") if name.strip())
+
+async def finish_startup():
+    """
+    Work that does not have to happen before the first request, run once the
+    server is already accepting traffic. Warm-up does not wait for Mongo.
+    """
+    await asyncio.gather(restore_state(), warm_up_services())
+
 # --- Lifespan Management (Startup/Shutdown) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # This code runs before the app starts taking requests
+    # This code runs before the app starts taking requests; anything slow
+    # belongs in finish_startup
     logger.info("🚀 Starting up WikiKisan Services...")
-    await connect_to_mongo()
+    with services.timed("metrics"):
+        await metrics_exporter.start()
+    with services.timed("mongo"):
+        await connect_to_mongo(ping=False)
+    await admission.start()
+    await open_http_clients(warm=False)
+    await market_data.start()
+    await weather_data.start()
+    await advisory_service.start()
+    await reaction_buffer.start()
+    await llm_scheduler.start()
+    background = asyncio.create_task(finish_startup())
+    ready = services.mark_ready()
+    if ready > settings.STARTUP_BUDGET_SECONDS:
+        logger.warning(f"Startup took {ready:.2f}s, over the {settings.STARTUP_BUDGET_SECONDS:.1f}s budget")
+    else:
+        logger.info(f"✅ Ready in {ready:.2f}s")
     yield
     # This code runs when the app is shutting down
     logger.info("🔌 Shutting down WikiKisan Services...")
+    background.cancel()
+    await llm_scheduler.stop()
+    await pretranslation.stop()
+    await translator.stop()
+    await trending.stop()
+    await reaction_buffer.stop()
+    await advisory_service.stop()
+    await weather_data.stop()
+    await market_data.stop()
+    await close_http_clients()
+    await cache.stop()
     await close_mongo_connection()
+    await admission.stop()
+    await metrics_exporter.stop()
 
 # --- FastAPI Initialization ---
 app = FastAPI(
@@ -36,15 +126,28 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
-# --- Middleware: Performance Logging ---
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = f"{process_time:.4f}s"
-    logger.info(f"Path: {request.url.path} | Method: {request.method} | Time: {process_time:.4f}s")
-    return response
+# --- Middleware: Response Compression ---
+# Added before the metrics middleware so request timings include it
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_BYTES,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+# --- Middleware: Admission Control ---
+# Inside the metrics middleware so rejections are timed and counted too.
+# They never reach routing, so the HTTP metrics file them under "unmatched";
+# admission_rejected_total has them per route class and reason
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
+# --- Middleware: Performance Metrics ---
+# Per-route latency histograms and sampled access logs (see app/core/telemetry.py)
+app.add_middleware(
+    MetricsMiddleware,
+    sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    slow_seconds=settings.ACCESS_LOG_SLOW_SECONDS,
+)
 
 # --- CORS Configuration ---
 app.add_middleware(
@@ -72,6 +175,8 @@ async def global_exception_handler(request: Request, exc: Exception):
 app.include_router(community.router, prefix="/api/v1/community", tags=["Community"])
 app.include_router(weather.router, prefix="/api/v1/weather", tags=["Weather"])
 app.include_router(market.router, prefix="/api/v1/market", tags=["Market"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
+app.include_router(advisor.router, prefix="/api/v1/advisor", tags=["AI Advisor"])
 
 # --- System Health Check ---
 @app.get("/health", tags=["System"])
@@ -83,6 +188,30 @@ async def health_check():
         "version": app.version
     }
 
+@app.get("/metrics", tags=["System"], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Prometheus scrape endpoint (merged across workers when METRICS_DIR is set).
+    """
+    return PlainTextResponse(metrics_exporter.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats", tags=["System"])
+async def service_stats():
+    """
+    Cache effectiveness counters and startup timings for this worker.
+    """
+    return {
+        "services": services.stats(),
+        "cache": cache.stats(),
+        "translation": translator.stats(),
+        "feed_cache": feed_cache.stats(),
+        "advisor": advisor_gate.stats(),
+        "answer_cache": answer_cache.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "admission": admission.stats(),
+        "mongo": mongo_stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict
@@ -24,7 +25,12 @@ class AuthorModel(BaseModel):
     profile_pic: Optional[str] = None
 
 class CommentModel(BaseModel):
+    """
+    Stored in the 'comments' collection, one document per comment, indexed
+    on (post_id, created_at).
+    """
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    post_id: str
     author: AuthorModel
     content: str
     created_at: datetime = Field(default_factory=datetime.now)
@@ -45,7 +51,10 @@ class CommunityPost(BaseModel):
     tags: List[str] = []
     
     author: AuthorModel
-    comments: List[CommentModel] = []
+    # Kept in sync with the comments collection; the preview holds at most a
+    # few trimmed expert answers, never the whole thread
+    comment_count: int = 0
+    comment_preview: List[CommentModel] = []
     
     views: int = 0
     reaction_count: int = 0
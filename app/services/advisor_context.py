@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.services.market_data import market_data
+from app.services.search_index import search_index
+from app.services.weather_data import weather_data
+
+logger = logging.getLogger(__name__)
+
+
+async def weather_source(location: str, crop: Optional[str], question: str) -> dict:
+    place, _, data = await weather_data.current(location)
+    return {
+        "place": place.name,
+        "state": place.state,
+        "temp": data["main"]["temp"],
+        "humidity": data["main"]["humidity"],
+        "rain": data.get("rain", {}).get("1h", 0),
+        "description": data["weather"][0]["description"],
+    }
+
+
+async def price_source(location: str, crop: Optional[str], question: str) -> Optional[dict]:
+    if not crop:
+        return None
+    place = await weather_data.resolve(location)
+    if not place.state:
+        return None
+    snapshot = await market_data.get_prices(place.state, crop)
+    prices = [int(r["modal_price"]) for r in snapshot.records if str(r.get("modal_price", "")).isdigit()]
+    if not prices:
+        return None
+    return {"modal_price": statistics.median(prices), "markets": len(prices), "unit": "INR/Quintal"}
+
+
+async def snippets_source(location: str, crop: Optional[str], question: str) -> Optional[list]:
+    if not search_index.ready:
+        return None
+    hits, _ = search_index.search(f"{crop or ''} {question}", limit=3)
+    return [{"type": h.type, "title": h.title, "text": h.snippet} for h in hits] or None
+
+
+ContextSource = Callable[[str, Optional[str], str], Awaitable[Optional[object]]]
+
+
+class ContextAssembler:
+    """
+    Gathers advisor context from every source at once. Each source has its
+    own deadline and the whole stage has a fixed budget; whatever has not
+    arrived by then is left out and named in `missing`.
+    """
+    def __init__(self, sources: Dict[str, ContextSource], deadlines: Dict[str, float], budget: float):
+        self.sources = sources
+        self.deadlines = deadlines
+        self.budget = budget
+
+    async def _run(self, name: str, location: str, crop: Optional[str], question: str):
+        return await asyncio.wait_for(
+            self.sources[name](location, crop, question), self.deadlines.get(name, self.budget)
+        )
+
+    async def assemble(self, location: Optional[str], crop: Optional[str], question: str) -> dict:
+        started = time.perf_counter()
+        context: dict = {"crop": crop, "location": location}
+        missing: Dict[str, str] = {}
+        names = list(self.sources)
+        if not location:
+            # Only the snippet search works without a place
+            names = [n for n in names if n == "snippets"]
+            missing.update({n: "no location" for n in self.sources if n != "snippets"})
+        tasks = {
+            asyncio.create_task(self._run(name, location, crop, question)): name for name in names
+        }
+        done, pending = await asyncio.wait(tasks, timeout=self.budget) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+            missing[tasks[task]] = "timeout"
+        for task in done:
+            name = tasks[task]
+            error = task.exception()
+            if isinstance(error, asyncio.TimeoutError):
+                missing[name] = "timeout"
+            elif error is not None:
+                logger.warning(f"Advisor context source '{name}' failed: {error}")
+                missing[name] = "error"
+            elif task.result() is None:
+                missing[name] = "unavailable"
+            else:
+                context[name] = task.result()
+
+        context["missing"] = missing
+        context["assembled_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return context
+
+
+# Global instance
+context_assembler = ContextAssembler(
+    sources={"weather": weather_source, "price": price_source, "snippets": snippets_source},
+    deadlines={
+        "weather": settings.ADVISOR_WEATHER_DEADLINE_SECONDS,
+        "price": settings.ADVISOR_PRICE_DEADLINE_SECONDS,
+        "snippets": settings.ADVISOR_SNIPPETS_DEADLINE_SECONDS,
+    },
+    budget=settings.ADVISOR_CONTEXT_BUDGET_SECONDS,
+)
@@ -0,0 +1,252 @@
+import asyncio
+import csv
+import logging
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.weather_data import weather_data, BucketKey
+
+logger = logging.getLogger(__name__)
+
+RULES_FILE = Path(__file__).resolve().parent.parent / "data" / "crop_rules.csv"
+
+# Order of the last axis of every forecast array
+VARIABLES = ("temp", "humidity", "rain", "wind")
+
+# OpenWeather's free forecast is in 3-hour steps
+FORECAST_STEP_HOURS = 3
+
+
+@dataclass
+class RuleTable:
+    """
+    Crop rules as parallel arrays: one row per rule, one column per variable.
+    Missing bounds are stored as -inf/+inf and exclusive ones as the next float
+    inside the band, so every rule is a plain inclusive band check.
+    """
+    crops: List[str]
+    crop_of_rule: np.ndarray
+    names: List[str]
+    advice: List[str]
+    priority: np.ndarray
+    min_hours: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+
+
+def _bound(text: str, lower: bool) -> float:
+    """
+    A CSV bound: empty means unbounded, a leading ">" or "<" makes it
+    exclusive (e.g. temp_min ">25" matches only above 25).
+    """
+    text = text.strip()
+    if not text:
+        return -np.inf if lower else np.inf
+    if text[0] in "<>":
+        return float(np.nextafter(float(text[1:]), np.inf if lower else -np.inf))
+    return float(text)
+
+
+def load_rules(path: Path = RULES_FILE) -> RuleTable:
+    crops, crop_of_rule, names, advice, priority, min_hours, lower, upper = [], [], [], [], [], [], [], []
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            crop = row["crop"].strip().lower()
+            if crop not in crops:
+                crops.append(crop)
+            crop_of_rule.append(crops.index(crop))
+            names.append(row["rule"])
+            advice.append(row["advice"])
+            priority.append(int(row["priority"]))
+            min_hours.append(float(row["min_hours"] or 0))
+            lower.append([_bound(row[f"{v}_min"], lower=True) for v in VARIABLES])
+            upper.append([_bound(row[f"{v}_max"], lower=False) for v in VARIABLES])
+    return RuleTable(
+        crops=crops,
+        crop_of_rule=np.array(crop_of_rule),
+        names=names,
+        advice=advice,
+        priority=np.array(priority),
+        min_hours=np.array(min_hours),
+        lower=np.array(lower),
+        upper=np.array(upper),
+    )
+
+
+class AdvisoryEngine:
+    """
+    Evaluates every crop rule against whole forecast arrays at once and turns
+    the matching time steps into advisory windows.
+    """
+    def __init__(self, rules: RuleTable):
+        self.rules = rules
+
+    def _rule_rows(self, crops: Sequence[str]) -> np.ndarray:
+        wanted = [self.rules.crops.index(c) for c in crops if c in self.rules.crops]
+        return np.flatnonzero(np.isin(self.rules.crop_of_rule, wanted))
+
+    def evaluate(
+        self,
+        values: np.ndarray,
+        times: np.ndarray,
+        crops: Sequence[str],
+        step_hours: float = FORECAST_STEP_HOURS,
+    ) -> List[Dict[str, List[dict]]]:
+        """
+        `values` is (locations, steps, variables) and `times` is (locations,
+        steps) in epoch seconds; NaN padding never matches a rule. Returns one
+        {crop: [window, ...]} dict per location, window times in UTC.
+        """
+        rows = self._rule_rows(crops)
+        results = [{c: [] for c in crops if c in self.rules.crops} for _ in range(values.shape[0])]
+        if rows.size == 0 or values.size == 0:
+            return results
+
+        lower = self.rules.lower[rows][:, None, None, :]
+        upper = self.rules.upper[rows][:, None, None, :]
+        # (rules, locations, steps): every condition of a rule holds at that step
+        matched = ((values[None] >= lower) & (values[None] <= upper)).all(axis=3)
+
+        # Run boundaries along the time axis give each rule's windows
+        padded = np.zeros(matched.shape[:2] + (matched.shape[2] + 2,), dtype=np.int8)
+        padded[:, :, 1:-1] = matched
+        edges = np.diff(padded, axis=2)
+        starts = np.argwhere(edges == 1)
+        ends = np.argwhere(edges == -1)[:, 2]
+
+        hours = (ends - starts[:, 2]) * step_hours
+        keep = hours >= np.maximum(self.rules.min_hours[rows][starts[:, 0]], step_hours)
+        rule = rows[starts[keep, 0]]
+        loc = starts[keep, 1]
+        first = times[loc, starts[keep, 2]]
+        last = times[loc, ends[keep] - 1] + step_hours * 3600
+        crop = self.rules.crop_of_rule[rule]
+
+        # Order windows by location, crop, start time, then priority
+        order = np.lexsort((-self.rules.priority[rule], first, crop, loc))
+        start_at = first[order].astype("datetime64[s]").tolist()
+        end_at = last[order].astype("datetime64[s]").tolist()
+        for r, l, c, begin, end, length in zip(
+            rule[order].tolist(), loc[order].tolist(), crop[order].tolist(), start_at, end_at, hours[keep][order].tolist()
+        ):
+            results[l][self.rules.crops[c]].append({
+                "rule": self.rules.names[r],
+                "advice": self.rules.advice[r],
+                "priority": int(self.rules.priority[r]),
+                "start": begin,
+                "end": end,
+                "hours": float(length),
+            })
+        return results
+
+    def evaluate_point(self, crop: str, temp: float, humidity: float, rain: float, wind: float = 0.0) -> List[Tuple[int, str]]:
+        """
+        Matches a single reading; returns (priority, advice) pairs, highest
+        priority first. Rules with a minimum duration (spray windows and the
+        like) are skipped, since one reading cannot show a sustained spell.
+        """
+        rows = self._rule_rows([crop])
+        rows = rows[self.rules.min_hours[rows] == 0]
+        reading = np.array([temp, humidity, rain, wind])
+        matched = ((reading >= self.rules.lower[rows]) & (reading <= self.rules.upper[rows])).all(axis=1)
+        hits = rows[matched]
+        return sorted(((int(self.rules.priority[r]), self.rules.advice[r]) for r in hits), reverse=True)
+
+
+def forecast_arrays(forecasts: List[Optional[dict]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stacks OpenWeather 3-hourly forecasts into (locations, steps, variables)
+    values and (locations, steps) times, NaN/0-padded to a common length.
+    """
+    steps = max((len(f.get("list", [])) for f in forecasts if f), default=0)
+    values = np.full((len(forecasts), steps, len(VARIABLES)), np.nan)
+    times = np.zeros((len(forecasts), steps))
+    for i, forecast in enumerate(forecasts):
+        for t, item in enumerate((forecast or {}).get("list", [])):
+            main = item.get("main", {})
+            values[i, t] = (
+                main.get("temp", math.nan),
+                main.get("humidity", math.nan),
+                item.get("rain", {}).get("3h", 0.0) / FORECAST_STEP_HOURS,
+                item.get("wind", {}).get("speed", 0.0),
+            )
+            times[i, t] = item.get("dt", 0)
+    return values, times
+
+
+class AdvisoryService:
+    """
+    Keeps per-crop advisories for every bundled district precomputed from the
+    latest forecasts, and computes them on demand for anywhere else.
+    """
+    def __init__(self, engine: AdvisoryEngine, refresh_interval: float, fetch_concurrency: int = 8):
+        self.engine = engine
+        self.refresh_interval = refresh_interval
+        self.fetch_concurrency = fetch_concurrency
+        self.precomputed: Dict[BucketKey, Dict[str, List[dict]]] = {}
+        self.computed_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def precompute(self):
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+
+        async def fetch(bucket: BucketKey) -> Optional[dict]:
+            async with semaphore:
+                try:
+                    return await weather_data.get_forecast(bucket)
+                except Exception as e:
+                    logger.warning(f"Forecast fetch failed for bucket {bucket}: {e}")
+                    return None
+
+        buckets = list({weather_data.bucket_for(p.lat, p.lon) for p in weather_data.districts})
+        forecasts = await asyncio.gather(*(fetch(b) for b in buckets))
+
+        started = time.perf_counter()
+        values, times = forecast_arrays(forecasts)
+        results = self.engine.evaluate(values, times, self.engine.rules.crops)
+        self.precomputed = {b: r for b, r, f in zip(buckets, results, forecasts) if f}
+        self.computed_at = time.time()
+        logger.info(
+            f"🌱 Precomputed advisories for {len(self.precomputed)} districts x "
+            f"{len(self.engine.rules.crops)} crops in {time.perf_counter() - started:.3f}s"
+        )
+
+    async def advisory(self, bucket: BucketKey, crops: List[str]) -> Dict[str, List[dict]]:
+        windows = self.precomputed.get(bucket)
+        if windows is None:
+            forecast = await weather_data.get_forecast(bucket)
+            values, times = forecast_arrays([forecast])
+            windows = self.engine.evaluate(values, times, crops)[0]
+        return {c: windows.get(c, []) for c in crops if c in self.engine.rules.crops}
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.precompute()
+            except Exception as e:
+                logger.error(f"Advisory precompute failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global instances
+advisory_engine = AdvisoryEngine(load_rules())
+advisory_service = AdvisoryService(advisory_engine, refresh_interval=settings.ADVISORY_REFRESH_SECONDS)
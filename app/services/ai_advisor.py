@@ -0,0 +1,285 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Deque
+
+from app.core.config import settings
+from app.core.services import services
+from app.services.answer_cache import answer_cache
+from app.services.llm_scheduler import llm_scheduler, estimate_tokens, Priority
+
+logger = logging.getLogger(__name__)
+
+LANGUAGE_NAMES = {"en": "English", "hi": "Hindi", "te": "Telugu"}
+
+
+def is_quota_error(error: Exception) -> bool:
+    """
+    True for google.api_core's ResourceExhausted (HTTP 429). Checked by code
+    so the Google SDK is only imported once the model is actually built.
+    """
+    return getattr(error, "code", None) == 429
+
+
+class AdvisorBusy(Exception):
+    """
+    Raised when a request cannot get a generation slot; `retry_after` is a
+    hint in seconds for the client.
+    """
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Lease:
+    """
+    One held generation slot. Releasing twice is a no-op, so both the stream
+    and the response's cleanup hook can release it.
+    """
+    def __init__(self, gate: "FairGate"):
+        self.gate = gate
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.gate._release()
+
+
+class FairGate:
+    """
+    Bounded concurrency with a FIFO waiting line. Requests beyond
+    `max_concurrent` wait in arrival order; past `max_queue` waiters, or after
+    `max_wait` seconds in line, they are turned away instead of piling up.
+    """
+    def __init__(self, max_concurrent: int, max_queue: int, max_wait: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.counters = {"admitted": 0, "rejected_queue_full": 0, "rejected_wait": 0}
+
+    async def acquire(self) -> Lease:
+        if self.active < self.max_concurrent and not self.waiters:
+            self.active += 1
+            self.counters["admitted"] += 1
+            return Lease(self)
+        if len(self.waiters) >= self.max_queue:
+            self.counters["rejected_queue_full"] += 1
+            raise AdvisorBusy("Advisor is at capacity, please retry shortly", math.ceil(self.max_wait))
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                lease = Lease(self)
+                if isinstance(e, asyncio.CancelledError):
+                    lease.release()
+                    raise
+                self.counters["admitted"] += 1
+                return lease
+            waiter.cancel()
+            self.waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.counters["rejected_wait"] += 1
+            raise AdvisorBusy("Advisor queue wait exceeded, please retry shortly", math.ceil(self.max_wait))
+        self.counters["admitted"] += 1
+        return Lease(self)
+
+    def _release(self):
+        # Hand the slot straight to the oldest waiter so nobody can jump the line
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {**self.counters, "active": self.active, "queued": len(self.waiters)}
+
+
+class FakeStreamChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    """
+    Local stand-in for the Gemini model with the same async streaming shape,
+    used for development and load tests (ADVISOR_FAKE_MODEL=true).
+    """
+    def __init__(self, first_token_delay: float = 0.3, token_delay: float = 0.02, error_rate: float = 0.0):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+
+    async def generate_content_async(self, contents: str, stream: bool = False):
+        if self.error_rate and random.random() < self.error_rate:
+            from google.api_core.exceptions import ResourceExhausted
+            raise ResourceExhausted("Fake model quota exceeded")
+        words = (
+            "Spray neem oil (5 ml per litre) in the evening, remove badly affected "
+            "leaves, and avoid overhead irrigation until the weather clears."
+        ).split()
+
+        async def chunks():
+            await asyncio.sleep(self.first_token_delay)
+            for i, word in enumerate(words):
+                if i:
+                    await asyncio.sleep(self.token_delay)
+                yield FakeStreamChunk(word + " ")
+
+        return chunks()
+
+
+def create_gemini_model():
+    """
+    Imports and configures the Gemini SDK; deferred to first use because the
+    import alone costs most of a second of cold start.
+    """
+    import google.generativeai as genai
+
+    # Configure Gemini with your API Key
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    # We use 'flash' for speed and cost-efficiency
+    return genai.GenerativeModel(settings.GEMINI_MODEL)
+
+
+class AIAdvisorService:
+    def __init__(self, fake: bool = False):
+        self.gemini = services.lazy(
+            "gemini",
+            (lambda: FakeModel(settings.ADVISOR_FAKE_FIRST_TOKEN_SECONDS, error_rate=settings.ADVISOR_FAKE_ERROR_RATE))
+            if fake else create_gemini_model,
+        )
+        self.system_prompt = (
+            "You are WikiKisan AI, an expert agricultural advisor. "
+            "Your goal is to provide accurate, sustainable, and practical farming advice "
+            "to Indian farmers. Focus on crop health, soil quality, and pest management. "
+            "If a query is not related to farming, politely decline to answer."
+        )
+
+    async def model(self):
+        # Built off the event loop if warm-up has not got to it yet
+        if self.gemini.ready:
+            return self.gemini.get()
+        return await asyncio.to_thread(self.gemini.get)
+
+    def build_prompt(self, user_query: str, context: dict = None, language: str = "en") -> str:
+        full_prompt = f"{self.system_prompt}\n\n"
+
+        if context:
+            full_prompt += self.format_context(context)
+
+        if language != "en":
+            full_prompt += f"Answer in {LANGUAGE_NAMES.get(language, language)}.\n"
+        full_prompt += f"Farmer Question: {user_query}"
+        return full_prompt
+
+    def format_context(self, context: dict) -> str:
+        lines = []
+        if context.get("crop") or context.get("location"):
+            lines.append(f"Farmer grows {context.get('crop') or 'unspecified crops'} near {context.get('location') or 'an unspecified place'}.")
+        weather = context.get("weather")
+        if isinstance(weather, dict):
+            lines.append(
+                f"Current Weather is {weather.get('description', '')}, {weather.get('temp')}°C, "
+                f"humidity {weather.get('humidity')}%, rain {weather.get('rain', 0)} mm/h."
+            )
+        elif weather:
+            lines.append(f"Current Weather is {weather}.")
+        price = context.get("price")
+        if isinstance(price, dict):
+            lines.append(f"Market Price is {price.get('modal_price')} {price.get('unit', 'INR/Quintal')} (median across {price.get('markets', 1)} mandis).")
+        elif price:
+            lines.append(f"Market Price is {price}.")
+        for snippet in context.get("snippets") or []:
+            lines.append(f"Related {snippet['type']}: {snippet['title']} - {snippet['text']}")
+        if context.get("missing"):
+            unavailable = ", ".join(f"{name} ({reason})" for name, reason in context["missing"].items())
+            lines.append(f"Unavailable context: {unavailable}. Do not guess these; say so if they matter.")
+        return "Context:\n" + "\n".join(lines) + "\n" if lines else ""
+
+    async def open_stream(
+        self, user_query: str, context: dict = None, language: str = "en", priority: Priority = Priority.INTERACTIVE
+    ) -> AsyncIterator[str]:
+        """
+        Waits for model quota and starts generation, so quota errors surface
+        before any output is sent. For interactive calls one provider 429 is
+        retried after backoff; other priorities give up their quota slot at once.
+        Returns an iterator over the answer's text chunks.
+        """
+        prompt = self.build_prompt(user_query, context, language)
+        tokens = estimate_tokens(prompt, settings.LLM_EXPECTED_OUTPUT_TOKENS)
+        attempts = 2 if priority is Priority.INTERACTIVE else 1
+        for attempt in range(attempts):
+            await llm_scheduler.acquire(priority, tokens)
+            model = await self.model()
+            started = time.perf_counter()
+            try:
+                response = await model.generate_content_async(prompt, stream=True)
+                break
+            except Exception as e:
+                if not is_quota_error(e):
+                    raise
+                llm_scheduler.record_throttled()
+                if attempt == attempts - 1:
+                    raise
+        return self._relay(response, user_query, context, language, started)
+
+    async def _relay(self, response, user_query: str, context: dict, language: str, started: float) -> AsyncIterator[str]:
+        parts = []
+        try:
+            async for chunk in response:
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            if is_quota_error(e):
+                llm_scheduler.record_throttled()
+            raise
+        llm_scheduler.record_success()
+        # Only complete answers are cached
+        answer_cache.store(user_query, language, context, "".join(parts), time.perf_counter() - started)
+
+    async def stream_advice(
+        self, user_query: str, context: dict = None, language: str = "en", priority: Priority = Priority.INTERACTIVE
+    ) -> AsyncIterator[str]:
+        """
+        Yields the answer as the model produces it, without blocking the
+        event loop.
+        """
+        async for text in await self.open_stream(user_query, context, language, priority):
+            yield text
+
+    async def get_farming_advice(
+        self, user_query: str, context: dict = None, language: str = "en", priority: Priority = Priority.STANDARD
+    ) -> str:
+        """
+        Generates AI advice. Context can include weather or market data.
+        """
+        cached = answer_cache.lookup(user_query, language, context)
+        if cached is not None:
+            return cached.answer
+        try:
+            return "".join([text async for text in self.stream_advice(user_query, context, language, priority)])
+        except Exception as e:
+            return f"I'm sorry, I'm having trouble connecting to my knowledge base. Error: {str(e)}"
+
+
+# Global instances
+ai_advisor = AIAdvisorService(fake=settings.ADVISOR_FAKE_MODEL)
+advisor_gate = FairGate(
+    max_concurrent=settings.ADVISOR_MAX_CONCURRENT,
+    max_queue=settings.ADVISOR_MAX_QUEUE,
+    max_wait=settings.ADVISOR_MAX_WAIT_SECONDS,
+)
@@ -0,0 +1,243 @@
+import logging
+import math
+import time
+import zlib
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.search_index import skeleton, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Filler words that change the wording of a question but not what is asked.
+# Negations and timing words ("not", "before", "after") are kept on purpose.
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "was", "be", "to", "of", "for", "on", "in", "at", "my", "me",
+    "i", "we", "our", "you", "your", "it", "its", "this", "that", "these", "those", "and", "or",
+    "do", "does", "did", "can", "could", "should", "would", "will", "what", "which", "how", "please",
+    "tell", "about", "with", "there", "some", "any", "sir", "madam", "help",
+    "का", "की", "के", "को", "में", "है", "हैं", "क्या", "कैसे", "मेरे", "मेरी", "और", "से", "पर",
+    "ఏమి", "ఎలా", "నా", "లో", "కి", "మరియు",
+}
+
+# Words whose difference changes the answer even when the rest of the question
+# matches: the crop, the symptom and whether something should (not) be done.
+# Two questions are only near-duplicates if they agree on all of these.
+KEY_WORDS = {
+    # Crops
+    "chilli", "chili", "mirchi", "paddy", "rice", "cotton", "maize", "corn", "turmeric", "tomato", "groundnut",
+    "peanut", "onion", "wheat", "sugarcane", "brinjal", "potato", "banana", "mango", "soybean", "gram", "redgram",
+    "मिर्च", "मिर्ची", "धान", "चावल", "कपास", "मक्का", "हल्दी", "टमाटर", "मूंगफली", "प्याज", "गेहूं", "गन्ना", "बैंगन", "आलू",
+    "మిర్చి", "వరి", "పత్తి", "మొక్కజొన్న", "పసుపు", "టమాటా", "వేరుశెనగ", "ఉల్లి", "గోధుమ", "చెరకు", "వంకాయ",
+    # Symptoms and colours
+    "white", "yellow", "brown", "black", "red", "spots", "spot", "curl", "wilt", "wilting", "rot", "blight",
+    "mildew", "rust", "holes", "dry", "drying", "falling", "drop", "lesions", "thrips", "aphids", "whitefly",
+    "borer", "mites", "worms", "caterpillar",
+    "सफेद", "पीले", "पीला", "भूरे", "काले", "धब्बे", "मुरझा", "सड़न",
+    "తెల్లని", "పసుపు", "గోధుమ", "నల్ల", "మచ్చలు", "ఎండి",
+    # Negations and timing
+    "not", "no", "don", "dont", "never", "without", "avoid", "before", "after",
+    "नहीं", "मत", "न", "बिना", "पहले", "बाद",
+    "వద్దు", "కాదు", "లేదు", "లేకుండా", "ముందు", "తర్వాత",
+}
+
+# Multiply-shift hashing needs a prime above the 32-bit shingle hashes
+_PRIME = (1 << 32) + 15
+
+CacheKey = Tuple[str, str]
+
+
+def shingles(question: str) -> FrozenSet[str]:
+    """
+    Order-insensitive content words, spelled through the transliteration
+    skeleton so 'neem'/'नीम' and 'chilli'/'chili' collide.
+    """
+    return frozenset(skeleton(t) for t in tokenize(question) if t not in STOPWORDS)
+
+
+KEY_TERMS = frozenset(skeleton(t) for w in KEY_WORDS for t in tokenize(w))
+
+
+def _number(value) -> Optional[float]:
+    # Context comes from the client, so readings may be strings or garbage
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def context_bucket(context: Optional[dict]) -> str:
+    """
+    Coarse fingerprint of the advisor context. Answers are only shared
+    between questions asked under similar conditions: same crop and place,
+    temperature within 5°C, humidity within 20%, rain or no rain, and mandi
+    prices within ~10% of each other.
+    """
+    if not context:
+        return ""
+    parts = []
+    for name in ("crop", "location"):
+        if context.get(name):
+            parts.append(f"{name}={str(context[name]).strip().lower()}")
+    weather = context.get("weather")
+    if isinstance(weather, dict):
+        temp, humidity = _number(weather.get("temp")), _number(weather.get("humidity"))
+        if temp is not None:
+            parts.append(f"t={math.floor(temp / 5)}")
+        if humidity is not None:
+            parts.append(f"h={math.floor(humidity / 20)}")
+        parts.append(f"r={int(bool(weather.get('rain')))}")
+    price = context.get("price")
+    if isinstance(price, dict):
+        price = price.get("modal_price")
+    price = _number(price)
+    if price is not None and price > 0:
+        parts.append(f"p={round(math.log(price) / math.log(1.1))}")
+    return "|".join(parts)
+
+
+@dataclass
+class CachedAnswer:
+    entry_id: int
+    key: CacheKey
+    question: str
+    terms: FrozenSet[str]
+    key_terms: FrozenSet[str]
+    bands: List[int]
+    answer: str
+    generation_seconds: float
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+class MinHashLSH:
+    """
+    MinHash signatures split into bands; questions sharing any band land in
+    the same bucket and become candidates for an exact Jaccard check.
+    """
+    def __init__(self, bands: int, rows: int, seed: int = 7):
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 31, size=bands * rows, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=bands * rows, dtype=np.uint64)
+
+    def band_keys(self, terms: FrozenSet[str]) -> List[int]:
+        if not terms:
+            return []
+        hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in terms), dtype=np.uint64, count=len(terms))
+        signature = ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % _PRIME).min(axis=1)
+        rows = signature.reshape(self.bands, self.rows)
+        # Band index folded in so equal rows in different bands never collide
+        return [hash((i, *row)) for i, row in enumerate(rows.tolist())]
+
+
+class AnswerCache:
+    """
+    Near-duplicate answer cache for the AI advisor, partitioned by
+    (language, context bucket). A cached answer is reused when the question's
+    content words overlap by at least `threshold` (Jaccard) and it names the
+    same crops, symptoms and negations (KEY_TERMS). Entries expire after `ttl` seconds and the
+    least recently used are evicted past `max_entries`.
+    """
+    def __init__(
+        self, max_entries: int, ttl: float, threshold: float, bands: int = 16, rows: int = 4, max_candidates: int = 32
+    ):
+        self.max_entries = max_entries
+        self.max_candidates = max_candidates
+        self.ttl = ttl
+        self.threshold = threshold
+        self.lsh = MinHashLSH(bands, rows)
+        self.entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self.buckets: Dict[CacheKey, Dict[int, Set[int]]] = {}
+        self._next_id = 0
+        self.counters = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self.saved_seconds = 0.0
+
+    def _drop(self, entry: CachedAnswer):
+        self.entries.pop(entry.entry_id, None)
+        partition = self.buckets.get(entry.key, {})
+        for band in entry.bands:
+            ids = partition.get(band)
+            if ids is not None:
+                ids.discard(entry.entry_id)
+                if not ids:
+                    del partition[band]
+        if not partition:
+            self.buckets.pop(entry.key, None)
+
+    def lookup(self, question: str, language: str, context: Optional[dict] = None) -> Optional[CachedAnswer]:
+        self.counters["lookups"] += 1
+        terms = shingles(question)
+        key_terms = terms & KEY_TERMS
+        key = (language, context_bucket(context))
+        partition = self.buckets.get(key)
+        best, best_score = None, self.threshold
+        if terms and partition:
+            # Entries sharing the most bands are the likeliest near-duplicates
+            shared = Counter()
+            for band in self.lsh.band_keys(terms):
+                shared.update(partition.get(band, ()))
+            now = time.time()
+            for entry_id, _ in shared.most_common(self.max_candidates):
+                entry = self.entries.get(entry_id)
+                if entry is None:
+                    continue
+                if now - entry.created_at > self.ttl:
+                    self._drop(entry)
+                    continue
+                if entry.key_terms != key_terms:
+                    continue
+                score = len(terms & entry.terms) / len(terms | entry.terms)
+                if score >= best_score:
+                    best, best_score = entry, score
+
+        if best is None:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        self.saved_seconds += best.generation_seconds
+        best.hits += 1
+        self.entries.move_to_end(best.entry_id)
+        return best
+
+    def store(self, question: str, language: str, context: Optional[dict], answer: str, generation_seconds: float):
+        terms = shingles(question)
+        if not terms or not answer.strip():
+            return
+        key = (language, context_bucket(context))
+        entry = CachedAnswer(
+            entry_id=self._next_id, key=key, question=question, terms=terms, key_terms=terms & KEY_TERMS,
+            bands=self.lsh.band_keys(terms), answer=answer, generation_seconds=generation_seconds,
+        )
+        self._next_id += 1
+        self.entries[entry.entry_id] = entry
+        partition = self.buckets.setdefault(key, {})
+        for band in entry.bands:
+            partition.setdefault(band, set()).add(entry.entry_id)
+        self.counters["stores"] += 1
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries.values())))
+            self.counters["evictions"] += 1
+
+    def stats(self) -> dict:
+        lookups = self.counters["lookups"]
+        return {
+            **self.counters,
+            "entries": len(self.entries),
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else None,
+            "llm_seconds_saved": round(self.saved_seconds, 1),
+        }
+
+
+# Global instance
+answer_cache = AnswerCache(
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+    ttl=settings.ANSWER_CACHE_TTL_SECONDS,
+    threshold=settings.ANSWER_CACHE_SIMILARITY,
+)
@@ -0,0 +1,89 @@
+import uuid
+from typing import List, Optional, Tuple
+
+from pymongo import ASCENDING, ReturnDocument
+
+from app.core.config import settings
+from app.database import get_db
+from app.services.posts import posts_collection, decode_cursor, encode_cursor, now_millis, to_api
+
+COLLECTION = "comments"
+
+# Oldest first, as a discussion reads; _id breaks ties within a millisecond
+THREAD_SORT = [("createdAt", ASCENDING), ("_id", ASCENDING)]
+
+
+def comments_collection():
+    return get_db()[COLLECTION]
+
+
+async def ensure_indexes():
+    # A page of a thread is one bounded scan however long the thread is
+    await comments_collection().create_index([("post_id", ASCENDING), *THREAD_SORT], name="post_thread")
+
+
+def preview_of(comment: dict) -> dict:
+    """
+    The trimmed copy of an answer that rides along on its post.
+    """
+    content = comment["content"]
+    limit = settings.COMMENT_PREVIEW_CHARS
+    return {
+        "id": comment["_id"],
+        "author": comment["author"],
+        "content": content if len(content) <= limit else content[:limit].rstrip() + "…",
+        "createdAt": comment["createdAt"],
+        "isAnswer": comment["isAnswer"],
+    }
+
+
+async def add_comment(post_id: str, author: dict, content: str, is_answer: bool) -> Optional[Tuple[dict, dict]]:
+    """
+    Stores a comment in the thread collection, then bumps the post's
+    commentCount and, for answers, its bounded preview in one update.
+    Returns (comment, post) with the post's category, or None if the post
+    does not exist.
+    """
+    comment = {
+        "_id": str(uuid.uuid4()),
+        "post_id": post_id,
+        "author": author,
+        "content": content,
+        "createdAt": now_millis(),
+        "isAnswer": is_answer,
+    }
+    await comments_collection().insert_one(comment)
+
+    update = {"$inc": {"commentCount": 1}}
+    if is_answer:
+        # Earliest answers first, never more than COMMENT_PREVIEW_SIZE of them
+        update["$push"] = {"commentPreview": {
+            "$each": [preview_of(comment)],
+            "$sort": {"createdAt": 1},
+            "$slice": settings.COMMENT_PREVIEW_SIZE,
+        }}
+    post = await posts_collection().find_one_and_update(
+        {"_id": post_id}, update, projection={"category": 1, "commentCount": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if post is None:
+        await comments_collection().delete_one({"_id": comment["_id"]})
+        return None
+    return comment, post
+
+
+async def find_thread(post_id: str, cursor: Optional[str], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of a post's comments, oldest first, and the cursor for the next
+    page (None at the end of the thread).
+    """
+    query = {"post_id": post_id}
+    if cursor:
+        created_at, comment_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"createdAt": {"$gt": created_at}},
+            {"createdAt": created_at, "_id": {"$gt": comment_id}},
+        ]
+    docs = await comments_collection().find(query, projection={"post_id": 0}).sort(THREAD_SORT).limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return [to_api(d) for d in docs[:limit]], next_cursor
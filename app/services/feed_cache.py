@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+
+# Generation of the unfiltered feed; every write bumps it
+ALL = "*"
+
+FeedKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str], int, Optional[Tuple[str, ...]]]
+
+
+class FeedCache:
+    """
+    Fully encoded /feed response bodies keyed by (category, language, lang,
+    cursor, limit, fields). Each entry remembers the generation of its category (or
+    of the whole feed) when it was built; post, reaction, translation and
+    comment writes bump those generations, which retires the affected pages
+    without scanning the cache. Generations are per worker, so the TTL
+    bounds how stale another worker's copy can get.
+    """
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generations: Dict[str, int] = {}
+        self.entries: "OrderedDict[FeedKey, Tuple[int, float, bytes]]" = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _generation(self, category: Optional[str]) -> int:
+        return self.generations.get(category or ALL, 0)
+
+    def get(self, key: FeedKey) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            generation, stored_at, body = entry
+            if generation == self._generation(key[0]) and time.monotonic() - stored_at < self.ttl:
+                self.entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return body
+            del self.entries[key]
+        self.counters["misses"] += 1
+        return None
+
+    def put(self, key: FeedKey, generation: int, body: bytes):
+        """
+        `generation` must be read before the page was loaded, so a write that
+        lands mid-build leaves the entry already stale.
+        """
+        self.entries[key] = (generation, time.monotonic(), body)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def generation_for(self, category: Optional[str]) -> int:
+        return self._generation(category)
+
+    def bump(self, categories: Iterable[Optional[str]]):
+        """
+        Marks the given categories (and the unfiltered feed) as changed.
+        """
+        for category in {c for c in categories if c} | {ALL}:
+            self.generations[category] = self.generations.get(category, 0) + 1
+        self.counters["invalidations"] += 1
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self.entries),
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else None,
+        }
+
+
+# Global instance
+feed_cache = FeedCache(max_entries=settings.FEED_CACHE_MAX_ENTRIES, ttl=settings.FEED_CACHE_TTL_SECONDS)
@@ -0,0 +1,267 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for Gemini on mixed English/Indic text
+CHARS_PER_TOKEN = 4
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # a farmer waiting on /advisor/ask
+    STANDARD = 1
+    BACKGROUND = 2   # summaries, batch jobs; first to be shed
+
+
+class SchedulerOverloaded(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(prompt: str, expected_output: int) -> int:
+    return len(prompt) // CHARS_PER_TOKEN + expected_output
+
+
+class TokenBucket:
+    """
+    Refills continuously at `per_minute * scale` and holds at most one
+    minute's worth. `scale` lets the scheduler slow down after 429s.
+    """
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.scale = 1.0
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute * self.scale / 60
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        deficit = min(amount, self.capacity) - self.tokens
+        return max(0.0, deficit / self.rate)
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class LLMScheduler:
+    """
+    Admits model calls against request-per-minute and token-per-minute
+    budgets. Waiters are served strictly by priority, then arrival. When the
+    line is full or the expected wait exceeds a class's limit, the lowest
+    priority work is refused (or evicted) first. 429s from the provider
+    pause admissions and halve the admitted rate, which then recovers
+    additively on success.
+    """
+    def __init__(
+        self,
+        rpm: float,
+        tpm: float,
+        max_queue: int,
+        max_wait: Dict[Priority, float],
+        min_scale: float = 0.1,
+        max_backoff: float = 60.0,
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.min_scale = min_scale
+        self.max_backoff = max_backoff
+        self.queue: List[_Waiter] = []
+        self.paused_until = 0.0
+        self.throttle_streak = 0
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"admitted": 0, "shed": 0, "evicted": 0, "throttled": 0}
+
+    # --- Admission ---
+
+    def _delay_for(self, tokens: int, now: float) -> float:
+        return max(
+            self.paused_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now),
+        )
+
+    def estimated_wait(self, priority: Priority, tokens: int) -> float:
+        """
+        Time until a new request of this class would be admitted, counting
+        the work already waiting ahead of it.
+        """
+        now = time.monotonic()
+        ahead = [w for w in self.queue if w.priority <= priority and not w.future.done()]
+        requests_needed = len(ahead) + 1 - self.requests.tokens
+        tokens_needed = sum(w.tokens for w in ahead) + tokens - self.tokens.tokens
+        return max(
+            self.paused_until - now,
+            requests_needed / self.requests.rate if requests_needed > 0 else 0.0,
+            tokens_needed / self.tokens.rate if tokens_needed > 0 else 0.0,
+        )
+
+    def _evict_lowest(self, priority: Priority) -> bool:
+        """
+        Fails the newest waiter of the lowest class below `priority`, if any.
+        """
+        victims = [w for w in self.queue if w.priority > priority and not w.future.done()]
+        if not victims:
+            return False
+        victim = max(victims, key=lambda w: (w.priority, w.seq))
+        victim.future.set_exception(SchedulerOverloaded("Shed for higher-priority work", self.max_backoff))
+        self.counters["evicted"] += 1
+        return True
+
+    async def acquire(self, priority: Priority, tokens: int):
+        """
+        Waits until the call may go out, or raises SchedulerOverloaded.
+        """
+        now = time.monotonic()
+        if not self.queue and self._delay_for(tokens, now) == 0:
+            self._admit(tokens, now)
+            return
+
+        limit = self.max_wait[priority]
+        wait = self.estimated_wait(priority, tokens)
+        if wait > limit:
+            self.counters["shed"] += 1
+            raise SchedulerOverloaded("Model quota exhausted, please retry shortly", wait)
+        live = sum(1 for w in self.queue if not w.future.done())
+        if live >= self.max_queue and not self._evict_lowest(priority):
+            self.counters["shed"] += 1
+            raise SchedulerOverloaded("Model request queue is full", wait)
+
+        if self._task is None:
+            await self.start()
+        waiter = _Waiter(priority, next(self._seq), tokens, asyncio.get_running_loop().create_future())
+        heapq.heappush(self.queue, waiter)
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), limit)
+        except asyncio.TimeoutError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted (or evicted) just as the wait ran out
+                if waiter.future.exception() is not None:
+                    raise waiter.future.exception()
+                return
+            waiter.future.cancel()
+            self.counters["shed"] += 1
+            raise SchedulerOverloaded("Model quota wait exceeded", self.estimated_wait(priority, tokens))
+        except asyncio.CancelledError:
+            # Admitted calls that are abandoned have already spent their quota
+            waiter.future.cancel()
+            raise
+
+    def _admit(self, tokens: int, now: float):
+        self.requests.take(1, now)
+        self.tokens.take(tokens, now)
+        self.counters["admitted"] += 1
+
+    async def _dispatch(self):
+        while True:
+            while self.queue and self.queue[0].future.done():
+                heapq.heappop(self.queue)
+            if not self.queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            head = self.queue[0]
+            now = time.monotonic()
+            delay = self._delay_for(head.tokens, now)
+            if delay > 0:
+                # A higher-priority arrival re-evaluates the head early
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self.queue)
+            self._admit(head.tokens, now)
+            head.future.set_result(None)
+
+    # --- Provider Feedback ---
+
+    def record_throttled(self, retry_after: Optional[float] = None):
+        """
+        Called on a 429 / ResourceExhausted from the provider.
+        """
+        self.counters["throttled"] += 1
+        self.throttle_streak += 1
+        backoff = retry_after or min(self.max_backoff, 2 ** self.throttle_streak) * random.uniform(0.8, 1.2)
+        self.paused_until = max(self.paused_until, time.monotonic() + backoff)
+        scale = max(self.min_scale, self.requests.scale * 0.5)
+        self.requests.scale = self.tokens.scale = scale
+        logger.warning(f"⚠️ Model quota hit; pausing {backoff:.1f}s, admitting at {scale:.0%} of budget")
+
+    def record_success(self):
+        self.throttle_streak = 0
+        if self.requests.scale < 1.0:
+            self.requests.scale = self.tokens.scale = min(1.0, self.requests.scale + 0.05)
+
+    def stats(self) -> dict:
+        queued: Dict[str, int] = {}
+        for w in self.queue:
+            if not w.future.done():
+                name = Priority(w.priority).name.lower()
+                queued[name] = queued.get(name, 0) + 1
+        return {
+            **self.counters,
+            "queued": queued,
+            "rate_scale": round(self.requests.scale, 2),
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 1),
+        }
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global instance: the provider quota is per key, so each worker gets its share
+llm_scheduler = LLMScheduler(
+    rpm=settings.GEMINI_RPM / settings.LLM_WORKER_COUNT,
+    tpm=settings.GEMINI_TPM / settings.LLM_WORKER_COUNT,
+    max_queue=settings.LLM_MAX_QUEUE,
+    max_wait={
+        Priority.INTERACTIVE: settings.LLM_MAX_WAIT_INTERACTIVE_SECONDS,
+        Priority.STANDARD: settings.LLM_MAX_WAIT_STANDARD_SECONDS,
+        Priority.BACKGROUND: settings.LLM_MAX_WAIT_BACKGROUND_SECONDS,
+    },
+)
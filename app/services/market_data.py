@@ -0,0 +1,233 @@
+import asyncio
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.http_client import get_upstream
+from app.services.market_history import ingest_records
+
+logger = logging.getLogger(__name__)
+
+# Data.gov.in resource for Agmarknet daily mandi prices
+AGMARKNET_RESOURCE = "/resource/9ef842fd-551f-497c-8069-14353d9e86c0"
+
+PairKey = Tuple[str, str]
+# (state, commodity) as the client spelled them, which Agmarknet filters on
+PairLabel = Tuple[str, str]
+
+
+def pair_key(state: str, commodity: str) -> PairKey:
+    return state.strip().lower(), commodity.strip().lower()
+
+
+def cache_key(key: PairKey) -> str:
+    return "|".join(key)
+
+
+@dataclass
+class Snapshot:
+    """
+    A locally held copy of the Agmarknet records for one (state, commodity).
+    """
+    records: List[dict]
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def freshness(self, fresh_ttl: float) -> dict:
+        return {
+            "fetched_at": datetime.fromtimestamp(self.fetched_at),
+            "age_seconds": int(self.age),
+            "is_stale": self.age >= fresh_ttl,
+        }
+
+
+class HotPairTracker:
+    """
+    Exponentially decayed request counts per (state, commodity), so the
+    pre-fetcher follows what farmers are asking for this week, not last season.
+    Each entry also keeps the pair's label, so labels are evicted with it.
+    """
+    def __init__(self, half_life: float, max_pairs: int):
+        self.half_life = half_life
+        self.max_pairs = max_pairs
+        self.scores: Dict[PairKey, Tuple[float, float, PairLabel]] = {}
+
+    def _decayed(self, score: float, last: float, now: float) -> float:
+        return score * 0.5 ** ((now - last) / self.half_life)
+
+    def hit(self, key: PairKey, label: PairLabel):
+        now = time.time()
+        score, last, label = self.scores.get(key, (0.0, now, label))
+        self.scores[key] = (self._decayed(score, last, now) + 1.0, now, label)
+        if len(self.scores) > self.max_pairs:
+            # Drop the cold half rather than evicting one entry per hit
+            keep = self.top(self.max_pairs // 2)
+            self.scores = {k: self.scores[k] for k in keep}
+
+    def top(self, n: int) -> List[PairKey]:
+        now = time.time()
+        return heapq.nlargest(
+            n, self.scores, key=lambda k: self._decayed(*self.scores[k][:2], now)
+        )
+
+    def label(self, key: PairKey) -> Optional[PairLabel]:
+        entry = self.scores.get(key)
+        return entry[2] if entry is not None else None
+
+
+class MarketDataService:
+    """
+    Serves mandi prices from a cached snapshot with stale-while-revalidate
+    semantics. Snapshots live in the shared cache, so one worker's fetch
+    serves every worker. Concurrent misses for the same pair share one
+    upstream fetch, and a background loop keeps the hottest pairs refreshed.
+    """
+    def __init__(
+        self,
+        fresh_ttl: float,
+        max_stale: float,
+        prefetch_interval: float,
+        prefetch_top_n: int,
+        prefetch_concurrency: int = 4,
+    ):
+        self.fresh_ttl = fresh_ttl
+        self.max_stale = max_stale
+        self.prefetch_interval = prefetch_interval
+        self.prefetch_top_n = prefetch_top_n
+        self.prefetch_concurrency = prefetch_concurrency
+        self.tracker = HotPairTracker(half_life=24 * 3600, max_pairs=5000)
+        # Kept until they are too stale to serve; workers re-read the shared
+        # copy well before they would refresh it themselves
+        self.snapshots = cache.namespace(
+            "market", ttl=max_stale, max_entries=5000, l1_ttl=min(fresh_ttl / 4, settings.CACHE_L1_TTL_SECONDS)
+        )
+        self._inflight: Dict[PairKey, asyncio.Task] = {}
+        self._ingest_tasks: set = set()
+        self._prefetch_task: Optional[asyncio.Task] = None
+
+    async def _fetch(self, key: PairKey, label: PairLabel) -> Snapshot:
+        state, commodity = label
+        params = {
+            "api-key": settings.AGMARKNET_API_KEY or "your_api_key_here",
+            "format": "json",
+            "filters[state]": state,
+            "filters[commodity]": commodity,
+        }
+        res = await get_upstream("agmarknet").get_json(AGMARKNET_RESOURCE, params=params)
+        snapshot = Snapshot(records=res.get("records", []), fetched_at=time.time())
+        await self.snapshots.set(cache_key(key), {"records": snapshot.records, "fetched_at": snapshot.fetched_at})
+        if snapshot.records:
+            # Keep every fetched record in the history store without delaying the caller
+            task = asyncio.create_task(self._ingest(snapshot.records))
+            self._ingest_tasks.add(task)
+            task.add_done_callback(self._ingest_tasks.discard)
+        return snapshot
+
+    async def _ingest(self, records: List[dict]):
+        try:
+            await ingest_records(records)
+        except Exception as e:
+            logger.warning(f"Could not store mandi price history: {e}")
+
+    def _refresh(self, key: PairKey, label: PairLabel) -> asyncio.Task:
+        """
+        Returns the in-flight fetch for `key`, starting one if needed, so any
+        number of concurrent callers cost a single upstream call.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, label))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_refreshed(key, label, t))
+        return task
+
+    async def _snapshot(self, key: PairKey) -> Optional[Snapshot]:
+        cached = await self.snapshots.get(cache_key(key))
+        return Snapshot(**cached) if cached is not None else None
+
+    def _on_refreshed(self, key: PairKey, label: PairLabel, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Mandi price refresh failed for {label}: {task.exception()}")
+
+    async def get_prices(self, state: str, commodity: str) -> Snapshot:
+        """
+        Returns the snapshot for (state, commodity). Fresh snapshots are served
+        as-is, stale ones are served while a refresh runs in the background,
+        and only a cold (or expired) pair waits on the upstream.
+        """
+        key = pair_key(state, commodity)
+        label = (state.strip(), commodity.strip())
+        self.tracker.hit(key, label)
+
+        snapshot = await self._snapshot(key)
+        if snapshot is not None:
+            if snapshot.age < self.fresh_ttl:
+                return snapshot
+            if snapshot.age < self.max_stale:
+                self._refresh(key, label)
+                return snapshot
+
+        return await asyncio.shield(self._refresh(key, label))
+
+    async def _prefetch_once(self):
+        semaphore = asyncio.Semaphore(self.prefetch_concurrency)
+        # Refresh a little before expiry so hot pairs never go stale
+        refresh_age = self.fresh_ttl * 0.8
+
+        async def refresh(key: PairKey, label: PairLabel):
+            async with semaphore:
+                try:
+                    await asyncio.shield(self._refresh(key, label))
+                except Exception:
+                    pass  # already logged by _on_refreshed
+
+        due = []
+        for key in self.tracker.top(self.prefetch_top_n):
+            snapshot = await self._snapshot(key)
+            label = self.tracker.label(key)
+            if label is not None and (snapshot is None or snapshot.age >= refresh_age):
+                due.append((key, label))
+        if due:
+            await asyncio.gather(*(refresh(key, label) for key, label in due))
+            logger.info(f"🔄 Pre-fetched mandi prices for {len(due)} hot pairs")
+
+    async def _prefetch_loop(self):
+        while True:
+            await asyncio.sleep(self.prefetch_interval)
+            try:
+                await self._prefetch_once()
+            except Exception as e:
+                logger.error(f"Mandi price pre-fetch cycle failed: {e}")
+
+    async def start(self):
+        if self._prefetch_task is None:
+            self._prefetch_task = asyncio.create_task(self._prefetch_loop())
+
+    async def stop(self):
+        if self._prefetch_task is not None:
+            self._prefetch_task.cancel()
+            try:
+                await self._prefetch_task
+            except asyncio.CancelledError:
+                pass
+            self._prefetch_task = None
+        for task in list(self._inflight.values()):
+            task.cancel()
+
+
+# Global instance
+market_data = MarketDataService(
+    fresh_ttl=settings.MARKET_FRESH_TTL_SECONDS,
+    max_stale=settings.MARKET_MAX_STALE_SECONDS,
+    prefetch_interval=settings.MARKET_PREFETCH_INTERVAL_SECONDS,
+    prefetch_top_n=settings.MARKET_PREFETCH_TOP_N,
+)
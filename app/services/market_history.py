@@ -0,0 +1,270 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from app.database import get_db
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "mandi_prices"
+
+
+# --- Ingestion ---
+
+def parse_record(record: dict) -> Optional[dict]:
+    """
+    Converts one Agmarknet record into a history document, or None if it is
+    missing the fields we key on.
+    """
+    try:
+        arrival = datetime.strptime(record["arrival_date"], "%d/%m/%Y").replace(tzinfo=timezone.utc)
+        modal_price = float(record["modal_price"])
+    except (KeyError, ValueError, TypeError):
+        return None
+
+    def price(field: str) -> Optional[float]:
+        try:
+            return float(record[field])
+        except (KeyError, ValueError, TypeError):
+            return None
+
+    return {
+        "state": record.get("state", ""),
+        "district": record.get("district", ""),
+        "market": record.get("market", ""),
+        "commodity": record.get("commodity", ""),
+        "variety": record.get("variety", ""),
+        # Lower-cased keys so lookups are case-insensitive and index-backed
+        "state_key": record.get("state", "").strip().lower(),
+        "commodity_key": record.get("commodity", "").strip().lower(),
+        "date": arrival,
+        "min_price": price("min_price"),
+        "max_price": price("max_price"),
+        "modal_price": modal_price,
+    }
+
+
+async def ensure_indexes():
+    collection = get_db()[COLLECTION]
+    # One document per market/variety/day; re-ingesting a snapshot is idempotent
+    await collection.create_index(
+        [("state_key", ASCENDING), ("district", ASCENDING), ("market", ASCENDING),
+         ("commodity_key", ASCENDING), ("variety", ASCENDING), ("date", ASCENDING)],
+        unique=True,
+        name="market_day_unique",
+    )
+    # Serves the analytics range scan: commodity/state equality, then date range
+    await collection.create_index(
+        [("commodity_key", ASCENDING), ("state_key", ASCENDING), ("date", DESCENDING)],
+        name="commodity_state_date",
+    )
+
+
+async def ingest_records(records: Iterable[dict]) -> int:
+    """
+    Upserts Agmarknet records into the history collection as one unordered
+    bulk write. Returns the number of documents written.
+    """
+    database = get_db()
+    if database is None:
+        return 0
+
+    operations = []
+    for record in records:
+        doc = parse_record(record)
+        if doc is None:
+            continue
+        key = {k: doc[k] for k in ("state_key", "district", "market", "commodity_key", "variety", "date")}
+        operations.append(UpdateOne(key, {"$set": doc}, upsert=True))
+
+    if not operations:
+        return 0
+    result = await database[COLLECTION].bulk_write(operations, ordered=False)
+    return result.upserted_count + result.modified_count
+
+
+# --- Columnar Loading ---
+
+def _encode(vocabulary: Dict[str, int], value: str) -> int:
+    code = vocabulary.get(value)
+    if code is None:
+        code = vocabulary[value] = len(vocabulary)
+    return code
+
+
+async def load_columns(states: List[str], commodities: List[str], since: datetime) -> Dict[str, np.ndarray]:
+    """
+    Reads the matching history rows straight into column arrays. Strings are
+    dictionary-encoded on the way in so the analytics only touch integers.
+    """
+    cursor = get_db()[COLLECTION].find(
+        {
+            "commodity_key": {"$in": [c.strip().lower() for c in commodities]},
+            "state_key": {"$in": [s.strip().lower() for s in states]},
+            "date": {"$gte": since},
+        },
+        projection={"_id": 0, "state": 1, "commodity": 1, "market": 1, "district": 1, "date": 1, "modal_price": 1},
+        batch_size=5000,
+    )
+
+    state_vocab, commodity_vocab, market_vocab = {}, {}, {}
+    state, commodity, market, day, price = [], [], [], [], []
+    async for doc in cursor:
+        state.append(_encode(state_vocab, doc["state"]))
+        commodity.append(_encode(commodity_vocab, doc["commodity"]))
+        market.append(_encode(market_vocab, f"{doc['market']}, {doc['district']}"))
+        day.append(doc["date"].replace(tzinfo=None))
+        price.append(doc["modal_price"])
+
+    return {
+        "state": np.array(state, dtype=np.int64),
+        "commodity": np.array(commodity, dtype=np.int64),
+        "market": np.array(market, dtype=np.int64),
+        "day": np.array(day, dtype="datetime64[D]"),
+        "price": np.array(price, dtype=np.float64),
+        "state_names": list(state_vocab),
+        "commodity_names": list(commodity_vocab),
+        "market_names": list(market_vocab),
+    }
+
+
+# --- Vectorized Analytics ---
+
+def _group_percentiles(sorted_price: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """
+    Linear-interpolated percentile for every group at once, given prices
+    sorted within contiguous groups.
+    """
+    position = starts + (q / 100.0) * (counts - 1)
+    lo = np.floor(position).astype(np.int64)
+    hi = np.ceil(position).astype(np.int64)
+    frac = position - lo
+    return sorted_price[lo] + (sorted_price[hi] - sorted_price[lo]) * frac
+
+
+def _trailing_mean(daily_sum: np.ndarray, daily_count: np.ndarray, end: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean price over the `window` days ending at `end` (per group), using
+    cumulative sums over the (groups x days) grid.
+    """
+    zero = np.zeros((daily_sum.shape[0], 1))
+    csum = np.hstack([zero, np.cumsum(daily_sum, axis=1)])
+    ccnt = np.hstack([zero, np.cumsum(daily_count, axis=1)])
+    rows = np.arange(daily_sum.shape[0])
+    start = np.maximum(end + 1 - window, 0)
+    total = csum[rows, end + 1] - csum[rows, start]
+    count = ccnt[rows, end + 1] - ccnt[rows, start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def compute_price_analytics(
+    columns: Dict[str, np.ndarray],
+    days: int,
+    percentiles: List[float],
+    today: np.datetime64,
+) -> List[dict]:
+    """
+    Computes per (state, commodity) statistics over the last `days` days and
+    7/30-day moving averages, all as whole-array operations.
+    """
+    price = columns["price"]
+    if price.size == 0:
+        return []
+
+    state_names = columns["state_names"]
+    commodity_names = columns["commodity_names"]
+    group = columns["state"] * len(commodity_names) + columns["commodity"]
+
+    first_day = columns["day"].min()
+    day_index = (columns["day"] - first_day).astype(np.int64)
+    n_days = int(day_index.max()) + 1
+
+    # Compact the (state x commodity) code space down to the groups present
+    used = np.zeros(len(state_names) * len(commodity_names), dtype=bool)
+    used[group] = True
+    group_ids = np.flatnonzero(used)
+    group_of_row = (np.cumsum(used) - 1)[group]
+    n_groups = len(group_ids)
+
+    # Moving averages on a dense (group x day) grid of price sums and counts
+    cell = group_of_row * n_days + day_index
+    daily_sum = np.bincount(cell, weights=price, minlength=n_groups * n_days).reshape(n_groups, n_days)
+    daily_count = np.bincount(cell, minlength=n_groups * n_days).reshape(n_groups, n_days).astype(np.float64)
+    latest_day = n_days - 1 - np.argmax(daily_count[:, ::-1] > 0, axis=1)
+    ma_7 = _trailing_mean(daily_sum, daily_count, latest_day, 7)
+    ma_30 = _trailing_mean(daily_sum, daily_count, latest_day, 30)
+
+    # Best market: highest modal price on each group's latest trading day
+    on_latest = day_index == latest_day[group_of_row]
+    latest_rows = np.flatnonzero(on_latest)
+    order = latest_rows[np.lexsort((price[latest_rows], group_of_row[latest_rows]))]
+    last_in_group = np.flatnonzero(np.diff(np.append(group_of_row[order], n_groups)) != 0)
+    best_row = np.empty(n_groups, dtype=np.int64)
+    best_row[group_of_row[order[last_in_group]]] = order[last_in_group]
+
+    # Distribution stats over the requested window only
+    window_start = (today - np.timedelta64(days - 1, "D") - first_day).astype(np.int64)
+    in_window = day_index >= window_start
+    w_group = group_of_row[in_window]
+    w_price = price[in_window]
+    # One argsort on a composite key orders rows by group, then by price
+    order = np.argsort(w_group * (price.max() + 1.0) + w_price, kind="stable")
+    sorted_price = w_price[order]
+    all_counts = np.bincount(w_group, minlength=n_groups)
+    present = np.flatnonzero(all_counts)
+    counts = all_counts[present]
+    starts = (np.cumsum(all_counts) - all_counts)[present]
+
+    stats = {}
+    if present.size:
+        low = sorted_price[starts]
+        high = sorted_price[starts + counts - 1]
+        mean = np.add.reduceat(sorted_price, starts) / counts
+        median = _group_percentiles(sorted_price, starts, counts, 50)
+        quantiles = {q: _group_percentiles(sorted_price, starts, counts, q) for q in percentiles}
+        for i, g in enumerate(present):
+            stats[int(g)] = {
+                "observations": int(counts[i]),
+                "mean": round(float(mean[i]), 2),
+                "median": round(float(median[i]), 2),
+                "min": float(low[i]),
+                "max": float(high[i]),
+                "spread": float(high[i] - low[i]),
+                "percentiles": {f"p{q:g}": round(float(v[i]), 2) for q, v in quantiles.items()},
+            }
+
+    def rounded(value: float) -> Optional[float]:
+        return None if np.isnan(value) else round(float(value), 2)
+
+    results = []
+    for g in range(n_groups):
+        code = int(group_ids[g])
+        row = best_row[g]
+        results.append({
+            "state": state_names[code // len(commodity_names)],
+            "commodity": commodity_names[code % len(commodity_names)],
+            "latest_date": str(first_day + np.timedelta64(int(latest_day[g]), "D")),
+            "stats": stats.get(g),
+            "moving_average_7d": rounded(ma_7[g]),
+            "moving_average_30d": rounded(ma_30[g]),
+            "best_market": {
+                "location": columns["market_names"][columns["market"][row]],
+                "modal_price": float(price[row]),
+            },
+        })
+    return results
+
+
+async def price_analytics(states: List[str], commodities: List[str], days: int, percentiles: List[float]) -> List[dict]:
+    """
+    One range scan for every requested (state, commodity), then columnar stats.
+    """
+    now = datetime.now(timezone.utc)
+    # Always load enough history to fill the 30-day moving average
+    since = (now - timedelta(days=max(days, 30) - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    columns = await load_columns(states, commodities, since)
+    return compute_price_analytics(columns, days, percentiles, np.datetime64(now.date(), "D"))
@@ -0,0 +1,155 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from pymongo import DESCENDING
+
+from app.database import get_db
+from app.services.translate import translator
+
+COLLECTION = "posts"
+
+# Newest first; _id breaks ties between posts created in the same millisecond
+FEED_SORT = [("createdAt", DESCENDING), ("_id", DESCENDING)]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def posts_collection():
+    return get_db()[COLLECTION]
+
+
+async def ensure_indexes():
+    collection = posts_collection()
+    # Every feed filter combination gets an index ending in the sort keys,
+    # so a page is one bounded index scan however deep the cursor is
+    await collection.create_index(
+        [("category", 1), ("language", 1), *FEED_SORT], name="category_language_feed"
+    )
+    await collection.create_index([("category", 1), *FEED_SORT], name="category_feed")
+    await collection.create_index([("language", 1), *FEED_SORT], name="language_feed")
+    await collection.create_index(FEED_SORT, name="feed")
+
+
+# --- Cursors ---
+
+# Stored dates are naive, as PyMongo returns them; cursors count milliseconds
+# from this epoch in integer arithmetic, so they do not depend on the server's
+# timezone or DST and round-trip exactly
+_EPOCH = datetime(1970, 1, 1)
+_MILLISECOND = timedelta(milliseconds=1)
+
+
+def encode_cursor(post: dict) -> str:
+    created_at = post["createdAt"]
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    payload = json.dumps([(created_at - _EPOCH) // _MILLISECOND, post["_id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        millis, post_id = json.loads(base64.urlsafe_b64decode(padded))
+        return _EPOCH + timedelta(milliseconds=millis), str(post_id)
+    except (ValueError, TypeError, OverflowError) as e:
+        # OverflowError: a forged timestamp beyond datetime's range
+        raise InvalidCursor("Invalid cursor") from e
+
+
+# --- Documents ---
+
+def now_millis() -> datetime:
+    """
+    MongoDB stores milliseconds; truncating up front keeps cursors exact.
+    """
+    now = datetime.now()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def to_api(doc: dict) -> dict:
+    post = dict(doc)
+    post["id"] = post.pop("_id")
+    return post
+
+
+async def insert_post(doc: dict) -> dict:
+    await posts_collection().insert_one(doc)
+    return doc
+
+
+def localize(post: dict, lang: Optional[str]) -> dict:
+    """
+    Swaps in the stored `lang` variant of the title and content, keeping the
+    original while translation is still pending. The variants map itself is
+    not returned.
+    """
+    variants = post.pop("translations", None) or {}
+    variant = variants.get(lang) if lang and lang != post.get("language") else None
+    if variant:
+        post["title"], post["content"] = variant["title"], variant["content"]
+    post["displayLanguage"] = lang if variant else post.get("language")
+    return post
+
+
+def feed_projection(fields: Optional[Sequence[str]], lang: Optional[str]) -> dict:
+    """
+    Only the requested translation, and only the requested fields, leave the
+    database. The cursor keys are always read. Comment threads that older
+    posts still embed are never read; they live in the comments collection.
+    """
+    if fields is None:
+        if lang:
+            projection = {f"translations.{other}": 0 for other in translator.supported_langs if other != lang}
+        else:
+            projection = {"translations": 0}
+        projection["comments"] = 0
+        return projection
+
+    projection = {"_id": 1, "createdAt": 1}
+    for name in fields:
+        if name != "id" and name != "displayLanguage":
+            projection[name] = 1
+    if lang and {"title", "content", "displayLanguage"}.intersection(fields):
+        projection["language"] = 1
+        projection[f"translations.{lang}"] = 1
+    elif "displayLanguage" in fields:
+        projection["language"] = 1
+    return projection
+
+
+async def find_feed(
+    category: Optional[str],
+    language: Optional[str],
+    cursor: Optional[str],
+    limit: int,
+    lang: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Returns one page of the feed (newest first) and the cursor for the next
+    page, or None when there is nothing older. `lang` selects which stored
+    translation to serve; `fields` (API names) limits what is read.
+    """
+    query = {}
+    if category:
+        query["category"] = category
+    if language:
+        query["language"] = language
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"createdAt": {"$lt": created_at}},
+            {"createdAt": created_at, "_id": {"$lt": post_id}},
+        ]
+
+    # One extra document tells us whether another page exists
+    projection = feed_projection(fields, lang)
+    docs = await posts_collection().find(query, projection).sort(FEED_SORT).limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return [localize(to_api(d), lang) for d in docs[:limit]], next_cursor
+
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.posts import posts_collection
+from app.services.feed_cache import feed_cache
+from app.services.search_index import search_index
+from app.services.translate import translator
+
+logger = logging.getLogger(__name__)
+
+# translationStatus values stored on each post
+PENDING = "pending"
+COMPLETE = "complete"
+PARTIAL = "partial"
+
+
+class PreTranslationQueue:
+    """
+    Translates every new post's title and content into the other supported
+    languages in the background, so feed reads never wait on the translator.
+    Posts still marked pending after a restart are picked up again on start.
+    """
+    def __init__(self, workers: int, queue_size: int, max_attempts: int, retry_delay: float = 5.0):
+        self.worker_count = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._workers: List[asyncio.Task] = []
+
+    def submit(self, post: dict) -> bool:
+        """
+        Queues a freshly inserted post. If the queue is full the post stays
+        pending and is recovered on the next start.
+        """
+        try:
+            self.queue.put_nowait(post)
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"Pre-translation queue full, post {post['_id']} left pending")
+            return False
+
+    async def translate_post(self, post: dict) -> str:
+        source = post.get("language") or "auto"
+        variants = dict(post.get("translations") or {})
+        targets = [lang for lang in translator.supported_langs if lang != source and lang not in variants]
+
+        for attempt in range(1, self.max_attempts + 1):
+            results = await asyncio.gather(*(
+                translator.translate_batch([post["title"], post["content"]], lang, source_lang=source, fallback=False)
+                for lang in targets
+            ))
+            for lang, (title, content) in zip(targets, results):
+                if title is not None and content is not None:
+                    variants[lang] = {"title": title, "content": content}
+            targets = [lang for lang in targets if lang not in variants]
+            if not targets or attempt == self.max_attempts:
+                break
+            await asyncio.sleep(self.retry_delay * attempt)
+
+        status = PARTIAL if targets else COMPLETE
+        await posts_collection().update_one(
+            {"_id": post["_id"]},
+            {"$set": {"translations": variants, "translationStatus": status}},
+        )
+        post["translations"] = variants
+        post["translationStatus"] = status
+        feed_cache.bump([post.get("category")])
+        # Translated text makes the post findable in every language
+        search_index.add_post(post)
+        return status
+
+    async def _worker(self):
+        while True:
+            post = await self.queue.get()
+            try:
+                status = await self.translate_post(post)
+                if status != COMPLETE:
+                    logger.warning(f"Post {post['_id']} only partially translated")
+            except Exception as e:
+                logger.error(f"Pre-translation failed for post {post.get('_id')}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def recover(self, limit: Optional[int] = None):
+        limit = limit or self.queue.maxsize
+        cursor = posts_collection().find(
+            {"translationStatus": PENDING},
+            projection={"title": 1, "content": 1, "category": 1, "language": 1, "tags": 1, "translations": 1},
+        ).limit(limit)
+        count = 0
+        async for post in cursor:
+            if not self.submit(post):
+                break
+            count += 1
+        if count:
+            logger.info(f"🈯 Re-queued {count} posts awaiting translation")
+
+    async def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        try:
+            await self.recover()
+        except Exception as e:
+            logger.warning(f"Could not recover pending translations: {e}")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+# Global instance
+pretranslation = PreTranslationQueue(
+    workers=settings.PRETRANSLATE_WORKERS,
+    queue_size=settings.PRETRANSLATE_QUEUE_SIZE,
+    max_attempts=settings.PRETRANSLATE_MAX_ATTEMPTS,
+)
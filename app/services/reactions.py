@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.services.posts import posts_collection
+from app.services.feed_cache import feed_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PostMeta:
+    """
+    What the reaction path needs to know about a post without a DB read.
+    `base` is the last reactionCount seen in (or flushed to) MongoDB.
+    """
+    base: int
+    category: Optional[str] = None
+    language: Optional[str] = None
+    tags: list = field(default_factory=list)
+
+
+class ReactionBuffer:
+    """
+    Write-behind reaction counter. Taps are applied to in-memory deltas and
+    answered immediately; deltas are flushed to MongoDB as one unordered bulk
+    $inc per interval (or sooner once `max_pending` taps pile up).
+    """
+    def __init__(self, flush_interval: float, max_pending: int, index_size: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.index_size = index_size
+        self.index: "OrderedDict[str, PostMeta]" = OrderedDict()
+        self.pending: Dict[str, Counter] = {}
+        self.pending_taps = 0
+        # Totals currently being written, so counts do not dip mid-flush
+        self.in_flight: Dict[str, int] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    # --- Post Index ---
+
+    def remember(self, post: dict):
+        """
+        Adds a post to the O(1) id index (called on create and on first tap).
+        """
+        self.index[post["_id"]] = PostMeta(
+            base=post.get("reactionCount", 0),
+            category=post.get("category"),
+            language=post.get("language"),
+            tags=post.get("tags", []),
+        )
+        self.index.move_to_end(post["_id"])
+        while len(self.index) > self.index_size:
+            # Evicted posts keep their pending deltas; only the metadata goes
+            self.index.popitem(last=False)
+
+    async def _load(self, post_id: str) -> Optional[PostMeta]:
+        doc = await posts_collection().find_one(
+            {"_id": post_id},
+            projection={"reactionCount": 1, "category": 1, "language": 1, "tags": 1},
+        )
+        if doc is None:
+            return None
+        self.remember(doc)
+        return self.index[post_id]
+
+    async def lookup(self, post_id: str) -> Optional[PostMeta]:
+        meta = self.index.get(post_id)
+        if meta is not None:
+            self.index.move_to_end(post_id)
+            return meta
+        task = self._loading.get(post_id)
+        if task is None:
+            task = asyncio.create_task(self._load(post_id))
+            self._loading[post_id] = task
+            task.add_done_callback(lambda t: self._loading.pop(post_id, None))
+        return await asyncio.shield(task)
+
+    def count(self, post_id: str) -> int:
+        meta = self.index[post_id]
+        return meta.base + self.in_flight.get(post_id, 0) + sum(self.pending.get(post_id, {}).values())
+
+    # --- Write Path ---
+
+    async def react(self, post_id: str, reaction: str) -> Optional[int]:
+        """
+        Records one reaction and returns the best-effort new count, or None if
+        the post does not exist.
+        """
+        meta = await self.lookup(post_id)
+        if meta is None:
+            return None
+        self.pending.setdefault(post_id, Counter())[reaction] += 1
+        self.pending_taps += 1
+        if self.pending_taps >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+        return self.count(post_id)
+
+    async def flush(self) -> int:
+        """
+        Writes all pending deltas as one unordered bulk $inc. Deltas that fail
+        to apply are merged back and retried on the next flush.
+        """
+        async with self._flush_lock:
+            batch, self.pending = self.pending, {}
+            self.pending_taps = 0
+            if not batch:
+                return 0
+
+            post_ids = list(batch)
+            operations = []
+            for post_id in post_ids:
+                deltas = batch[post_id]
+                inc = {f"reactions.{kind}": n for kind, n in deltas.items()}
+                inc["reactionCount"] = sum(deltas.values())
+                operations.append(UpdateOne({"_id": post_id}, {"$inc": inc}))
+
+            self.in_flight = {post_id: sum(batch[post_id].values()) for post_id in post_ids}
+            failed = set()
+            try:
+                await posts_collection().bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                failed = {post_ids[err["index"]] for err in e.details.get("writeErrors", [])}
+            except Exception as e:
+                logger.error(f"Reaction flush failed, keeping {len(batch)} posts for retry: {e}")
+                failed = set(post_ids)
+
+            changed = set()
+            for post_id in post_ids:
+                if post_id in failed:
+                    self.pending.setdefault(post_id, Counter()).update(batch[post_id])
+                    self.pending_taps += sum(batch[post_id].values())
+                elif post_id in self.index:
+                    self.index[post_id].base += self.in_flight[post_id]
+                    changed.add(self.index[post_id].category)
+            self.in_flight = {}
+            if len(failed) < len(post_ids):
+                # Cached feed pages show reaction counts
+                feed_cache.bump(changed)
+            return len(post_ids) - len(failed)
+
+    # --- Lifecycle ---
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Reaction flush loop error: {e}")
+
+    async def start(self):
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """
+        Stops the flush loop and writes whatever is still buffered.
+        """
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        await self.flush()
+        if self.pending:
+            logger.error(f"❌ {self.pending_taps} reactions could not be flushed on shutdown")
+
+
+# Global instance
+reaction_buffer = ReactionBuffer(
+    flush_interval=settings.REACTION_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.REACTION_MAX_PENDING,
+    index_size=settings.REACTION_INDEX_SIZE,
+)
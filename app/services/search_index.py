@@ -0,0 +1,422 @@
+import asyncio
+import logging
+import math
+import re
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.database import get_db
+
+logger = logging.getLogger(__name__)
+
+# Word characters plus Devanagari and Telugu combining signs (matras, virama),
+# which \w alone splits on. Dandas (U+0964/5) are left out as punctuation.
+TOKEN_RE = re.compile(r"[\w\u0900-\u0963\u0966-\u097F\u0C00-\u0C7F]+")
+PHRASE_RE = re.compile(r'"([^"]+)"')
+
+# --- Transliteration ---
+# Telugu's Unicode block mirrors Devanagari's layout at +0x300, so both are
+# romanized through one Devanagari table.
+
+_TELUGU_OFFSET = 0x0C00 - 0x0900
+_CONSONANTS = dict(zip(
+    "कखगघङचछजझञटठडढणतथदधनपफबभमयरलळवशषसह",
+    ["k", "kh", "g", "gh", "n", "ch", "chh", "j", "jh", "n", "t", "th", "d", "dh", "n",
+     "t", "th", "d", "dh", "n", "p", "ph", "b", "bh", "m", "y", "r", "l", "l", "v",
+     "sh", "sh", "s", "h"],
+))
+_VOWELS = dict(zip(
+    "अआइईउऊऋएऐओऔऎऒ",
+    ["a", "aa", "i", "ii", "u", "uu", "ri", "e", "ai", "o", "au", "e", "o"],
+))
+_MATRAS = dict(zip(
+    "ािीुूृेैोौॆॊ",
+    ["aa", "i", "ii", "u", "uu", "ri", "e", "ai", "o", "au", "e", "o"],
+))
+_NASALS = {"ं": "n", "ँ": "n", "ः": "h"}
+_VIRAMA = "\u094d"
+
+# Applied in order to romanized and Latin text alike
+_SKELETON_RULES = [
+    (re.compile(r"(kh|gh|chh|ch|jh|th|dh|ph|bh|sh)"), lambda m: {"chh": "c", "ch": "c"}.get(m.group(1), m.group(1)[0])),
+    (re.compile(r"ee|ii"), lambda m: "i"),
+    (re.compile(r"oo|uu"), lambda m: "u"),
+    (re.compile(r"w"), lambda m: "v"),
+    (re.compile(r"q"), lambda m: "k"),
+    (re.compile(r"z"), lambda m: "j"),
+    (re.compile(r"(.)\1+"), lambda m: m.group(1)),
+    (re.compile(r"y$"), lambda m: "i"),
+]
+
+
+def romanize(token: str) -> str:
+    """
+    Rough phonetic romanization of a Devanagari/Telugu token; Latin passes through.
+    """
+    chars = [chr(ord(c) - _TELUGU_OFFSET) if "\u0c00" <= c <= "\u0c7f" else c for c in token]
+    out = []
+    for i, c in enumerate(chars):
+        nxt = chars[i + 1] if i + 1 < len(chars) else ""
+        if c in _CONSONANTS:
+            out.append(_CONSONANTS[c])
+            if nxt not in _MATRAS and nxt != _VIRAMA:
+                out.append("a")  # inherent vowel
+        elif c in _VOWELS:
+            out.append(_VOWELS[c])
+        elif c in _MATRAS:
+            out.append(_MATRAS[c])
+        elif c in _NASALS:
+            out.append(_NASALS[c])
+        elif c.isascii():
+            out.append(c)
+    return "".join(out)
+
+
+def skeleton(token: str) -> str:
+    """
+    Spelling-insensitive key shared by native script and transliterations,
+    e.g. 'मिर्च', 'mirch' and 'mirchh' all map to 'mirc'.
+    """
+    text = romanize(token)
+    for pattern, replace in _SKELETON_RULES:
+        text = pattern.sub(replace, text)
+    if len(text) > 3 and text.endswith("a"):
+        text = text[:-1]  # schwa deletion
+    return text
+
+
+def tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFC", text).casefold().replace("\u093c", "")  # drop nukta
+    return TOKEN_RE.findall(text)
+
+
+@lru_cache(maxsize=65536)
+def expand(token: str) -> Tuple[Tuple[str, float], ...]:
+    """
+    Index/query terms for one token: the surface form, plus its skeleton at
+    a lower weight. Cached, since vocabulary is small next to token volume.
+    """
+    key = skeleton(token)
+    if key and key != token:
+        return ((token, 1.0), ("~" + key, 0.5))
+    return ((token, 1.0),)
+
+
+# --- Index ---
+
+class PostingList:
+    """
+    (doc, tf) lists sorted by doc id. New documents get the highest id, so
+    indexing appends; a re-indexed document keeps its id and is inserted in
+    place. A NumPy copy is cached until the next change.
+    """
+    __slots__ = ("docs", "tfs", "_cache")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.tfs = array("f")
+        self._cache = None
+
+    def add(self, doc: int, tf: float):
+        if not self.docs or doc > self.docs[-1]:
+            self.docs.append(doc)
+            self.tfs.append(tf)
+        else:
+            i = bisect_left(self.docs, doc)
+            self.docs.insert(i, doc)
+            self.tfs.insert(i, tf)
+        self._cache = None
+
+    def remove(self, doc: int):
+        i = bisect_left(self.docs, doc)
+        if i < len(self.docs) and self.docs[i] == doc:
+            del self.docs[i]
+            del self.tfs[i]
+            self._cache = None
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._cache is None:
+            self._cache = (np.array(self.docs, dtype=np.int64), np.array(self.tfs, dtype=np.float32))
+        return self._cache
+
+
+@dataclass
+class SearchHit:
+    id: str
+    type: str
+    title: str
+    snippet: str
+    language: Optional[str]
+    tags: List[str]
+    score: float
+
+
+class SearchIndex:
+    """
+    In-process inverted index with BM25 ranking over community posts and the
+    crop wiki. Filters (type, language, tags) are posting lists of their own,
+    so they resolve by intersection; quoted phrases intersect their terms'
+    postings and then check adjacency on the candidates only.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_ids: Dict[str, int] = {}
+        self.postings: List[PostingList] = []
+        self.doc_keys: List[str] = []
+        self.doc_slot: Dict[str, int] = {}
+        self.doc_info: List[Optional[tuple]] = []
+        self.doc_tokens: List[array] = []
+        # Every term id a document is posted under, so it can be unposted
+        self.doc_terms: List[array] = []
+        self.doc_length = array("f")
+        self.alive = array("b")
+        self.live_docs = 0
+        self.total_length = 0.0
+        self.ready = False
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = self.term_ids[term] = len(self.postings)
+            self.postings.append(PostingList())
+        return term_id
+
+    def add(
+        self,
+        key: str,
+        doc_type: str,
+        title: str,
+        body: str,
+        language: Optional[str] = None,
+        tags: Iterable[str] = (),
+    ):
+        """
+        Indexes (or re-indexes) one document. Titles count twice towards BM25.
+        A re-indexed document keeps its slot and its old postings are dropped,
+        so document frequencies only ever count live documents.
+        """
+        doc = self.doc_slot.get(key)
+        if doc is not None:
+            self._unpost(doc)
+        tags = [t.strip().lstrip("#").casefold() for t in tags if t and t.strip()]
+        tokens = tokenize(title) * 2 + tokenize(body) + [t for tag in tags for t in tokenize(tag)]
+
+        weights: Dict[int, float] = {}
+        sequence = array("I")
+        for token in tokens:
+            for term, weight in expand(token):
+                term_id = self._term_id(term)
+                weights[term_id] = weights.get(term_id, 0.0) + weight
+            sequence.append(self.term_ids[token])
+        for term in [f"@type:{doc_type}", f"@lang:{language or ''}", *(f"#{t}" for t in tags)]:
+            weights.setdefault(self._term_id(term), 0.0)
+
+        info = (doc_type, title, " ".join(body.split())[:160], language, tags)
+        if doc is None:
+            doc = len(self.doc_keys)
+            self.doc_keys.append(key)
+            self.doc_slot[key] = doc
+            self.doc_info.append(info)
+            self.doc_tokens.append(sequence)
+            self.doc_terms.append(array("I", weights))
+            self.doc_length.append(len(tokens))
+            self.alive.append(1)
+        else:
+            self.doc_info[doc] = info
+            self.doc_tokens[doc] = sequence
+            self.doc_terms[doc] = array("I", weights)
+            self.doc_length[doc] = len(tokens)
+            self.alive[doc] = 1
+        for term_id, tf in weights.items():
+            self.postings[term_id].add(doc, tf)
+        self.live_docs += 1
+        self.total_length += len(tokens)
+
+    def _unpost(self, doc: int):
+        """
+        Takes a live document out of every posting list and the totals.
+        """
+        for term_id in self.doc_terms[doc]:
+            self.postings[term_id].remove(doc)
+        self.doc_terms[doc] = array("I")
+        self.alive[doc] = 0
+        self.live_docs -= 1
+        self.total_length -= self.doc_length[doc]
+
+    def remove(self, key: str):
+        doc = self.doc_slot.pop(key, None)
+        if doc is None:
+            return
+        self._unpost(doc)
+        self.doc_info[doc] = None
+        self.doc_tokens[doc] = array("I")
+
+    def _docs_for(self, term: str) -> np.ndarray:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return np.empty(0, dtype=np.int64)
+        return self.postings[term_id].arrays()[0]
+
+    def _has_phrase(self, doc: int, phrase: bytes) -> bool:
+        # Byte search over the packed term ids; only 4-byte-aligned hits count
+        sequence = self.doc_tokens[doc].tobytes()
+        at = sequence.find(phrase)
+        while at != -1 and at % 4:
+            at = sequence.find(phrase, at + 1)
+        return at != -1
+
+    def search(
+        self,
+        query: str,
+        doc_type: Optional[str] = None,
+        language: Optional[str] = None,
+        tags: Iterable[str] = (),
+        limit: int = 20,
+    ) -> Tuple[List[SearchHit], int]:
+        """
+        Returns the top `limit` hits and the total number of matches.
+        """
+        n_docs = len(self.doc_keys)
+        if n_docs == 0 or self.live_docs == 0:
+            return [], 0
+
+        phrases = [tokenize(p) for p in PHRASE_RE.findall(query)]
+        free_tokens = tokenize(PHRASE_RE.sub(" ", query))
+        all_tokens = free_tokens + [t for p in phrases for t in p]
+
+        # Candidate set: intersect every filter and phrase posting list
+        required: List[np.ndarray] = []
+        if doc_type:
+            required.append(self._docs_for(f"@type:{doc_type}"))
+        if language:
+            required.append(self._docs_for(f"@lang:{language}"))
+        for tag in tags:
+            required.append(self._docs_for("#" + tag.strip().lstrip("#").casefold()))
+        for phrase in phrases:
+            required.extend(self._docs_for(t) for t in phrase)
+
+        candidates = None
+        for docs in sorted(required, key=len):
+            candidates = docs if candidates is None else np.intersect1d(candidates, docs, assume_unique=True)
+            if candidates.size == 0:
+                return [], 0
+
+        if phrases and candidates is not None:
+            phrase_ids = [array("I", (self.term_ids[t] for t in p)).tobytes() for p in phrases if p]
+            keep = [d for d in candidates.tolist() if all(self._has_phrase(d, p) for p in phrase_ids)]
+            candidates = np.array(keep, dtype=np.int64)
+            if candidates.size == 0:
+                return [], 0
+
+        # BM25 over the query terms (surface forms and their skeletons)
+        alive = np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+        lengths = np.frombuffer(self.doc_length, dtype=np.float32)
+        avg_length = self.total_length / self.live_docs
+        scores = np.zeros(n_docs, dtype=np.float32)
+        matched = np.zeros(n_docs, dtype=bool)
+        terms: Dict[str, float] = {}
+        for token in all_tokens:
+            for term, weight in expand(token):
+                terms[term] = max(terms.get(term, 0.0), weight)
+        for term, weight in terms.items():
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            docs, tfs = self.postings[term_id].arrays()
+            df = docs.size
+            idf = math.log(1 + (self.live_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[docs] / avg_length)
+            scores[docs] += weight * idf * tfs * (self.k1 + 1) / (tfs + norm)
+            matched[docs] = True
+
+        mask = alive & (matched if all_tokens else alive)
+        if candidates is not None:
+            restrict = np.zeros(n_docs, dtype=bool)
+            restrict[candidates] = True
+            mask &= restrict
+        hits = np.flatnonzero(mask)
+        total = int(hits.size)
+        if total == 0:
+            return [], 0
+
+        if total > limit:
+            top = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        else:
+            top = hits
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for doc in top.tolist():
+            doc_type_, title, snippet, lang, doc_tags = self.doc_info[doc]
+            results.append(SearchHit(
+                id=self.doc_keys[doc].split(":", 1)[1], type=doc_type_, title=title, snippet=snippet,
+                language=lang, tags=doc_tags, score=round(float(scores[doc]), 4),
+            ))
+        return results, total
+
+    # --- Document Sources ---
+
+    def add_post(self, post: dict):
+        # Stored translations are indexed too, after the original text
+        variants = (post.get("translations") or {}).values()
+        body = " ".join([post.get("content", "")] + [f"{v['title']} {v['content']}" for v in variants])
+        self.add(
+            f"post:{post['_id']}", "post", post.get("title", ""), body,
+            post.get("language"), post.get("tags", []),
+        )
+
+    def add_wiki(self, article: dict):
+        body = " ".join(
+            str(article.get(field, ""))
+            for field in ("soil_type", "sowing_period", "harvesting_time", "optimal_temperature")
+        )
+        body += " " + " ".join(article.get("common_diseases", []))
+        self.add(
+            f"wiki:{article['_id']}", "wiki", article.get("crop_name", ""), body,
+            article.get("language", "en"), article.get("tags", []),
+        )
+
+    async def build(self, batch_size: int = 2000, yield_every: int = 100):
+        """
+        Loads every post and wiki article. The build runs while the server is
+        already taking traffic, so it yields to the event loop every
+        `yield_every` documents (about 30 ms of tokenizing).
+        """
+        started = time.perf_counter()
+        database = get_db()
+        sources = [("posts", self.add_post), ("wiki", self.add_wiki)]
+        for collection, add in sources:
+            count = 0
+            async for doc in database[collection].find({}, batch_size=batch_size):
+                add(doc)
+                count += 1
+                if count % yield_every == 0:
+                    await asyncio.sleep(0)
+        self.ready = True
+        logger.info(f"🔎 Search index built: {self.live_docs} documents in {time.perf_counter() - started:.2f}s")
+
+    async def build_with_retry(self, delay: float, max_delay: float):
+        """
+        Builds until it succeeds, backing off between failures. Documents
+        already indexed by a failed attempt are simply re-indexed.
+        """
+        while True:
+            try:
+                await self.build()
+                return
+            except Exception as e:
+                logger.error(f"❌ Search index build failed, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+# Global instance
+search_index = SearchIndex()
@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.services import services
+from app.database import get_db
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "translations"
+
+
+def translation_key(text: str, source_lang: str, target_lang: str) -> str:
+    """
+    Content address of one translation; identical strings share an entry
+    whichever post or screen they came from.
+    """
+    return hashlib.sha1(f"{source_lang}\x00{target_lang}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def load_google_translator():
+    from deep_translator import GoogleTranslator
+    return GoogleTranslator
+
+
+class TranslationService:
+    """
+    Translations are looked up in the cache (in-process, then Redis when
+    configured), then in MongoDB, and only then sent to Google Translate from
+    a bounded thread pool (the client is blocking). Concurrent requests for
+    the same string share one call.
+    """
+    def __init__(self, cache_size: int, cache_ttl: float, max_workers: int):
+        # Default languages for WikiKisan
+        self.supported_langs = ['en', 'hi', 'te']
+        # A translation never changes, so workers need not re-check Redis
+        self.cache = cache.namespace("translation", ttl=cache_ttl, max_entries=cache_size, l1_ttl=cache_ttl)
+        self.google = services.lazy("translator", load_google_translator)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.counters = {"requests": 0, "cache_hits": 0, "db_hits": 0, "coalesced": 0, "upstream_calls": 0, "errors": 0}
+
+    # --- Cache Tiers ---
+
+    async def _load(self, keys: List[str]) -> Dict[str, str]:
+        database = get_db()
+        if database is None or not keys:
+            return {}
+        try:
+            docs = await database[COLLECTION].find(
+                {"_id": {"$in": keys}}, projection={"translated": 1}
+            ).to_list(length=len(keys))
+        except Exception as e:
+            logger.warning(f"Translation cache read failed: {e}")
+            return {}
+        return {d["_id"]: d["translated"] for d in docs}
+
+    async def _store(self, entries: List[dict]):
+        database = get_db()
+        if database is None or not entries:
+            return
+        try:
+            await database[COLLECTION].bulk_write(
+                [UpdateOne({"_id": e["_id"]}, {"$setOnInsert": e}, upsert=True) for e in entries],
+                ordered=False,
+            )
+        except Exception as e:
+            logger.warning(f"Translation cache write failed: {e}")
+
+    # --- Upstream ---
+
+    def _call_upstream(self, text: str, source_lang: str, target_lang: str) -> str:
+        # Runs in the pool, so the first call's import stays off the event loop
+        return self.google.get()(source=source_lang, target=target_lang).translate(text)
+
+    async def _translate_misses(self, misses: Dict[str, str], source_lang: str, target_lang: str) -> Dict[str, Optional[str]]:
+        """
+        Sends each uncached string to the pool once, joining any call already
+        in flight for the same key. Failed strings map to None.
+        """
+        loop = asyncio.get_running_loop()
+        owned = {}
+        for key, text in misses.items():
+            if key not in self._pending:
+                self.counters["upstream_calls"] += 1
+                future = loop.run_in_executor(self.executor, self._call_upstream, text, source_lang, target_lang)
+                self._pending[key] = future
+                owned[key] = future
+            else:
+                self.counters["coalesced"] += 1
+        keys = list(misses)
+        results = await asyncio.gather(*(asyncio.shield(self._pending[k]) for k in keys), return_exceptions=True)
+        for key in owned:
+            self._pending.pop(key, None)
+
+        translated, fresh = {}, []
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception) or not result:
+                if key in owned:
+                    self.counters["errors"] += 1
+                    logger.error(f"Translation Error: {result}")
+                translated[key] = None
+                continue
+            translated[key] = result
+            if key in owned:
+                fresh.append({
+                    "_id": key, "source": source_lang, "target": target_lang,
+                    "text": misses[key], "translated": result, "createdAt": datetime.now(),
+                })
+        await self.cache.set_many({e["_id"]: e["translated"] for e in fresh})
+        await self._store(fresh)
+        return translated
+
+    # --- Public API ---
+
+    async def translate_batch(
+        self, texts: List[str], target_lang: str, source_lang: str = 'auto', fallback: bool = True
+    ) -> List[Optional[str]]:
+        """
+        Translates a list of strings, deduplicated and cached. Strings that
+        cannot be translated come back unchanged (or as None if `fallback`
+        is off, so callers can retry them).
+        """
+        if target_lang not in self.supported_langs or not texts:
+            return list(texts) if fallback else [None] * len(texts)
+        self.counters["requests"] += len(texts)
+
+        keys = [translation_key(t, source_lang, target_lang) for t in texts]
+        unique = dict(zip(keys, texts))
+        found: Dict[str, Optional[str]] = await self.cache.get_many(unique)
+        self.counters["cache_hits"] += sum(1 for k in keys if k in found)
+
+        missing = [k for k in unique if k not in found and unique[k].strip()]
+        if missing:
+            stored = await self._load(missing)
+            await self.cache.set_many(stored)
+            self.counters["db_hits"] += sum(1 for k in keys if k in stored)
+            found.update(stored)
+            misses = {k: unique[k] for k in missing if k not in stored}
+            if misses:
+                found.update(await self._translate_misses(misses, source_lang, target_lang))
+
+        if fallback:
+            return [found.get(k) or t for k, t in zip(keys, texts)]
+        return [found.get(k) or (t if not t.strip() else None) for k, t in zip(keys, texts)]
+
+    async def translate_text(self, text: str, target_lang: str = 'en', source_lang: str = 'auto') -> str:
+        """
+        Translates a single string into the target language.
+        """
+        return (await self.translate_batch([text], target_lang, source_lang))[0]
+
+    def stats(self) -> dict:
+        requests = self.counters["requests"]
+        hits = self.counters["cache_hits"] + self.counters["db_hits"]
+        return {
+            **self.counters,
+            "cached_entries": len(self.cache.local.entries),
+            "hit_rate": round(hits / requests, 4) if requests else None,
+        }
+
+    async def stop(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+translator = TranslationService(
+    cache_size=settings.TRANSLATION_CACHE_SIZE,
+    cache_ttl=settings.TRANSLATION_CACHE_TTL_SECONDS,
+    max_workers=settings.TRANSLATION_MAX_WORKERS,
+)
@@ -0,0 +1,299 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.database import get_db
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "trending_state"
+ALL = "all"
+LANGUAGES = {"en", "hi", "te"}
+
+# Rescale counters before exp() gets anywhere near float overflow
+MAX_EXPONENT = 50.0
+
+# A worker's snapshot is deleted once it has not been saved for this many
+# half-lives; by then its counts have decayed to under 0.1%
+STALE_HALF_LIVES = 10
+
+SketchKey = Tuple[str, str]
+
+
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lstrip("#").casefold()
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter sketch with a fixed number of counters. Counts
+    are stored in forward-decayed units (see TrendingService), so decay never
+    touches the counters themselves.
+
+    A lazy min-heap finds the counter to evict in O(log capacity), and the
+    `top_size` highest counters are kept sorted as counts change, so top(k)
+    is a slice rather than a scan of the sketch.
+    """
+    def __init__(self, capacity: int, top_size: int = 64):
+        self.capacity = capacity
+        self.top_size = top_size
+        self.counters: Dict[str, List[float]] = {}  # tag -> [count, overestimate]
+        # (count, tag) pairs; entries whose count is out of date are skipped
+        self._heap: List[Tuple[float, str]] = []
+        # Highest counters first, at most top_size of them; None means rebuild
+        self._top: Optional[List[Tuple[str, float]]] = []
+
+    def add(self, tag: str, weight: float):
+        counter = self.counters.get(tag)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            counter = self.counters[tag] = [weight, 0.0]
+        else:
+            # Replace the smallest counter; its count becomes our error bound
+            victim, floor = self._pop_min()
+            self._drop_from_top(victim)
+            counter = self.counters[tag] = [floor + weight, floor]
+        heapq.heappush(self._heap, (counter[0], tag))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+        self._update_top(tag, counter[0])
+
+    def _pop_min(self) -> Tuple[str, float]:
+        while True:
+            count, tag = heapq.heappop(self._heap)
+            counter = self.counters.get(tag)
+            if counter is not None and counter[0] == count:
+                del self.counters[tag]
+                return tag, count
+
+    def _rebuild_heap(self):
+        self._heap = [(c[0], t) for t, c in self.counters.items()]
+        heapq.heapify(self._heap)
+
+    def _drop_from_top(self, tag: str):
+        if self._top is not None and any(t == tag for t, _ in self._top):
+            # Whatever should fill the gap is unknown; rebuild on next read
+            self._top = None
+
+    def _update_top(self, tag: str, count: float):
+        """
+        Counts only grow (uniform scaling aside), so a tag outside the list
+        only enters it by passing the list's smallest entry.
+        """
+        top = self._top
+        if top is None:
+            return
+        for i, (t, _) in enumerate(top):
+            if t == tag:
+                del top[i]
+                break
+        else:
+            if len(top) >= self.top_size and count <= top[-1][1]:
+                return
+        i = len(top)
+        while i > 0 and top[i - 1][1] < count:
+            i -= 1
+        top.insert(i, (tag, count))
+        del top[self.top_size:]
+
+    def top(self, k: int) -> List[Tuple[str, float]]:
+        """
+        Highest counters first. Uniform decay never changes the order.
+        """
+        if k > self.top_size:
+            return heapq.nlargest(k, ((t, c[0]) for t, c in self.counters.items()), key=lambda x: x[1])
+        if self._top is None:
+            self._top = heapq.nlargest(
+                self.top_size, ((t, c[0]) for t, c in self.counters.items()), key=lambda x: x[1]
+            )
+        return self._top[:k]
+
+    def restore(self, counters: Dict[str, List[float]]):
+        self.counters = counters
+        self._rebuild_heap()
+        self._top = None
+
+    def merge(self, counters: Dict[str, List[float]]):
+        """
+        Folds another sketch's counters into this one (counts and error
+        bounds add up), keeping the heaviest `capacity` of them.
+        """
+        combined = {tag: list(counter) for tag, counter in self.counters.items()}
+        for tag, (count, error) in counters.items():
+            counter = combined.setdefault(tag, [0.0, 0.0])
+            counter[0] += count
+            counter[1] += error
+        self.restore(dict(heapq.nlargest(self.capacity, combined.items(), key=lambda item: item[1][0])))
+
+    def scale(self, factor: float):
+        for counter in self.counters.values():
+            counter[0] *= factor
+            counter[1] *= factor
+        self._rebuild_heap()
+        if self._top is not None:
+            self._top = [(t, c * factor) for t, c in self._top]
+
+
+class TrendingService:
+    """
+    Time-decayed trending tags per (category, language), plus 'all' rollups.
+    Memory is capacity x number of sketches regardless of how many distinct
+    tags farmers use.
+
+    With several workers, each saves only what it recorded itself (`own`)
+    under its own snapshot id, and a starting worker merges every snapshot
+    into the sketches it serves from, so no worker's counts are overwritten
+    or counted twice.
+    """
+    def __init__(self, half_life: float, capacity: int, snapshot_interval: float, max_sketches: int = 256):
+        self.half_life = half_life
+        self.decay = math.log(2) / half_life
+        self.capacity = capacity
+        self.snapshot_interval = snapshot_interval
+        self.max_sketches = max_sketches
+        self.landmark = time.time()
+        self.snapshot_id = f"sketches:{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.sketches: Dict[SketchKey, SpaceSaving] = {}
+        self.own: Dict[SketchKey, SpaceSaving] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _sketch(self, key: SketchKey) -> Optional[SpaceSaving]:
+        sketch = self.sketches.get(key)
+        if sketch is None and len(self.sketches) < self.max_sketches:
+            sketch = self.sketches[key] = SpaceSaving(self.capacity)
+        return sketch
+
+    def _own_sketch(self, key: SketchKey) -> SpaceSaving:
+        sketch = self.own.get(key)
+        if sketch is None:
+            sketch = self.own[key] = SpaceSaving(self.capacity)
+        return sketch
+
+    def _forward_weight(self, weight: float, now: float) -> float:
+        exponent = self.decay * (now - self.landmark)
+        if exponent > MAX_EXPONENT:
+            factor = math.exp(-exponent)
+            for sketch in (*self.sketches.values(), *self.own.values()):
+                sketch.scale(factor)
+            self.landmark = now
+            exponent = 0.0
+        return weight * math.exp(exponent)
+
+    def record(self, tags: Iterable[str], category: Optional[str], language: Optional[str], weight: float = 1.0):
+        """
+        Counts one post (weight 1) or reaction (fractional weight) for each tag.
+        """
+        tags = {normalize_tag(t) for t in tags if t and t.strip()}
+        if not tags:
+            return
+        category = category or ALL
+        language = language if language in LANGUAGES else ALL
+        scaled = self._forward_weight(weight, time.time())
+
+        keys = {(category, language), (category, ALL), (ALL, language), (ALL, ALL)}
+        for key in keys:
+            sketch = self._sketch(key)
+            if sketch is None:
+                continue
+            own = self._own_sketch(key)
+            for tag in tags:
+                sketch.add(tag, scaled)
+                own.add(tag, scaled)
+
+    def top(self, category: Optional[str] = None, language: Optional[str] = None, k: int = 10) -> List[dict]:
+        sketch = self.sketches.get((category or ALL, language or ALL))
+        if sketch is None:
+            return []
+        now_factor = math.exp(-self.decay * (time.time() - self.landmark))
+        return [{"_id": tag, "count": round(score * now_factor, 2)} for tag, score in sketch.top(k)]
+
+    # --- Persistence ---
+
+    async def save(self):
+        database = get_db()
+        if database is None:
+            return
+        await database[COLLECTION].replace_one(
+            {"_id": self.snapshot_id},
+            {
+                "_id": self.snapshot_id,
+                "landmark": self.landmark,
+                "savedAt": datetime.now(),
+                "sketches": [
+                    {"category": c, "language": l, "counters": [[t, v[0], v[1]] for t, v in s.counters.items()]}
+                    for (c, l), s in self.own.items()
+                ],
+            },
+            upsert=True,
+        )
+
+    async def load(self):
+        """
+        Merges every worker's saved sketches into the live ones, so tags
+        recorded while the restore was still running are kept. Snapshots of
+        workers gone for STALE_HALF_LIVES are deleted first.
+        """
+        database = get_db()
+        if database is None:
+            return
+        collection = database[COLLECTION]
+        # Also matches the single "sketches" document older versions wrote
+        snapshots = {"_id": {"$regex": "^sketches"}}
+        stale_before = datetime.now() - timedelta(seconds=STALE_HALF_LIVES * self.half_life)
+        await collection.delete_many({**snapshots, "savedAt": {"$lt": stale_before}})
+
+        restored = 0
+        async for doc in collection.find(snapshots):
+            # Snapshot counts are relative to their own landmark; rescale them
+            # to ours so they can be merged with tags recorded since startup
+            factor = math.exp(self.decay * (doc["landmark"] - self.landmark))
+            for entry in doc["sketches"]:
+                sketch = self._sketch((entry["category"], entry["language"]))
+                if sketch is None:
+                    continue
+                sketch.merge({tag: [count * factor, error * factor] for tag, count, error in entry["counters"]})
+            restored += 1
+        logger.info(f"📈 Restored trending sketches from {restored} worker snapshots")
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.save()
+            except Exception as e:
+                logger.warning(f"Trending snapshot failed: {e}")
+
+    async def start(self):
+        try:
+            await self.load()
+        except Exception as e:
+            logger.warning(f"Could not restore trending sketches: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.save()
+
+
+# Global instance
+trending = TrendingService(
+    half_life=settings.TRENDING_HALF_LIFE_SECONDS,
+    capacity=settings.TRENDING_CAPACITY,
+    snapshot_interval=settings.TRENDING_SNAPSHOT_INTERVAL_SECONDS,
+)
@@ -0,0 +1,331 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.http_client import get_upstream
+
+logger = logging.getLogger(__name__)
+
+DISTRICTS_FILE = Path(__file__).resolve().parent.parent / "data" / "districts.json"
+
+# OpenWeather's group endpoint accepts at most 20 city ids per call
+GROUP_LIMIT = 20
+
+BucketKey = Tuple[int, int]
+
+
+class CityNotFound(Exception):
+    pass
+
+
+@dataclass
+class Place:
+    name: str
+    lat: float
+    lon: float
+    state: Optional[str] = None
+
+
+def normalize_city(city: str) -> str:
+    """
+    Folds free-text city names so 'Gadwal', ' gadwal, India ' and 'GADWAL'
+    resolve to the same place.
+    """
+    text = re.sub(r"[^\w\s]", " ", city.casefold())
+    text = " ".join(text.split())
+    return re.sub(r"\s+india$", "", text)
+
+
+def load_districts(path: Path = DISTRICTS_FILE) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class WeatherDataService:
+    """
+    Current-weather lookups grouped into geographic buckets. Each bucket holds
+    one cached observation (shared between workers when Redis is configured);
+    misses arriving close together are fetched as a single batch (OpenWeather
+    'group' calls for buckets with a known station id). Learned station ids
+    are shared the same way, so a fresh worker's warm-up can use group calls
+    as soon as any worker has seen those buckets.
+    """
+    def __init__(
+        self,
+        bucket_degrees: float,
+        ttl: float,
+        batch_window: float,
+        forecast_ttl: float,
+        station_ttl: float = 30 * 86400,
+        max_places: int = 20000,
+    ):
+        self.bucket_degrees = bucket_degrees
+        self.ttl = ttl
+        self.forecast_ttl = forecast_ttl
+        self.batch_window = batch_window
+        self.max_places = max_places
+        self.districts: List[Place] = []
+        self.places: Dict[str, Optional[Place]] = {}
+        self.observations = cache.namespace("weather", ttl=ttl, max_entries=max_places)
+        self.station_ids: Dict[BucketKey, int] = {}
+        self.stations = cache.namespace("weather_station", ttl=station_ttl, max_entries=max_places)
+        self.forecasts = cache.namespace("forecast", ttl=forecast_ttl, max_entries=max_places)
+        self._forecasting: Dict[BucketKey, asyncio.Task] = {}
+        self._geocoding: Dict[str, asyncio.Task] = {}
+        self._waiting: Dict[BucketKey, asyncio.Future] = {}
+        self._queue: List[BucketKey] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._load_districts()
+
+    def _load_districts(self):
+        self.districts = []
+        for row in load_districts():
+            place = Place(row["name"], row["lat"], row["lon"], row.get("state"))
+            self.districts.append(place)
+            for name in [row["name"], *row.get("aliases", [])]:
+                self.places[normalize_city(name)] = place
+
+    # --- Geography ---
+
+    def bucket_for(self, lat: float, lon: float) -> BucketKey:
+        return round(lat / self.bucket_degrees), round(lon / self.bucket_degrees)
+
+    def bucket_center(self, bucket: BucketKey) -> Tuple[float, float]:
+        return round(bucket[0] * self.bucket_degrees, 4), round(bucket[1] * self.bucket_degrees, 4)
+
+    def cache_key(self, bucket: BucketKey) -> str:
+        # The bucket size is part of the key so workers with different
+        # settings never share observations
+        return f"{self.bucket_degrees}:{bucket[0]}:{bucket[1]}"
+
+    async def _geocode(self, key: str, city: str) -> Optional[Place]:
+        params = {"q": f"{city},IN", "limit": 1, "appid": settings.OPENWEATHER_API_KEY}
+        results = await get_upstream("openweather").get_json("/geo/1.0/direct", params=params)
+        place = None
+        if results:
+            top = results[0]
+            place = Place(top.get("name", city), top["lat"], top["lon"], top.get("state"))
+        if len(self.places) >= self.max_places:
+            # Geocoded names are cheap to re-learn; the district table stays
+            self.places = {}
+            self._load_districts()
+        self.places[key] = place
+        return place
+
+    async def resolve(self, city: str) -> Place:
+        """
+        Maps a free-text city name to coordinates: the district table first,
+        then previously geocoded names, then one (shared) geocoding call.
+        """
+        key = normalize_city(city)
+        if key in self.places:
+            place = self.places[key]
+        else:
+            task = self._geocoding.get(key)
+            if task is None:
+                task = asyncio.create_task(self._geocode(key, city))
+                self._geocoding[key] = task
+                task.add_done_callback(lambda t: self._geocoding.pop(key, None))
+            place = await asyncio.shield(task)
+        if place is None:
+            raise CityNotFound(city)
+        return place
+
+    # --- Batched Fetching ---
+
+    def _enqueue(self, bucket: BucketKey) -> asyncio.Future:
+        future = self._waiting.get(bucket)
+        if future is not None:
+            return future
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[bucket] = future
+        self._queue.append(bucket)
+        if len(self._queue) >= GROUP_LIMIT:
+            self._start_flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(self.batch_window, self._start_flush)
+        return future
+
+    def _start_flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        batch, self._queue = self._queue, []
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _store(self, observations: Dict[BucketKey, dict]):
+        """
+        Hands fresh observations to the callers waiting on them, then caches them.
+        """
+        learned = {}
+        for bucket, data in observations.items():
+            if "id" in data and self.station_ids.get(bucket) != data["id"]:
+                self.station_ids[bucket] = learned[self.cache_key(bucket)] = data["id"]
+            future = self._waiting.pop(bucket, None)
+            if future is not None and not future.done():
+                future.set_result(data)
+        await self.observations.set_many({self.cache_key(b): data for b, data in observations.items()})
+        if learned:
+            await self.stations.set_many(learned)
+
+    async def _load_station_ids(self, buckets: List[BucketKey]):
+        """
+        Fills in station ids other workers (or an earlier deploy) learned.
+        """
+        keys = {self.cache_key(b): b for b in buckets if b not in self.station_ids}
+        if not keys:
+            return
+        for key, station_id in (await self.stations.get_many(keys)).items():
+            self.station_ids[keys[key]] = station_id
+
+    async def _fetch_group(self, by_id: Dict[int, List[BucketKey]]):
+        """
+        One group call for up to GROUP_LIMIT station ids. Neighbouring buckets
+        often share a nearest station, so each observation goes to every
+        bucket on that id.
+        """
+        params = {
+            "id": ",".join(str(i) for i in by_id),
+            "units": "metric",
+            "appid": settings.OPENWEATHER_API_KEY,
+        }
+        res = await get_upstream("openweather").get_json("/data/2.5/group", params=params)
+        found = {}
+        for data in res.get("list", []):
+            for bucket in by_id.get(data.get("id"), []):
+                found[bucket] = data
+        await self._store(found)
+
+    async def _fetch_point(self, bucket: BucketKey):
+        lat, lon = self.bucket_center(bucket)
+        params = {"lat": lat, "lon": lon, "units": "metric", "appid": settings.OPENWEATHER_API_KEY}
+        data = await get_upstream("openweather").get_json("/data/2.5/weather", params=params)
+        await self._store({bucket: data})
+
+    async def _flush(self, batch: List[BucketKey]):
+        """
+        Buckets whose station id is already known, here or in the shared
+        cache, go out through the group endpoint, 20 station ids per call;
+        the rest are fetched by coordinates (which also teaches us their
+        station id for next time).
+        """
+        await self._load_station_ids(batch)
+        by_id: Dict[int, List[BucketKey]] = {}
+        unknown = []
+        for bucket in batch:
+            if bucket in self.station_ids:
+                by_id.setdefault(self.station_ids[bucket], []).append(bucket)
+            else:
+                unknown.append(bucket)
+        ids = list(by_id)
+        groups = [{i: by_id[i] for i in ids[n:n + GROUP_LIMIT]} for n in range(0, len(ids), GROUP_LIMIT)]
+
+        # Each call paired with the buckets it is fetching, so a failure only
+        # fails those buckets
+        calls = [([b for bs in group.values() for b in bs], self._fetch_group(group)) for group in groups]
+        calls += [([b], self._fetch_point(b)) for b in unknown]
+        results = await asyncio.gather(*(call for _, call in calls), return_exceptions=True)
+
+        for (buckets, _), result in zip(calls, results):
+            for bucket in buckets:
+                future = self._waiting.pop(bucket, None)
+                if future is not None and not future.done():
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_exception(CityNotFound(f"No observation for bucket {bucket}"))
+
+    async def get_many(self, buckets: Iterable[BucketKey]) -> Dict[BucketKey, dict]:
+        keys = {self.cache_key(b): b for b in set(buckets)}
+        cached = await self.observations.get_many(keys)
+        results = {keys[k]: data for k, data in cached.items()}
+        pending = {b: self._enqueue(b) for b in keys.values() if b not in results}
+        if pending:
+            fetched = await asyncio.gather(*pending.values(), return_exceptions=True)
+            for bucket, data in zip(pending, fetched):
+                if not isinstance(data, Exception):
+                    results[bucket] = data
+        return results
+
+    async def current(self, city: str) -> Tuple[Place, BucketKey, dict]:
+        """
+        Returns the resolved place, its bucket and the bucket's observation.
+        """
+        place = await self.resolve(city)
+        bucket = self.bucket_for(place.lat, place.lon)
+        data = await self.observations.get(self.cache_key(bucket))
+        if data is None:
+            data = await asyncio.shield(self._enqueue(bucket))
+        return place, bucket, data
+
+    # --- Forecasts ---
+
+    async def _fetch_forecast(self, bucket: BucketKey) -> dict:
+        lat, lon = self.bucket_center(bucket)
+        params = {"lat": lat, "lon": lon, "units": "metric", "appid": settings.OPENWEATHER_API_KEY}
+        data = await get_upstream("openweather").get_json("/data/2.5/forecast", params=params)
+        await self.forecasts.set(self.cache_key(bucket), data)
+        return data
+
+    async def get_forecast(self, bucket: BucketKey) -> dict:
+        """
+        Returns the 5-day/3-hour forecast for a bucket, cached and coalesced
+        the same way as current observations.
+        """
+        cached = await self.forecasts.get(self.cache_key(bucket))
+        if cached is not None:
+            return cached
+        task = self._forecasting.get(bucket)
+        if task is None:
+            task = asyncio.create_task(self._fetch_forecast(bucket))
+            self._forecasting[bucket] = task
+            task.add_done_callback(lambda t: self._forecasting.pop(bucket, None))
+        return await asyncio.shield(task)
+
+    # --- Warm-up ---
+
+    async def warm_up(self):
+        """
+        Preloads every district in the table so the morning rush starts warm.
+        """
+        started = time.perf_counter()
+        buckets = {self.bucket_for(p.lat, p.lon) for p in self.districts}
+        loaded = await self.get_many(buckets)
+        logger.info(
+            f"🌦️ Weather warm-up loaded {len(loaded)}/{len(buckets)} district buckets "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    async def start(self):
+        task = asyncio.create_task(self.warm_up())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def stop(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        for task in list(self._tasks):
+            task.cancel()
+
+
+# Global instance
+weather_data = WeatherDataService(
+    bucket_degrees=settings.WEATHER_BUCKET_DEGREES,
+    ttl=settings.WEATHER_CACHE_TTL_SECONDS,
+    batch_window=settings.WEATHER_BATCH_WINDOW_SECONDS,
+    forecast_ttl=settings.WEATHER_FORECAST_TTL_SECONDS,
+    station_ttl=settings.WEATHER_STATION_TTL_SECONDS,
+)
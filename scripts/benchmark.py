@@ -0,0 +1,446 @@
+"""
+Load and latency benchmark for the hot read routes, against stubbed upstreams.
+
+Starts the upstream stub (Agmarknet + OpenWeather, see stub_upstream.py) and
+the app in separate processes, with the AI advisor on its local fake model.
+Then it drives a mixed workload at a fixed concurrency and reports throughput
+and p50/p95/p99 per route:
+    python scripts/benchmark.py run --duration 30 --concurrency 64
+    python scripts/benchmark.py run --save bench/baseline.json
+    python scripts/benchmark.py run --compare bench/baseline.json --threshold 0.15
+
+--mongo memory (the default) runs the app on an in-memory MongoDB stand-in
+(pip install mongomock-motor); it is fine for spotting regressions in app
+code but says nothing about real query cost, so use --mongo local for that.
+With --compare, the run fails (exit 1) when any route's p95 grows, or its
+throughput drops, by more than the threshold, or its error rate rises by
+more than --max-error-increase.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CATEGORIES = ["crops", "livestock", "soil", "weather", "market", "general"]
+LANGUAGES = ["en", "hi", "te"]
+STATES = {
+    "Telangana": ["Chilli", "Paddy", "Cotton", "Maize", "Turmeric"],
+    "Andhra Pradesh": ["Chilli", "Paddy", "Groundnut", "Tomato"],
+    "Karnataka": ["Onion", "Ragi", "Arecanut", "Tomato"],
+}
+CITIES = ["Gadwal", "Warangal", "Khammam", "Guntur", "Hyderabad", "Kurnool", "Nalgonda", "Raichur"]
+QUESTIONS = [
+    "How do I control white spots on chilli leaves?",
+    "When should I apply urea to paddy after transplanting?",
+    "Which organic pesticide works against cotton bollworm?",
+    "How much water does maize need during flowering?",
+    "Is it a good week to sell turmeric at the mandi?",
+]
+TERMS = ["chilli", "paddy", "neem", "urea", "drip irrigation", "bollworm", "mirchi", "soil test"]
+
+# Route name -> default share of the mixed workload
+DEFAULT_MIX = {
+    "feed": 35,
+    "feed_category": 15,
+    "market_prices": 20,
+    "weather_current": 20,
+    "search": 7,
+    "advisor": 3,
+}
+
+Request = Tuple[str, str, Optional[dict]]
+
+
+# --- Workload ---
+
+def _feed(rng: random.Random) -> Request:
+    return "GET", "/api/v1/community/feed?limit=20", None
+
+
+def _feed_category(rng: random.Random) -> Request:
+    return "GET", f"/api/v1/community/feed?category={rng.choice(CATEGORIES)}&limit=20", None
+
+
+def _market_prices(rng: random.Random) -> Request:
+    state = rng.choice(list(STATES))
+    return "GET", f"/api/v1/market/prices/{state}/{rng.choice(STATES[state])}", None
+
+
+def _weather_current(rng: random.Random) -> Request:
+    return "GET", f"/api/v1/weather/current/{rng.choice(CITIES)}", None
+
+
+def _search(rng: random.Random) -> Request:
+    return "GET", f"/api/v1/search?q={rng.choice(TERMS)}&limit=10", None
+
+
+def _advisor(rng: random.Random) -> Request:
+    question = f"{rng.choice(QUESTIONS)} (plot {rng.randint(1, 50)})"
+    return "POST", "/api/v1/advisor/ask", {"question": question, "language": rng.choice(LANGUAGES)}
+
+
+ROUTES: Dict[str, Callable[[random.Random], Request]] = {
+    "feed": _feed,
+    "feed_category": _feed_category,
+    "market_prices": _market_prices,
+    "weather_current": _weather_current,
+    "search": _search,
+    "advisor": _advisor,
+}
+
+
+def parse_mix(text: Optional[str]) -> Dict[str, float]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ROUTES:
+            raise SystemExit(f"Unknown route '{name}'. Choose from: {', '.join(ROUTES)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {name: [] for name in ROUTES}
+        self.errors: Dict[str, int] = {name: 0 for name in ROUTES}
+        self.statuses: Dict[str, Dict[str, int]] = {name: {} for name in ROUTES}
+
+    def record(self, route: str, seconds: float, status: str, ok: bool):
+        self.latencies[route].append(seconds)
+        self.statuses[route][status] = self.statuses[route].get(status, 0) + 1
+        if not ok:
+            self.errors[route] += 1
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for name, samples in self.latencies.items():
+            if not samples:
+                continue
+            p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+            routes[name] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "error_rate": round(self.errors[name] / len(samples), 4),
+                "statuses": self.statuses[name],
+            }
+        total = sum(r["requests"] for r in routes.values())
+        return {"routes": routes, "total_requests": total, "total_rps": round(total / elapsed, 1)}
+
+
+async def drive(base_url: str, mix: Dict[str, float], concurrency: int, duration: float, warmup: float, seed: int) -> dict:
+    """
+    `concurrency` closed-loop clients, each picking its next route from the
+    mix. Requests started during the warmup are not recorded.
+    """
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeout = httpx.Timeout(30.0)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        measure_from = started + warmup
+        stop_at = measure_from + duration
+
+        async def client_loop(index: int):
+            rng = random.Random(seed * 1000 + index)
+            while True:
+                route = rng.choices(names, weights)[0]
+                method, path, body = ROUTES[route](rng)
+                begin = time.perf_counter()
+                if begin >= stop_at:
+                    return
+                try:
+                    response = await client.request(method, path, json=body)
+                    # Advisor answers stream; read them to the end
+                    await response.aread()
+                    status = str(response.status_code)
+                    ok = response.status_code < 400
+                    if ok and route == "advisor" and b"event: error" in response.content:
+                        status, ok = "stream-error", False
+                except httpx.HTTPError as e:
+                    status, ok = type(e).__name__, False
+                end = time.perf_counter()
+                if begin >= measure_from:
+                    recorder.record(route, end - begin, status, ok)
+
+        await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+    return recorder.report(duration)
+
+
+# --- Baselines ---
+
+def compare(result: dict, baseline: dict, threshold: float, max_error_increase: float) -> List[str]:
+    failures = []
+    for name, base in baseline["routes"].items():
+        current = result["routes"].get(name)
+        if current is None:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            failures.append(f"{name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+        if base["rps"] and current["rps"] < base["rps"] * (1 - threshold):
+            failures.append(f"{name}: throughput {base['rps']} -> {current['rps']} req/s")
+        if current["error_rate"] > base["error_rate"] + max_error_increase:
+            failures.append(f"{name}: error rate {base['error_rate']:.2%} -> {current['error_rate']:.2%}")
+    return failures
+
+
+def print_report(result: dict, baseline: Optional[dict]):
+    header = f"{'route':<16}{'reqs':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in result["routes"].items():
+        line = (
+            f"{name:<16}{r['requests']:>8}{r['rps']:>9}{r['p50_ms']:>9}"
+            f"{r['p95_ms']:>9}{r['p99_ms']:>9}{r['error_rate']:>9.2%}"
+        )
+        base = (baseline or {}).get("routes", {}).get(name)
+        if base and base["p95_ms"]:
+            line += f"   p95 {(r['p95_ms'] / base['p95_ms'] - 1):+.0%} vs baseline"
+        print(line)
+    print(f"{'total':<16}{result['total_requests']:>8}{result['total_rps']:>9}")
+
+
+# --- Processes ---
+
+def _free_port() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_until_up(url: str, timeout: float, process: subprocess.Popen):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=1.0) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"❌ {url} exited during startup (code {process.returncode})")
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"❌ {url} did not come up within {timeout:.0f}s")
+
+
+def _stop(process: subprocess.Popen):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def synthetic_posts(count: int, seed: int) -> List[dict]:
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    posts = []
+    for i in range(count):
+        crop = rng.choice(["chilli", "paddy", "cotton", "maize", "turmeric", "tomato"])
+        posts.append({
+            "_id": f"bench-{i:07d}",
+            "author": {"name": f"Farmer {rng.randint(1, 500)}", "role": "farmer", "profilePicture": None},
+            "title": f"{crop.title()} question #{i}",
+            "content": f"{rng.choice(QUESTIONS)} Seeing this near {rng.choice(CITIES)}. " * rng.randint(1, 4),
+            "type": rng.choice(["question", "discussion", "tip", "problem", "success_story"]),
+            "category": rng.choice(CATEGORIES),
+            "language": rng.choice(LANGUAGES),
+            "tags": rng.sample([crop, "organic", "pests", "irrigation", "fertilizer", "kharif"], 2),
+            "views": rng.randint(0, 2000),
+            "reactionCount": rng.randint(0, 200),
+            "commentCount": 0,
+            "commentPreview": [],
+            "createdAt": now - timedelta(minutes=i),
+            "isResolved": False,
+            "translations": {},
+            "translationStatus": "complete",
+        })
+    return posts
+
+
+async def _seed_posts(collection, count: int, seed: int):
+    if count and await collection.count_documents({}) < count:
+        await collection.insert_many(synthetic_posts(count, seed), ordered=False)
+
+
+def serve_app(args):
+    """
+    Runs the app with uvicorn in this process; with --mongo memory the
+    database connection is swapped for an in-memory stand-in first.
+    """
+    import uvicorn
+    import app.main as main
+    from app.database import db
+
+    connect = main.connect_to_mongo
+
+    async def connect_and_seed(ping: bool = True):
+        if args.mongo == "memory":
+            try:
+                from mongomock_motor import AsyncMongoMockClient
+            except ImportError:
+                raise SystemExit("--mongo memory needs mongomock-motor (pip install mongomock-motor)")
+            db.client = AsyncMongoMockClient()
+            db.db = db.client["wikikisan"]
+        else:
+            await connect(ping=ping)
+        await _seed_posts(db.db["posts"], args.seed_posts, args.seed)
+
+    main.connect_to_mongo = connect_and_seed
+    uvicorn.run(main.app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+async def run(args) -> int:
+    mix = parse_mix(args.mix)
+    stub_port, app_port = _free_port(), _free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    env = {
+        **os.environ,
+        "AGMARKNET_BASE_URL": stub_url,
+        "OPENWEATHER_BASE_URL": stub_url,
+        "ADVISOR_FAKE_MODEL": "true",
+        "ADVISOR_FAKE_FIRST_TOKEN_SECONDS": str(args.gemini_delay),
+        "ADVISOR_FAKE_ERROR_RATE": str(args.gemini_error_rate),
+        # The benchmark measures the app, not the shared Gemini quota
+        "GEMINI_RPM": "100000",
+        "GEMINI_TPM": "1000000000",
+        "ACCESS_LOG_SAMPLE_RATE": "0",
+        # Every benchmark client shares one address
+        "ADMISSION_CLIENT_RATE": "0",
+    }
+    for pair in args.app_env:
+        key, _, value = pair.partition("=")
+        env[key] = value
+
+    script = os.path.join(ROOT, "scripts")
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(script, "stub_upstream.py"), "serve", "--port", str(stub_port),
+         "--agmarknet-delay", str(args.agmarknet_delay), "--openweather-delay", str(args.openweather_delay),
+         "--error-rate", str(args.upstream_error_rate)],
+        cwd=ROOT, env=env,
+    )
+    app = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "serve-app", "--port", str(app_port), "--mongo", args.mongo,
+         "--seed-posts", str(args.seed_posts), "--seed", str(args.seed)],
+        cwd=ROOT, env=env,
+    )
+    try:
+        await _wait_until_up(f"{stub_url}/docs", 30, stub)
+        await _wait_until_up(f"http://127.0.0.1:{app_port}/health", args.startup_timeout, app)
+        print(
+            f"🏁 {args.concurrency} clients for {args.duration:.0f}s (+{args.warmup:.0f}s warmup) | "
+            f"mix {', '.join(f'{k}={v:g}' for k, v in mix.items())}"
+        )
+        result = await drive(f"http://127.0.0.1:{app_port}", mix, args.concurrency, args.duration, args.warmup, args.seed)
+    finally:
+        _stop(app)
+        _stop(stub)
+
+    result["config"] = {
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "mix": mix,
+        "mongo": args.mongo,
+        "seed_posts": args.seed_posts,
+        "agmarknet_delay": args.agmarknet_delay,
+        "openweather_delay": args.openweather_delay,
+        "upstream_error_rate": args.upstream_error_rate,
+        "gemini_delay": args.gemini_delay,
+        "gemini_error_rate": args.gemini_error_rate,
+    }
+    result["environment"] = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("config", {}).get("concurrency") != args.concurrency:
+            print("⚠️  Baseline was recorded at a different concurrency; comparison is indicative only")
+    print_report(result, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Saved results to {args.save}")
+
+    if baseline is not None:
+        failures = compare(result, baseline, args.threshold, args.max_error_increase)
+        if failures:
+            print(f"❌ Regressions beyond {args.threshold:.0%}:")
+            for failure in failures:
+                print(f"   {failure}")
+            return 1
+        print(f"✅ No regressions beyond {args.threshold:.0%}.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    bench = sub.add_parser("run", help="Start stubs and app, run the workload, report")
+    bench.add_argument("--concurrency", type=int, default=32)
+    bench.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    bench.add_argument("--warmup", type=float, default=3.0, help="Seconds excluded from the results")
+    bench.add_argument("--mix", help="Route weights, e.g. feed=50,market_prices=30,weather_current=20")
+    bench.add_argument("--mongo", choices=["memory", "local"], default="memory",
+                       help="'local' uses DATABASE_URL")
+    bench.add_argument("--seed-posts", type=int, default=2000,
+                       help="Synthetic posts inserted when the collection holds fewer")
+    bench.add_argument("--seed", type=int, default=1)
+    bench.add_argument("--agmarknet-delay", type=float, default=0.2, help="Seconds")
+    bench.add_argument("--openweather-delay", type=float, default=0.1, help="Seconds")
+    bench.add_argument("--upstream-error-rate", type=float, default=0.0)
+    bench.add_argument("--gemini-delay", type=float, default=0.3, help="Seconds to the fake model's first token")
+    bench.add_argument("--gemini-error-rate", type=float, default=0.0, help="Share of fake model quota errors")
+    bench.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                       help="Extra settings for the app process")
+    bench.add_argument("--startup-timeout", type=float, default=60.0)
+    bench.add_argument("--save", help="Write the results as JSON (e.g. a new baseline)")
+    bench.add_argument("--compare", help="Baseline JSON to compare against")
+    bench.add_argument("--threshold", type=float, default=0.15, help="Allowed p95/throughput regression")
+    bench.add_argument("--max-error-increase", type=float, default=0.01, help="Allowed error-rate increase")
+
+    app = sub.add_parser("serve-app", help="(internal) run the app for the benchmark")
+    app.add_argument("--port", type=int, required=True)
+    app.add_argument("--mongo", choices=["memory", "local"], default="memory")
+    app.add_argument("--seed-posts", type=int, default=0)
+    app.add_argument("--seed", type=int, default=1)
+
+    args = parser.parse_args()
+    if args.command == "serve-app":
+        serve_app(args)
+    else:
+        sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""
+Bulk loader for posts, comments, wiki articles and historical mandi prices.
+
+Import NDJSON files (one JSON document per line, .gz accepted):
+    python scripts/bulk_import.py load --posts posts.ndjson --comments comments.ndjson \\
+        --wiki wiki.ndjson --prices prices.ndjson
+
+Or generate a deterministic synthetic dataset, either as NDJSON files or
+straight into MongoDB (a million posts loads in a few minutes locally):
+    python scripts/bulk_import.py generate --out data/ --posts 1000000
+    python scripts/bulk_import.py synthetic --posts 1000000 --drop
+
+Documents are read lazily and written as unordered insert_many batches with
+a bounded number in flight, so memory stays flat whatever the file size.
+Indexes are built once loading has finished (use --drop to load into empty
+collections, which is much faster than maintaining indexes row by row).
+Price lines use the Agmarknet record format and go through the same parser
+as live ingestion. Synthetic posts are marked as translated so the
+pre-translation queue does not pick up millions of them on the next start.
+"""
+import argparse
+import asyncio
+import gzip
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+import orjson
+from pymongo.errors import BulkWriteError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import connect_to_mongo, close_mongo_connection, get_db
+from app.core.config import settings
+from app.services import comments, market_history, posts
+from app.services.comments import preview_of as comment_preview
+
+# Fields stored as BSON dates, per collection
+DATE_FIELDS = {
+    "posts": ("createdAt",),
+    "comments": ("createdAt",),
+    "wiki": ("last_updated",),
+}
+
+
+# --- NDJSON ---
+
+def read_ndjson(path: str) -> Iterator[dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                print(f"⚠️  {path}:{number} skipped: {e}")
+
+
+def write_ndjson(path: str, docs: Iterable[dict]) -> int:
+    opener = gzip.open if path.endswith(".gz") else open
+    count = 0
+    with opener(path, "wb") as f:
+        for doc in docs:
+            f.write(orjson.dumps(doc))
+            f.write(b"\n")
+            count += 1
+    return count
+
+
+def with_dates(collection: str, docs: Iterable[dict]) -> Iterator[dict]:
+    fields = DATE_FIELDS.get(collection, ())
+    for doc in docs:
+        for field in fields:
+            value = doc.get(field)
+            if isinstance(value, str):
+                doc[field] = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        yield doc
+
+
+def price_documents(records: Iterable[dict]) -> Iterator[dict]:
+    skipped = 0
+    for record in records:
+        doc = market_history.parse_record(record)
+        if doc is None:
+            skipped += 1
+            continue
+        yield doc
+    if skipped:
+        print(f"⚠️  {skipped} price records missing a date or modal price were skipped")
+
+
+# --- Synthetic Data ---
+
+CROPS = {
+    "en": ["chilli", "paddy", "cotton", "maize", "turmeric", "tomato", "groundnut", "onion", "wheat", "sugarcane"],
+    "hi": ["मिर्च", "धान", "कपास", "मक्का", "हल्दी", "टमाटर", "मूंगफली", "प्याज", "गेहूं", "गन्ना"],
+    "te": ["మిర్చి", "వరి", "పత్తి", "మొక్కజొన్న", "పసుపు", "టమాటా", "వేరుశెనగ", "ఉల్లి", "గోధుమ", "చెరకు"],
+}
+TITLES = {
+    "en": ["Best organic pesticide for {crop}?", "Yellow leaves on my {crop} plants", "{crop} prices at the mandi this week",
+           "How I raised my {crop} yield by 20%", "Drip irrigation for {crop} in summer"],
+    "hi": ["{crop} के लिए सबसे अच्छा जैविक कीटनाशक?", "मेरे {crop} के पत्ते पीले हो रहे हैं", "इस हफ्ते मंडी में {crop} का भाव",
+           "मैंने {crop} की पैदावार 20% कैसे बढ़ाई", "गर्मी में {crop} के लिए ड्रिप सिंचाई"],
+    "te": ["{crop} కోసం ఉత్తమ సేంద్రియ పురుగుమందు?", "నా {crop} ఆకులు పసుపు రంగులోకి మారుతున్నాయి", "ఈ వారం మార్కెట్లో {crop} ధర",
+           "{crop} దిగుబడి 20% ఎలా పెంచాను", "వేసవిలో {crop} కు డ్రిప్ సాగు"],
+}
+BODIES = {
+    "en": ["I am seeing white spots on the leaves after the last rain.", "Neem oil at 5 ml per litre worked well for me.",
+           "Should I apply urea now or wait for the next irrigation?", "Soil test showed low nitrogen and zinc."],
+    "hi": ["पिछली बारिश के बाद पत्तों पर सफेद धब्बे दिख रहे हैं।", "नीम का तेल 5 मिली प्रति लीटर से फायदा हुआ।",
+           "क्या अभी यूरिया डालूं या अगली सिंचाई तक रुकूं?", "मिट्टी की जांच में नाइट्रोजन और जिंक कम निकला।"],
+    "te": ["గత వర్షం తర్వాత ఆకులపై తెల్లని మచ్చలు కనిపిస్తున్నాయి.", "లీటరుకు 5 మి.లీ వేప నూనె బాగా పనిచేసింది.",
+           "ఇప్పుడు యూరియా వేయాలా లేక తదుపరి నీటి తడి వరకు ఆగాలా?", "మట్టి పరీక్షలో నత్రజని మరియు జింక్ తక్కువగా ఉన్నాయి."],
+}
+TOPIC_TAGS = ["organic", "pests", "irrigation", "fertilizer", "kharif", "rabi", "prices", "soil", "seeds", "disease",
+              "weather", "harvest", "storage", "subsidy", "drip", "neem", "urea", "yield", "weeds", "livestock"]
+CATEGORIES = ["crops", "crops", "crops", "market", "weather", "livestock", "soil", "general"]
+POST_TYPES = ["question", "question", "question", "discussion", "tip", "problem", "success_story"]
+LANGUAGE_WEIGHTS = {"en": 0.5, "te": 0.3, "hi": 0.2}
+PRICE_MARKETS = {
+    "Telangana": [("Gadwal", "Jogulamba Gadwal"), ("Warangal", "Warangal"), ("Khammam", "Khammam"),
+                  ("Bowenpally", "Hyderabad"), ("Nizamabad", "Nizamabad")],
+    "Andhra Pradesh": [("Guntur", "Guntur"), ("Kurnool", "Kurnool"), ("Vijayawada", "Krishna")],
+    "Karnataka": [("Raichur", "Raichur"), ("Hubli", "Dharwad"), ("Bangalore", "Bangalore")],
+    "Maharashtra": [("Lasalgaon", "Nashik"), ("Pune", "Pune")],
+}
+PRICE_COMMODITIES = {"Chilli": 9000, "Paddy": 2100, "Cotton": 6800, "Maize": 1900, "Turmeric": 7500,
+                     "Tomato": 1500, "Groundnut": 5800, "Onion": 1800}
+
+
+class SyntheticData:
+    """
+    Seeded generator: the same seed and sizes always give the same dataset
+    (timestamps count back from midnight today, so they shift by day).
+    Tags follow a Zipf distribution (a few crops and topics dominate, with a
+    long tail), post timestamps are spread over `days`, and views and
+    reactions are heavy-tailed like real engagement.
+    """
+    def __init__(self, seed: int = 42, days: int = 365, zipf_s: float = 1.1):
+        self.seed = seed
+        self.days = days
+        self.now = datetime.combine(date.today(), datetime.min.time())
+        self.tags = CROPS["en"] + TOPIC_TAGS
+        weights = [1 / (rank ** zipf_s) for rank in range(1, len(self.tags) + 1)]
+        total = 0.0
+        self.tag_cum_weights = []
+        for w in weights:
+            total += w
+            self.tag_cum_weights.append(total)
+
+    def _uuid(self, rng: random.Random) -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def _tags(self, rng: random.Random, lang: str, crop_index: int) -> List[str]:
+        picked = rng.choices(self.tags, cum_weights=self.tag_cum_weights, k=rng.randint(1, 4))
+        tags = [CROPS[lang][crop_index]] + picked
+        return list(dict.fromkeys(tags))
+
+    def posts_and_comments(self, count: int, comments_per_post: float) -> Iterator[Tuple[dict, List[dict]]]:
+        rng = random.Random(self.seed)
+        languages, lang_weights = list(LANGUAGE_WEIGHTS), list(LANGUAGE_WEIGHTS.values())
+        span = self.days * 86400
+        for i in range(count):
+            lang = rng.choices(languages, lang_weights)[0]
+            # Crops are Zipf-distributed too: the first few dominate
+            crop_index = min(int(rng.paretovariate(1.2)) - 1, len(CROPS[lang]) - 1)
+            crop = CROPS[lang][crop_index]
+            created = self.now - timedelta(seconds=int(span * i / max(count, 1)) + rng.randint(0, 59))
+            n_comments = min(int(rng.expovariate(1 / comments_per_post)), 200) if comments_per_post else 0
+            post_id = self._uuid(rng)
+            comments = [
+                {
+                    "_id": self._uuid(rng),
+                    "post_id": post_id,
+                    "author": {"name": f"Farmer {rng.randint(1, 50_000)}", "role": rng.choice(["farmer"] * 9 + ["expert"]),
+                               "profilePicture": None},
+                    "content": rng.choice(BODIES[lang]),
+                    "createdAt": created + timedelta(minutes=rng.randint(1, 60 * 24 * 7)),
+                    "isAnswer": rng.random() < 0.15,
+                }
+                for _ in range(n_comments)
+            ]
+            answers = sorted((c for c in comments if c["isAnswer"]), key=lambda c: c["createdAt"])
+            post = {
+                "_id": post_id,
+                "author": {"name": f"Farmer {rng.randint(1, 50_000)}", "role": "farmer", "profilePicture": None},
+                "title": rng.choice(TITLES[lang]).format(crop=crop),
+                "content": " ".join(rng.sample(BODIES[lang], rng.randint(1, len(BODIES[lang])))),
+                "type": rng.choice(POST_TYPES),
+                "category": rng.choice(CATEGORIES),
+                "language": lang,
+                "tags": self._tags(rng, lang, crop_index),
+                "views": int(rng.paretovariate(1.1) * 10),
+                "reactionCount": int(rng.paretovariate(1.3)) - 1,
+                "commentCount": n_comments,
+                "commentPreview": [comment_preview(c) for c in answers[:settings.COMMENT_PREVIEW_SIZE]],
+                "createdAt": created,
+                "isResolved": rng.random() < 0.3,
+                "translations": {},
+                "translationStatus": "complete",
+            }
+            yield post, comments
+
+    def wiki(self, count: int) -> Iterator[dict]:
+        rng = random.Random(self.seed + 1)
+        soils = ["Black soil", "Red loamy soil", "Alluvial soil", "Clayey soil", "Sandy loam"]
+        diseases = ["Blast", "Blight", "Brown spot", "Powdery mildew", "Fruit rot", "Wilt", "Leaf curl", "Rust"]
+        for i in range(count):
+            crop = CROPS["en"][i % len(CROPS["en"])]
+            low = rng.randint(15, 25)
+            yield {
+                "_id": f"wiki-{i:06d}",
+                "crop_name": f"{crop.title()} (variety {i // len(CROPS['en']) + 1})",
+                "optimal_temperature": f"{low}°C - {low + rng.randint(5, 12)}°C",
+                "soil_type": rng.choice(soils),
+                "sowing_period": rng.choice(["June to July (Kharif)", "October to November (Rabi)", "February to March"]),
+                "harvesting_time": f"{rng.randint(60, 160)} days",
+                "common_diseases": rng.sample(diseases, 3),
+                "language": "en",
+                "tags": [crop],
+                "is_wiki_article": True,
+                "last_updated": self.now,
+            }
+
+    def prices(self, days: int) -> Iterator[dict]:
+        """
+        Agmarknet-shaped records: a daily random walk per market and
+        commodity, with a yearly seasonal swing.
+        """
+        rng = random.Random(self.seed + 2)
+        today = self.now.date()
+        for state, markets in PRICE_MARKETS.items():
+            for market, district in markets:
+                for commodity, base in PRICE_COMMODITIES.items():
+                    level = base * rng.uniform(0.85, 1.15)
+                    for offset in range(days, 0, -1):
+                        day = today - timedelta(days=offset)
+                        level = max(base * 0.3, level * (1 + rng.gauss(0, 0.015)))
+                        modal = level * (1 + 0.1 * math.sin(2 * math.pi * day.timetuple().tm_yday / 365))
+                        yield {
+                            "state": state,
+                            "district": district,
+                            "market": market,
+                            "commodity": commodity,
+                            "variety": "Other",
+                            "grade": "FAQ",
+                            "arrival_date": day.strftime("%d/%m/%Y"),
+                            "min_price": str(round(modal * 0.92)),
+                            "max_price": str(round(modal * 1.08)),
+                            "modal_price": str(round(modal)),
+                        }
+
+
+# --- Loading ---
+
+class BatchWriter:
+    """
+    Collects documents into chunks and writes each chunk with an unordered
+    insert_many, keeping at most `in_flight` chunks outstanding. Duplicate
+    keys (e.g. re-running a load) are counted and skipped.
+    """
+    def __init__(self, collection: str, chunk_size: int, in_flight: int):
+        self.collection = collection
+        self.chunk_size = chunk_size
+        self.buffer: List[dict] = []
+        self.slots = asyncio.Semaphore(in_flight)
+        self.tasks: set = set()
+        self.inserted = 0
+        self.duplicates = 0
+        self.started = time.perf_counter()
+        self._reported = 0
+
+    async def add(self, doc: dict):
+        self.buffer.append(doc)
+        if len(self.buffer) >= self.chunk_size:
+            await self._flush()
+
+    async def _flush(self):
+        if not self.buffer:
+            return
+        chunk, self.buffer = self.buffer, []
+        await self.slots.acquire()
+        task = asyncio.create_task(self._write(chunk))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _write(self, chunk: List[dict]):
+        try:
+            result = await get_db()[self.collection].insert_many(chunk, ordered=False)
+            self.inserted += len(result.inserted_ids)
+        except BulkWriteError as e:
+            details = e.details
+            self.inserted += details.get("nInserted", 0)
+            errors = details.get("writeErrors", [])
+            duplicates = sum(1 for err in errors if err.get("code") == 11000)
+            self.duplicates += duplicates
+            if duplicates != len(errors):
+                raise
+        finally:
+            self.slots.release()
+        if self.inserted - self._reported >= 100_000:
+            self._reported = self.inserted
+            rate = self.inserted / (time.perf_counter() - self.started)
+            print(f"   {self.collection}: {self.inserted:,} written ({rate:,.0f}/s)")
+
+    async def close(self):
+        await self._flush()
+        # Re-raises the first failed write, if any
+        await asyncio.gather(*list(self.tasks))
+        elapsed = time.perf_counter() - self.started
+        note = f", {self.duplicates:,} duplicates skipped" if self.duplicates else ""
+        print(f"✅ {self.collection}: {self.inserted:,} documents in {elapsed:.1f}s{note}")
+
+
+async def _load(collection: str, docs: Iterable[dict], chunk_size: int, in_flight: int, every: int = 10_000):
+    writer = BatchWriter(collection, chunk_size, in_flight)
+    for i, doc in enumerate(docs, 1):
+        await writer.add(doc)
+        if i % every == 0:
+            # Reading and parsing is synchronous; let finished writes complete
+            await asyncio.sleep(0)
+    await writer.close()
+
+
+async def _load_posts_with_comments(data: SyntheticData, count: int, comments_per_post: float, chunk_size: int, in_flight: int):
+    post_writer = BatchWriter(posts.COLLECTION, chunk_size, in_flight)
+    comment_writer = BatchWriter(comments.COLLECTION, chunk_size, in_flight)
+    for i, (post, thread) in enumerate(data.posts_and_comments(count, comments_per_post), 1):
+        await post_writer.add(post)
+        for comment in thread:
+            await comment_writer.add(comment)
+        if i % 10_000 == 0:
+            await asyncio.sleep(0)
+    await post_writer.close()
+    await comment_writer.close()
+
+
+async def build_indexes(collections: Iterable[str]):
+    started = time.perf_counter()
+    builders: Dict[str, Callable] = {
+        posts.COLLECTION: posts.ensure_indexes,
+        market_history.COLLECTION: market_history.ensure_indexes,
+        comments.COLLECTION: comments.ensure_indexes,
+        "wiki": lambda: get_db()["wiki"].create_index("crop_name", name="crop_name"),
+    }
+    for collection in collections:
+        await builders[collection]()
+    print(f"🗂️  Indexes built in {time.perf_counter() - started:.1f}s")
+
+
+async def _prepare(collections: List[str], drop: bool):
+    await connect_to_mongo()
+    if drop:
+        for collection in collections:
+            await get_db()[collection].drop()
+            print(f"🗑️  Dropped {collection}")
+
+
+async def load_files(args) -> int:
+    sources = {
+        posts.COLLECTION: args.posts,
+        comments.COLLECTION: args.comments,
+        "wiki": args.wiki,
+        market_history.COLLECTION: args.prices,
+    }
+    sources = {collection: path for collection, path in sources.items() if path}
+    if not sources:
+        print("Nothing to load: pass at least one of --posts, --comments, --wiki, --prices")
+        return 1
+
+    await _prepare(list(sources), args.drop)
+    try:
+        for collection, path in sources.items():
+            docs = read_ndjson(path)
+            docs = price_documents(docs) if collection == market_history.COLLECTION else with_dates(collection, docs)
+            await _load(collection, docs, args.chunk_size, args.in_flight)
+        if not args.skip_indexes:
+            await build_indexes(sources)
+    finally:
+        await close_mongo_connection()
+    return 0
+
+
+async def load_synthetic(args) -> int:
+    data = SyntheticData(args.seed, args.days)
+    collections = [posts.COLLECTION, comments.COLLECTION, "wiki", market_history.COLLECTION]
+    await _prepare(collections, args.drop)
+    try:
+        await _load_posts_with_comments(data, args.posts, args.comments_per_post, args.chunk_size, args.in_flight)
+        await _load("wiki", data.wiki(args.wiki), args.chunk_size, args.in_flight)
+        await _load(market_history.COLLECTION, price_documents(data.prices(args.price_days)), args.chunk_size, args.in_flight)
+        if not args.skip_indexes:
+            await build_indexes(collections)
+    finally:
+        await close_mongo_connection()
+    return 0
+
+
+def generate_files(args) -> int:
+    data = SyntheticData(args.seed, args.days)
+    os.makedirs(args.out, exist_ok=True)
+    started = time.perf_counter()
+    posts_path = os.path.join(args.out, "posts.ndjson")
+    comments_path = os.path.join(args.out, "comments.ndjson")
+
+    # One pass writes both files so comments point at generated post ids
+    post_count = comment_count = 0
+    with open(posts_path, "wb") as post_file, open(comments_path, "wb") as comment_file:
+        for post, thread in data.posts_and_comments(args.posts, args.comments_per_post):
+            post_file.write(orjson.dumps(post) + b"\n")
+            post_count += 1
+            for comment in thread:
+                comment_file.write(orjson.dumps(comment) + b"\n")
+                comment_count += 1
+    wiki_count = write_ndjson(os.path.join(args.out, "wiki.ndjson"), data.wiki(args.wiki))
+    price_count = write_ndjson(os.path.join(args.out, "prices.ndjson"), data.prices(args.price_days))
+
+    print(
+        f"✅ Wrote {post_count:,} posts, {comment_count:,} comments, {wiki_count:,} wiki articles "
+        f"and {price_count:,} price records to {args.out} in {time.perf_counter() - started:.1f}s"
+    )
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def write_options(p):
+        p.add_argument("--chunk-size", type=int, default=5000, help="Documents per insert_many")
+        p.add_argument("--in-flight", type=int, default=4, help="Concurrent insert_many batches")
+        p.add_argument("--drop", action="store_true", help="Drop the target collections first")
+        p.add_argument("--skip-indexes", action="store_true", help="Leave index builds to the app's startup")
+
+    def size_options(p):
+        p.add_argument("--seed", type=int, default=42)
+        p.add_argument("--posts", type=int, default=100_000)
+        p.add_argument("--comments-per-post", type=float, default=3.0, help="Mean; exponentially distributed")
+        p.add_argument("--wiki", type=int, default=500)
+        p.add_argument("--price-days", type=int, default=365, help="Days of history per market and commodity")
+        p.add_argument("--days", type=int, default=365, help="Span of post timestamps")
+
+    load = sub.add_parser("load", help="Import NDJSON files")
+    load.add_argument("--posts")
+    load.add_argument("--comments")
+    load.add_argument("--wiki")
+    load.add_argument("--prices", help="Agmarknet-format records")
+    write_options(load)
+
+    synthetic = sub.add_parser("synthetic", help="Generate a dataset straight into MongoDB")
+    size_options(synthetic)
+    write_options(synthetic)
+
+    generate = sub.add_parser("generate", help="Generate a dataset as NDJSON files")
+    generate.add_argument("--out", required=True)
+    size_options(generate)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        sys.exit(generate_files(args))
+    runner = load_files if args.command == "load" else load_synthetic
+    sys.exit(asyncio.run(runner(args)))
+
+
+if __name__ == "__main__":
+    main()
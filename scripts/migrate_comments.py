@@ -0,0 +1,102 @@
+"""
+Moves comment threads embedded in post documents into the comments
+collection, sets each post's commentCount and answer preview, and removes
+the embedded array. Safe to re-run: already-moved comments are skipped
+(comments without an id get one derived from the post id, their position
+and createdAt, so an interrupted run gives them the same id next time).
+
+    python scripts/migrate_comments.py --batch-size 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.database import connect_to_mongo, close_mongo_connection
+from app.services import comments
+from app.services.posts import posts_collection
+
+# Namespace for the uuid5 ids of embedded comments that never had one
+COMMENT_ID_NAMESPACE = uuid.UUID("91d61680-1fab-485e-97b6-b6a73b883ba4")
+
+
+def comment_id(post: dict, index: int, embedded: dict) -> str:
+    if embedded.get("id"):
+        return str(embedded["id"])
+    return str(uuid.uuid5(COMMENT_ID_NAMESPACE, f"{post['_id']}:{index}:{embedded.get('createdAt')}"))
+
+
+def thread_documents(post: dict) -> list:
+    docs = []
+    for index, embedded in enumerate(post.get("comments") or []):
+        author = embedded.get("author")
+        if not isinstance(author, dict):
+            author = {"name": str(author or "Farmer"), "role": "farmer", "profilePicture": None}
+        docs.append({
+            "_id": comment_id(post, index, embedded),
+            "post_id": post["_id"],
+            "author": author,
+            "content": embedded.get("content", ""),
+            "createdAt": embedded.get("createdAt") or post.get("createdAt"),
+            "isAnswer": bool(embedded.get("isAnswer", False)),
+        })
+    return docs
+
+
+async def migrate(batch_size: int):
+    await connect_to_mongo()
+    await comments.ensure_indexes()
+    moved_posts = moved_comments = 0
+    try:
+        cursor = posts_collection().find({"comments.0": {"$exists": True}}, projection={"comments": 1, "createdAt": 1})
+        batch = []
+        async for post in cursor.batch_size(batch_size):
+            batch.append(post)
+            if len(batch) >= batch_size:
+                moved_comments += await _migrate_batch(batch)
+                moved_posts += len(batch)
+                batch = []
+        if batch:
+            moved_comments += await _migrate_batch(batch)
+            moved_posts += len(batch)
+    finally:
+        await close_mongo_connection()
+    print(f"✅ Moved {moved_comments:,} comments out of {moved_posts:,} posts")
+
+
+async def _migrate_batch(batch: list) -> int:
+    threads = {post["_id"]: thread_documents(post) for post in batch}
+    docs = [doc for thread in threads.values() for doc in thread]
+    if docs:
+        try:
+            await comments.comments_collection().insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Duplicates are comments moved by an earlier, interrupted run
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+    updates = []
+    for post_id, thread in threads.items():
+        answers = sorted((c for c in thread if c["isAnswer"]), key=lambda c: c["createdAt"])
+        updates.append(UpdateOne({"_id": post_id}, {
+            "$set": {
+                "commentCount": len(thread),
+                "commentPreview": [comments.preview_of(c) for c in answers[:settings.COMMENT_PREVIEW_SIZE]],
+            },
+            "$unset": {"comments": ""},
+        }))
+    await posts_collection().bulk_write(updates, ordered=False)
+    return len(docs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    asyncio.run(migrate(parser.parse_args().batch_size))
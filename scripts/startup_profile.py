@@ -0,0 +1,180 @@
+"""
+Cold-start profiler and budget check.
+
+Reports where startup time goes and fails (exit 1) when process start to the
+first served /health exceeds the budget (STARTUP_BUDGET_SECONDS by default):
+    python scripts/startup_profile.py
+    python scripts/startup_profile.py --runs 5 --budget 2.0 --top 25
+
+Import cost comes from `python -X importtime -c "import app.main"`, grouped
+per app module and per third-party package. Cold start is measured by
+launching uvicorn and polling /health; the app's own view (blocking startup
+steps, background steps and per-service init times) is read from /stats
+once background warm-up has had --settle seconds to run.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# --- Import Time ---
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """
+    (module, self_us, cumulative_us) for every line of -X importtime output.
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_profile(python: str) -> Tuple[List[Tuple[str, int, int]], float]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(f"❌ import app.main failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr), elapsed
+
+
+def group_imports(rows: List[Tuple[str, int, int]]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """
+    Self time per app module and per top-level third-party package, so a
+    package's cost is not hidden inside whichever app module imported it first.
+    """
+    app_modules, packages = {}, defaultdict(int)
+    for name, self_us, _ in rows:
+        if name == "app" or name.startswith("app."):
+            app_modules[name] = self_us
+        else:
+            packages[name.split(".")[0]] += self_us
+    return app_modules, dict(packages)
+
+
+def print_imports(rows: List[Tuple[str, int, int]], wall: float, top: int):
+    app_modules, packages = group_imports(rows)
+    total_us = sum(self_us for _, self_us, _ in rows)
+    cumulative = {name: cum for name, _, cum in rows}
+    print(f"\n📦 import app.main: {total_us / 1e6:.3f}s in {len(rows)} modules ({wall:.2f}s wall incl. interpreter)")
+
+    print(f"\n  {'app module':<40} {'self ms':>9} {'cumulative ms':>14}")
+    for name, self_us in sorted(app_modules.items(), key=lambda kv: -cumulative[kv[0]])[:top]:
+        print(f"  {name:<40} {self_us / 1000:>9.1f} {cumulative[name] / 1000:>14.1f}")
+
+    print(f"\n  {'package':<40} {'self ms':>9} {'share':>14}")
+    for name, self_us in sorted(packages.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {name:<40} {self_us / 1000:>9.1f} {self_us / total_us:>13.1%}")
+
+
+# --- Cold Start ---
+
+def _free_port() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cold_start(python: str, timeout: float, settle: float, env: Dict[str, str]) -> Tuple[float, dict]:
+    """
+    Seconds from launching uvicorn to the first 200 from /health, and the
+    app's own startup stats after `settle` more seconds.
+    """
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [python, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while True:
+                if process.poll() is not None:
+                    raise SystemExit(f"❌ App exited during startup:\n{process.stderr.read().decode()[-2000:]}")
+                if time.perf_counter() - started > timeout:
+                    raise SystemExit(f"❌ /health did not answer within {timeout:.0f}s")
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.01)
+            elapsed = time.perf_counter() - started
+            time.sleep(settle)
+            stats = client.get("/stats").json().get("services", {})
+        return elapsed, stats
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def print_services(stats: dict):
+    print(f"\n⚙️  App view: ready {stats.get('ready_seconds')}s after importing app.core.services")
+    print(f"\n  {'startup step':<40} {'ms':>9}")
+    for step, ms in stats.get("startup_ms", {}).items():
+        print(f"  {step:<40} {ms:>9.1f}")
+    print(f"\n  {'lazy service':<40} {'init ms':>9}")
+    for name, service in stats.get("services", {}).items():
+        init_ms = f"{service['init_ms']:.1f}" if service["init_ms"] is not None else "not built"
+        print(f"  {name:<40} {init_ms:>9}")
+
+
+# --- Entry Point ---
+
+def main():
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts to measure; the median is checked")
+    parser.add_argument("--budget", type=float, default=settings.STARTUP_BUDGET_SECONDS,
+                        help="Seconds allowed from process start to the first /health")
+    parser.add_argument("--settle", type=float, default=3.0,
+                        help="Seconds to let background startup run before reading /stats")
+    parser.add_argument("--top", type=int, default=15, help="Rows per import table")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--skip-imports", action="store_true")
+    args = parser.parse_args()
+
+    python = sys.executable
+    if not args.skip_imports:
+        rows, wall = import_profile(python)
+        print_imports(rows, wall, args.top)
+
+    # Access logs would only add noise to the timings
+    env = {**os.environ, "ACCESS_LOG_SAMPLE_RATE": "0"}
+    timings, stats = [], {}
+    for run in range(args.runs):
+        elapsed, stats = cold_start(python, args.timeout, args.settle if run == args.runs - 1 else 0.0, env)
+        timings.append(elapsed)
+        print(f"🚀 Cold start {run + 1}/{args.runs}: first /health after {elapsed:.3f}s")
+    print_services(stats)
+
+    median = statistics.median(timings)
+    if median > args.budget:
+        print(f"\n❌ Median cold start {median:.3f}s is over the {args.budget:.2f}s budget")
+        sys.exit(1)
+    print(f"\n✅ Median cold start {median:.3f}s is within the {args.budget:.2f}s budget")
+
+
+if __name__ == "__main__":
+    main()
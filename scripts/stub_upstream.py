@@ -0,0 +1,217 @@
+"""
+Local stand-in for the data.gov.in (Agmarknet) and OpenWeather APIs.
+
+Serve it and point the backend at it:
+    python scripts/stub_upstream.py serve --port 9100 --agmarknet-delay 3
+    AGMARKNET_BASE_URL=http://127.0.0.1:9100 OPENWEATHER_BASE_URL=http://127.0.0.1:9100 uvicorn app.main:app
+
+Add --error-rate 0.05 to answer that share of requests with a 503, as the
+real APIs do under load.
+
+Or run the event-loop check, which makes Agmarknet slow and verifies that
+unrelated routes keep answering while a market request is in flight:
+    python scripts/stub_upstream.py check
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import sys
+import time
+from datetime import date
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MARKETS = [
+    ("Gadwal", "Jogulamba Gadwal"),
+    ("Warangal", "Warangal"),
+    ("Khammam", "Khammam"),
+    ("Guntur", "Guntur"),
+    ("Bowenpally", "Hyderabad"),
+]
+
+
+def _seed(*parts: str) -> int:
+    return int(hashlib.md5("|".join(parts).lower().encode()).hexdigest()[:8], 16)
+
+
+def create_stub_app(
+    agmarknet_delay: float = 0.0, openweather_delay: float = 0.0, error_rate: float = 0.0, seed: int = 0
+) -> FastAPI:
+    stub = FastAPI(title="WikiKisan Upstream Stub")
+    rng = random.Random(seed)
+
+    @stub.middleware("http")
+    async def inject_errors(request: Request, call_next):
+        if error_rate and rng.random() < error_rate:
+            return JSONResponse(status_code=503, content={"cod": "503", "message": "service unavailable"})
+        return await call_next(request)
+
+    @stub.get("/resource/{resource_id}")
+    async def agmarknet(resource_id: str, request: Request):
+        await asyncio.sleep(agmarknet_delay)
+        state = request.query_params.get("filters[state]", "Telangana")
+        commodity = request.query_params.get("filters[commodity]", "Chilli")
+        base = 2000 + _seed(state, commodity) % 8000
+        records = []
+        for market, district in MARKETS:
+            modal = base + (_seed(market, commodity) % 900) - 450
+            records.append({
+                "state": state,
+                "district": district,
+                "market": market,
+                "commodity": commodity,
+                "variety": "Other",
+                "grade": "FAQ",
+                "arrival_date": date.today().strftime("%d/%m/%Y"),
+                "min_price": str(modal - 300),
+                "max_price": str(modal + 300),
+                "modal_price": str(modal),
+            })
+        return {"records": records, "total": len(records)}
+
+    def observation(lat: float, lon: float, name: str) -> dict:
+        seed = _seed(f"{lat:.2f}", f"{lon:.2f}")
+        return {
+            "id": seed % 1_000_000,
+            "name": name,
+            "dt": int(time.time()),
+            "coord": {"lat": lat, "lon": lon},
+            "main": {"temp": 22 + seed % 15, "humidity": 40 + seed % 55},
+            "weather": [{"description": "scattered clouds"}],
+            "rain": {"1h": 0},
+        }
+
+    stations: dict = {}
+
+    @stub.get("/geo/1.0/direct")
+    async def geocode(q: str):
+        await asyncio.sleep(openweather_delay)
+        name = q.split(",")[0].strip()
+        seed = _seed(name)
+        return [{"name": name.title(), "lat": 15.0 + (seed % 700) / 100, "lon": 75.0 + (seed % 600) / 100, "country": "IN"}]
+
+    @stub.get("/data/2.5/weather")
+    async def openweather(lat: float = 17.39, lon: float = 78.49):
+        await asyncio.sleep(openweather_delay)
+        data = observation(lat, lon, f"Station {lat:.2f},{lon:.2f}")
+        stations[data["id"]] = (lat, lon)
+        return {"cod": 200, **data}
+
+    @stub.get("/data/2.5/forecast")
+    async def openweather_forecast(lat: float = 17.39, lon: float = 78.49):
+        await asyncio.sleep(openweather_delay)
+        seed = _seed(f"{lat:.2f}", f"{lon:.2f}")
+        start = int(time.time()) // 10800 * 10800
+        items = []
+        for step in range(40):
+            hour = (step * 3) % 24
+            items.append({
+                "dt": start + step * 10800,
+                "main": {"temp": 20 + seed % 8 + (10 if 9 <= hour <= 15 else 0), "humidity": 95 - (seed + step) % 40},
+                "wind": {"speed": (seed + step) % 7},
+                "rain": {"3h": 4.0} if (seed + step) % 11 == 0 else {},
+            })
+        return {"cod": "200", "cnt": len(items), "list": items}
+
+    @stub.get("/data/2.5/group")
+    async def openweather_group(id: str):
+        await asyncio.sleep(openweather_delay)
+        found = [stations[int(i)] for i in id.split(",") if int(i) in stations]
+        items = [observation(lat, lon, f"Station {lat:.2f},{lon:.2f}") for lat, lon in found]
+        return {"cnt": len(items), "list": items}
+
+    @stub.exception_handler(404)
+    async def not_found(request: Request, exc):
+        return JSONResponse(status_code=404, content={"cod": "404", "message": "not found"})
+
+    return stub
+
+
+async def _serve(app: FastAPI, port: int):
+    """
+    Starts uvicorn in the current loop; returns (server, task) so callers can
+    set `server.should_exit` and await the task.
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def run_check(port: int, slow_delay: float, max_unrelated_latency: float) -> bool:
+    """
+    Fires one request at the slow upstream route and a burst of unrelated
+    requests alongside it; passes when none of the unrelated ones waited on it.
+    """
+    os.environ["AGMARKNET_BASE_URL"] = f"http://127.0.0.1:{port}"
+    os.environ["OPENWEATHER_BASE_URL"] = f"http://127.0.0.1:{port}"
+    stub_server, stub_task = await _serve(create_stub_app(agmarknet_delay=slow_delay), port)
+
+    import httpx
+    from app.main import app
+    from app.core.http_client import open_http_clients, close_http_clients
+
+    await open_http_clients()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            async def timed(path: str) -> float:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                return time.perf_counter() - started
+
+            slow = asyncio.create_task(timed("/api/v1/market/prices/Telangana/Chilli"))
+            await asyncio.sleep(0.1)
+            unrelated = await asyncio.gather(*(
+                timed("/health" if i % 2 else "/api/v1/weather/current/Gadwal") for i in range(20)
+            ))
+            slow_latency = await slow
+    finally:
+        await close_http_clients()
+        stub_server.should_exit = True
+        await stub_task
+
+    worst = max(unrelated)
+    print(f"slow upstream route: {slow_latency:.3f}s | worst unrelated route: {worst:.3f}s")
+    return worst < max_unrelated_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Run the stub upstream server")
+    serve.add_argument("--port", type=int, default=9100)
+    serve.add_argument("--agmarknet-delay", type=float, default=0.0, help="Seconds")
+    serve.add_argument("--openweather-delay", type=float, default=0.0, help="Seconds")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503")
+
+    check = sub.add_parser("check", help="Verify a slow upstream does not block other routes")
+    check.add_argument("--port", type=int, default=9100)
+    check.add_argument("--slow-delay", type=float, default=2.0)
+    check.add_argument("--max-unrelated-latency", type=float, default=0.5)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        uvicorn.run(
+            create_stub_app(args.agmarknet_delay, args.openweather_delay, args.error_rate),
+            host="127.0.0.1",
+            port=args.port,
+            log_level="warning",
+        )
+    else:
+        ok = asyncio.run(run_check(args.port, args.slow_delay, args.max_unrelated_latency))
+        print("✅ Event loop stayed responsive." if ok else "❌ Unrelated routes were blocked.")
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
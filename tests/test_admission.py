@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.admission import (
+    AdaptiveLimit,
+    AdmissionController,
+    AdmissionMiddleware,
+    ClientLimiter,
+    LoopLagMonitor,
+    admission,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def controller(rate: float = 0.0, trusted_proxies=(), upstream_limit: int = 4) -> AdmissionController:
+    return AdmissionController(
+        classes=[("/api/v1/market", AdaptiveLimit("upstream", upstream_limit, 1, 0.1, 0.5))],
+        default=AdaptiveLimit("default", 100, 10, 0.25, 0.5),
+        clients=ClientLimiter(rate, burst=rate * 2, max_clients=100),
+        lag_monitor=LoopLagMonitor(0.05),
+        lag_target=0.05,
+        trusted_proxies=trusted_proxies,
+    )
+
+
+async def slow_app(scope, receive, send):
+    if scope["path"].startswith("/api/v1/market"):
+        await asyncio.sleep(0.2)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def client_for(ctrl: AdmissionController) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=AdmissionMiddleware(slow_app, ctrl)), base_url="http://test")
+
+
+def scope(peer: str, forwarded: str = None) -> dict:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return {"client": (peer, 1234), "headers": headers}
+
+
+def test_client_limiter_is_off_by_default():
+    assert admission.clients.rate == 0
+    assert admission.clients.take("10.0.0.1", 1000) == 0
+
+
+def test_forwarded_for_is_only_believed_from_trusted_proxies():
+    ctrl = controller(trusted_proxies=["10.0.0.0/8", "192.168.1.5"])
+
+    assert ctrl.client_key(scope("203.0.113.7", "1.2.3.4")) == "203.0.113.7"
+    assert ctrl.client_key(scope("10.1.2.3", "198.51.100.9")) == "198.51.100.9"
+    # A spoofed first hop is ignored: the nearest untrusted hop is the client
+    assert ctrl.client_key(scope("10.1.2.3", "6.6.6.6, 198.51.100.9, 192.168.1.5")) == "198.51.100.9"
+    assert ctrl.client_key(scope("10.1.2.3")) == "10.1.2.3"
+    assert controller().client_key(scope("10.1.2.3", "198.51.100.9")) == "10.1.2.3"
+
+
+async def test_client_over_its_bucket_gets_429_with_retry_after():
+    async with client_for(controller(rate=5)) as client:
+        responses = await asyncio.gather(*[client.get("/api/v1/community/feed") for _ in range(15)])
+
+    statuses = [r.status_code for r in responses]
+    assert statuses.count(200) == 10 and statuses.count(429) == 5
+    assert responses[-1].headers["retry-after"] == "1"
+
+
+async def test_class_at_its_limit_gets_503_and_backs_off():
+    ctrl = controller(upstream_limit=4)
+    async with client_for(ctrl) as client:
+        responses = await asyncio.gather(*[client.get("/api/v1/market/prices/x/y") for _ in range(10)])
+
+        statuses = [r.status_code for r in responses]
+        assert statuses.count(200) == 4 and statuses.count(503) == 6
+        assert all(r.headers["retry-after"] == "1" for r in responses if r.status_code == 503)
+        # 0.2s to first byte is over the 0.1s target, so the limit was halved
+        assert ctrl.classify("/api/v1/market").limit == 2.0
+        # Cheap routes are unaffected
+        assert (await client.get("/api/v1/community/feed")).status_code == 200
+
+
+async def test_health_is_never_limited():
+    ctrl = controller(rate=0.5, upstream_limit=1)
+    async with client_for(ctrl) as client:
+        responses = await asyncio.gather(*[client.get("/health") for _ in range(20)])
+    assert {r.status_code for r in responses} == {200}
+
+
+def test_loop_lag_shrinks_every_class():
+    ctrl = controller()
+    ctrl._on_lag(0.2)
+    assert [limit.limit for limit in ctrl.limits()] == [2.0, 50.0]
+    ctrl._on_lag(0.01)
+    assert [limit.limit for limit in ctrl.limits()] == [2.0, 50.0]
@@ -0,0 +1,160 @@
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import app.api.advisor as advisor_api
+from app.core.config import settings
+from app.core.services import ServiceRegistry, services
+from app.services.answer_cache import AnswerCache
+from app.services.ai_advisor import FairGate, FakeModel, FakeStreamChunk, ai_advisor
+import app.services.ai_advisor as advisor_module
+from app.services.llm_scheduler import LLMScheduler, Priority
+
+pytestmark = pytest.mark.anyio
+
+
+class FailingFakeModel(FakeModel):
+    """
+    Streams `fail_after` tokens, then breaks like a dropped connection.
+    """
+    def __init__(self, fail_after: int):
+        super().__init__(first_token_delay=0, token_delay=0)
+        self.fail_after = fail_after
+
+    async def generate_content_async(self, contents: str, stream: bool = False):
+        async def chunks():
+            for i in range(self.fail_after):
+                yield FakeStreamChunk(f"word{i} ")
+            raise ConnectionError("stream reset")
+        return chunks()
+
+
+@pytest.fixture
+def use_model(monkeypatch):
+    # A registry of its own, so the app's "gemini" entry is left alone
+    registry = ServiceRegistry()
+
+    def use(model):
+        monkeypatch.setattr(ai_advisor, "gemini", registry.lazy("gemini", lambda: model))
+    return use
+
+
+@pytest.fixture(autouse=True)
+def answer_cache(monkeypatch):
+    # Answers streamed here must not be served to later tests
+    cache = AnswerCache(
+        max_entries=100, ttl=settings.ANSWER_CACHE_TTL_SECONDS, threshold=settings.ANSWER_CACHE_SIMILARITY
+    )
+    monkeypatch.setattr(advisor_api, "answer_cache", cache)
+    monkeypatch.setattr(advisor_module, "answer_cache", cache)
+    return cache
+
+
+@pytest.fixture
+async def client():
+    app = FastAPI()
+    app.include_router(advisor_api.router, prefix="/api/v1/advisor")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+def parse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def test_streams_context_tokens_then_done(client, use_model):
+    use_model(FakeModel(first_token_delay=0, token_delay=0))
+
+    response = await client.post("/api/v1/advisor/ask", json={"question": "How do I treat leaf spot on groundnut?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "context" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+    assert events[-1][1] == {"cached": False}
+    assert "neem oil" in "".join(data["text"] for name, data in events if name == "token")
+
+
+async def test_mid_stream_failure_ends_with_error_event(client, use_model):
+    use_model(FailingFakeModel(fail_after=3))
+
+    response = await client.post("/api/v1/advisor/ask", json={"question": "Why are my tomato flowers dropping?"})
+
+    assert response.status_code == 200
+    events = parse_events(response.text)
+    assert [name for name, _ in events] == ["context", "token", "token", "token", "error"]
+    assert "message" in events[-1][1]
+    assert advisor_api.advisor_gate.active == 0
+
+
+async def test_saturated_advisor_answers_429_with_retry_after(client, use_model, monkeypatch):
+    use_model(FakeModel(first_token_delay=0, token_delay=0))
+    monkeypatch.setattr(advisor_api, "advisor_gate", FairGate(max_concurrent=0, max_queue=0, max_wait=2.5))
+
+    response = await client.post("/api/v1/advisor/ask", json={"question": "When should I sow cotton this year?"})
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "3"
+
+
+class ThrottledFakeModel(FakeModel):
+    """
+    Answers 429 for the first `throttled` calls, counting every call.
+    """
+    def __init__(self, throttled: int):
+        super().__init__(first_token_delay=0, token_delay=0)
+        self.throttled = throttled
+        self.calls = 0
+
+    async def generate_content_async(self, contents: str, stream: bool = False):
+        self.calls += 1
+        if self.calls <= self.throttled:
+            from google.api_core.exceptions import ResourceExhausted
+            raise ResourceExhausted("quota")
+        return await super().generate_content_async(contents, stream)
+
+
+@pytest.mark.parametrize("priority, calls, succeeds", [
+    (Priority.INTERACTIVE, 2, True),
+    (Priority.STANDARD, 1, False),
+    (Priority.BACKGROUND, 1, False),
+])
+async def test_only_interactive_calls_retry_a_provider_429(use_model, monkeypatch, priority, calls, succeeds):
+    # Short backoff so the interactive retry goes out straight away
+    scheduler = LLMScheduler(rpm=1000, tpm=1e9, max_queue=10, max_wait={p: 5.0 for p in Priority}, max_backoff=0.01)
+    monkeypatch.setattr(advisor_module, "llm_scheduler", scheduler)
+    model = ThrottledFakeModel(throttled=1)
+    use_model(model)
+
+    if succeeds:
+        stream = await ai_advisor.open_stream("How much urea for paddy?", priority=priority)
+        assert "".join([text async for text in stream])
+    else:
+        with pytest.raises(Exception) as error:
+            await ai_advisor.open_stream("How much urea for paddy?", priority=priority)
+        assert getattr(error.value, "code", None) == 429
+    assert model.calls == calls
+    assert scheduler.counters["throttled"] == 1
+    await scheduler.stop()
+
+
+async def test_streamed_answers_stay_in_the_test_cache(client, use_model, answer_cache):
+    import app.services.answer_cache as cache_module
+
+    use_model(FakeModel(first_token_delay=0, token_delay=0))
+    question = {"question": "Best time to irrigate chilli in summer?"}
+    await client.post("/api/v1/advisor/ask", json=question)
+    response = await client.post("/api/v1/advisor/ask", json=question)
+
+    assert parse_events(response.text)[-1][1] == {"cached": True}
+    assert answer_cache.counters["stores"] == 1
+    assert cache_module.answer_cache.counters["stores"] == 0
+    assert services.services["gemini"] is not ai_advisor.gemini
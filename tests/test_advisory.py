@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.api.weather import analyze_farming_conditions
+from app.services.advisory import advisory_engine, forecast_arrays
+
+NORMAL = "Conditions are normal for general farming."
+
+
+def legacy_advice(temp, humidity, rain):
+    """
+    The if/elif advice /current gave before the rule table; the 'general'
+    rules must keep giving the same answer.
+    """
+    advice = NORMAL
+    if rain > 0:
+        advice = "Rain detected. Avoid spraying pesticides or fertilizers today."
+    elif humidity > 80 and temp > 25:
+        advice = "High humidity & heat: Increased risk of fungal infections in crops like Chillies."
+    elif temp > 35:
+        advice = "Extreme heat: Ensure evening irrigation to prevent crop wilting."
+    return advice
+
+
+def around(*thresholds):
+    values = set()
+    for t in thresholds:
+        values.update({t - 1, t - 0.01, t, t + 0.01, t + 1})
+    return sorted(values)
+
+
+@pytest.mark.parametrize("temp", around(25, 35) + [20])
+@pytest.mark.parametrize("humidity", around(80) + [50])
+@pytest.mark.parametrize("rain", [0, 0.01, 0.5])
+@pytest.mark.parametrize("wind", [0.0, 2.0, 8.0])
+def test_general_rules_match_legacy_advice(temp, humidity, rain, wind):
+    assert analyze_farming_conditions(temp, humidity, rain, wind) == legacy_advice(temp, humidity, rain)
+
+
+def test_normal_reading_is_not_a_spray_window():
+    assert analyze_farming_conditions(20, 50, 0) == NORMAL
+    assert analyze_farming_conditions(20, 50, 0, wind=1.0) == NORMAL
+
+
+def test_spray_window_still_needs_a_sustained_spell():
+    # Four dry, calm 3-hour steps at 20°C: long enough for the 3h minimum
+    forecast = {"list": [
+        {"dt": 1_700_000_000 + i * 10800, "main": {"temp": 20, "humidity": 50}, "wind": {"speed": 1.0}}
+        for i in range(4)
+    ]}
+    values, times = forecast_arrays([forecast])
+    windows = advisory_engine.evaluate(values, times, ["general"])[0]["general"]
+    assert [w["rule"] for w in windows] == ["spray_window"]
+    assert windows[0]["hours"] == 12.0
+
+
+def test_exclusive_bounds_apply_to_forecasts_too():
+    forecast = {"list": [{"dt": 1_700_000_000, "main": {"temp": 35, "humidity": 50}}]}
+    values, times = forecast_arrays([forecast])
+    assert np.isfinite(values).all()
+    windows = advisory_engine.evaluate(values, times, ["general"])[0]["general"]
+    assert "heat_stress" not in [w["rule"] for w in windows]
@@ -0,0 +1,59 @@
+import pytest
+
+from app.core.config import settings
+from app.services.answer_cache import AnswerCache, context_bucket
+
+CHILLI = "neem spray for chilli white spots"
+
+
+@pytest.fixture
+def cache():
+    cache = AnswerCache(max_entries=100, ttl=3600, threshold=settings.ANSWER_CACHE_SIMILARITY)
+    cache.store(CHILLI, "en", None, "Spray neem oil on chilli.", generation_seconds=2.0)
+    return cache
+
+
+@pytest.mark.parametrize("question", [
+    "neem spray for paddy white spots",
+    "neem spray for chilli yellow spots",
+    "should I not spray neem for chilli white spots",
+    "don't spray neem for chilli white spots",
+    "neem spray for chilli white spots before rain",
+])
+def test_near_misses_with_a_different_crop_symptom_or_negation_are_not_served(cache, question):
+    assert cache.lookup(question, "en") is None
+
+
+def test_key_terms_must_match_even_in_long_questions():
+    cache = AnswerCache(max_entries=100, ttl=3600, threshold=settings.ANSWER_CACHE_SIMILARITY)
+    long_question = ("after the heavy rain last week the lower leaves of my chilli crop near the canal "
+                     "show white spots and the new shoots look weak, which neem spray dose works")
+    cache.store(long_question, "en", None, "answer", generation_seconds=1.0)
+
+    assert cache.lookup(long_question.replace("white", "brown"), "en") is None
+    assert cache.lookup(long_question.replace("chilli", "cotton"), "en") is None
+    assert cache.lookup(long_question.replace("heavy", "big"), "en").answer == "answer"
+
+
+@pytest.mark.parametrize("question", [
+    CHILLI,
+    "Neem spray for my chilli - white spots?",
+    "please tell about neem spray on chilli white spots",
+    "white spots chilli neem spray",
+])
+def test_rewordings_are_served(cache, question):
+    hit = cache.lookup(question, "en")
+    assert hit is not None and hit.question == CHILLI
+
+
+def test_context_bucket_ignores_readings_that_are_not_numbers():
+    weather = {"temp": "hot", "humidity": None, "rain": 0}
+    assert context_bucket({"crop": "chilli", "weather": weather, "price": "n/a"}) == "crop=chilli|r=0"
+    assert context_bucket({"weather": {"temp": "31.5", "humidity": 82}, "price": {"modal_price": "inf"}}) == "t=6|h=4|r=0"
+    assert context_bucket({"weather": {"temp": float("nan")}, "price": float("inf")}) == "r=0"
+
+
+def test_lookup_with_malformed_context_falls_back_to_its_bucket(cache):
+    context = {"weather": {"temp": "thirty", "humidity": [1]}}
+    cache.store(CHILLI, "en", context, "answer", generation_seconds=1.0)
+    assert cache.lookup(CHILLI, "en", context).answer == "answer"
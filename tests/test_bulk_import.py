@@ -0,0 +1,44 @@
+import argparse
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import app.database as database
+from scripts import bulk_import
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    client = AsyncMongoMockClient()
+
+    async def connect():
+        monkeypatch.setattr(database.db, "client", client)
+        monkeypatch.setattr(database.db, "db", client.get_database("wikikisan"))
+
+    async def close():
+        pass
+
+    monkeypatch.setattr(bulk_import, "connect_to_mongo", connect)
+    monkeypatch.setattr(bulk_import, "close_mongo_connection", close)
+    return client.get_database("wikikisan")
+
+
+async def test_synthetic_load_writes_every_collection(mongo):
+    args = argparse.Namespace(
+        seed=7, days=30, posts=50, comments_per_post=3.0, wiki=5, price_days=3,
+        chunk_size=16, in_flight=2, drop=True, skip_indexes=True,
+    )
+    assert await bulk_import.load_synthetic(args) == 0
+
+    data = bulk_import.SyntheticData(args.seed, args.days)
+    expected = list(data.posts_and_comments(args.posts, args.comments_per_post))
+    assert await mongo["posts"].count_documents({}) == args.posts
+    assert await mongo["comments"].count_documents({}) == sum(len(thread) for _, thread in expected)
+    assert await mongo["wiki"].count_documents({}) == args.wiki
+    assert await mongo["mandi_prices"].count_documents({}) > 0
+
+    post, thread = next((p, t) for p, t in expected if t)
+    stored = await mongo["comments"].count_documents({"post_id": post["_id"]})
+    assert stored == len(thread) == post["commentCount"]
@@ -0,0 +1,121 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+import app.core.cache as cache_module
+from app.core.cache import L2_RETRY_SECONDS, TieredCache, decode, encode
+
+pytestmark = pytest.mark.anyio
+
+
+def tiered(client) -> TieredCache:
+    return TieredCache(redis_url=None, prefix="test", timeout=0.25, compress_min_bytes=1024, client=client)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+class BrokenRedis:
+    """
+    A client whose every call fails, counting the attempts.
+    """
+    def __init__(self):
+        self.calls = 0
+
+    async def mget(self, keys):
+        self.calls += 1
+        raise ConnectionError("redis is down")
+
+    def pipeline(self, transaction=False):
+        self.calls += 1
+        raise ConnectionError("redis is down")
+
+
+def test_encode_compresses_large_values_only():
+    small = {"price": 4200}
+    large = {"records": [{"market": "Gadwal", "modal_price": 4200 + i} for i in range(200)]}
+
+    assert encode(small, 1024)[:1] == b"\x00"
+    blob = encode(large, 1024)
+    assert blob[:1] == b"\x01"
+    assert len(blob) < len(encode(large, 10**9))
+    assert decode(blob) == large
+    assert decode(encode(small, 1024)) == small
+
+
+async def test_l2_fills_other_workers_l1(server):
+    writer = tiered(fakeredis.FakeAsyncRedis(server=server)).namespace("fill", ttl=60, max_entries=100)
+    reader = tiered(fakeredis.FakeAsyncRedis(server=server)).namespace("fill", ttl=60, max_entries=100)
+
+    await writer.set("chilli", {"price": 4200})
+    assert await reader.get("chilli") == {"price": 4200}
+    assert await reader.get("chilli") == {"price": 4200}
+    assert reader.counters["l2_hits"] == 1 and reader.counters["l1_hits"] == 1
+    assert await reader.get("paddy") is None
+    assert reader.counters["misses"] == 1
+
+
+async def test_large_values_round_trip_through_redis_compressed(server):
+    client = fakeredis.FakeAsyncRedis(server=server)
+    namespace = tiered(client).namespace("zlib", ttl=60, max_entries=100)
+    other = tiered(fakeredis.FakeAsyncRedis(server=server)).namespace("zlib", ttl=60, max_entries=100)
+    value = {"records": [{"market": "Warangal", "modal_price": i} for i in range(500)]}
+
+    await namespace.set("big", value)
+
+    assert (await client.get("test:zlib:big"))[:1] == b"\x01"
+    assert await other.get("big") == value
+
+
+async def test_l1_rereads_shared_copy_after_l1_ttl(server):
+    writer = tiered(fakeredis.FakeAsyncRedis(server=server)).namespace("reread", ttl=60, max_entries=100, l1_ttl=0.05)
+    reader = tiered(fakeredis.FakeAsyncRedis(server=server)).namespace("reread", ttl=60, max_entries=100, l1_ttl=0.05)
+
+    await writer.set("onion", 1)
+    assert await reader.get("onion") == 1
+    await writer.set("onion", 2)
+    # Still within l1_ttl: the local copy answers
+    assert await reader.get("onion") == 1
+    await asyncio.sleep(0.06)
+    assert await reader.get("onion") == 2
+    assert reader.counters["l2_hits"] == 2
+
+
+async def test_redis_errors_fall_back_to_l1_for_retry_period(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    client = BrokenRedis()
+    backend = tiered(client)
+    namespace = backend.namespace("fallback", ttl=600, max_entries=100)
+
+    # The failed write still lands in L1, so reads keep working
+    await namespace.set("tomato", {"price": 1800})
+    assert client.calls == 1
+    assert await namespace.get("tomato") == {"price": 1800}
+    assert await namespace.get("maize") is None
+    assert client.calls == 1
+
+    now[0] += L2_RETRY_SECONDS - 0.1
+    assert await namespace.get("maize") is None
+    assert client.calls == 1
+
+    now[0] += 0.2
+    assert await namespace.get("maize") is None
+    assert client.calls == 2
+    assert backend.stats()["backend"] == "redis"
+
+
+async def test_redis_client_is_created_on_first_use():
+    # Nothing listens on port 1, so the first call fails fast and falls back
+    backend = TieredCache(redis_url="redis://127.0.0.1:1/0", prefix="test", timeout=0.25, compress_min_bytes=1024)
+    namespace = backend.namespace("lazy", ttl=60, max_entries=10)
+    assert backend.shared and backend.client is None
+
+    await namespace.set("ragi", 1)
+    assert backend.client is not None
+    assert await namespace.get("ragi") == 1
+    await backend.stop()
+    assert backend.client is None
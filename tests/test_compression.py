@@ -0,0 +1,28 @@
+import pytest
+
+import app.core.compression as compression
+from app.core.compression import choose_encoding
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", "br"),
+    ("br;q=0.1, gzip;q=1.0", "gzip"),
+    ("gzip;q=0.5, br;q=0.9", "br"),
+    ("br;q=0.8, gzip;q=0.8", "br"),
+    ("gzip", "gzip"),
+    ("br", "br"),
+    ("*", "br"),
+    ("*;q=0.5, gzip;q=0.7", "gzip"),
+    ("gzip;q=0, br;q=0", None),
+    ("br;q=0, *;q=0", None),
+    ("identity;q=1, gzip;q=0.5", None),
+    ("deflate", None),
+])
+def test_highest_q_value_wins(header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_gzip_only_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br;q=1.0, gzip;q=0.1") == "gzip"
+    assert choose_encoding("br") is None
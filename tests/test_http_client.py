@@ -0,0 +1,112 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.http_client import Upstream, UpstreamError
+
+pytestmark = pytest.mark.anyio
+
+
+def make_upstream(handler, **overrides) -> Upstream:
+    options = dict(timeout=1.0, max_retries=2, retry_budget=5.0, backoff_base=0.001, backoff_cap=0.01)
+    options.update(overrides)
+    return Upstream("test", "http://upstream.test", transport=httpx.MockTransport(handler), **options)
+
+
+def scripted(*statuses, headers=None):
+    """
+    A handler answering each call with the next status, then 200s; records
+    the calls it saw.
+    """
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        status = statuses[len(calls) - 1] if len(calls) <= len(statuses) else 200
+        body = {"ok": True} if status == 200 else {"error": status}
+        return httpx.Response(status, json=body, headers=headers or {})
+
+    return handler, calls
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+async def test_retries_retryable_status(status):
+    handler, calls = scripted(status)
+    upstream = make_upstream(handler)
+
+    assert await upstream.get_json("/data", params={"q": "x"}) == {"ok": True}
+    assert len(calls) == 2
+    assert calls[1].url.params["q"] == "x"
+    await upstream.close()
+
+
+@pytest.mark.parametrize("status", [400, 401, 404])
+async def test_client_errors_are_not_retried(status):
+    handler, calls = scripted(status)
+    upstream = make_upstream(handler)
+
+    with pytest.raises(UpstreamError) as error:
+        await upstream.get_json("/data")
+    assert error.value.status_code == status
+    assert len(calls) == 1
+    await upstream.close()
+
+
+async def test_gives_up_after_max_retries():
+    handler, calls = scripted(503, 503, 503, 503)
+    upstream = make_upstream(handler, max_retries=2)
+
+    with pytest.raises(UpstreamError) as error:
+        await upstream.get_json("/data")
+    assert error.value.status_code == 503
+    assert len(calls) == 3
+    await upstream.close()
+
+
+async def test_transport_errors_are_retried():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"ok": True})
+
+    upstream = make_upstream(handler)
+    assert await upstream.get_json("/data") == {"ok": True}
+    assert len(calls) == 2
+    await upstream.close()
+
+
+async def test_retry_budget_cuts_off_long_backoff():
+    # Retry-After of 5s does not fit in a 1s budget, so there is no second attempt
+    handler, calls = scripted(503, headers={"Retry-After": "5"})
+    upstream = make_upstream(handler, retry_budget=1.0, backoff_cap=10.0)
+
+    started = asyncio.get_running_loop().time()
+    with pytest.raises(UpstreamError) as error:
+        await upstream.get_json("/data")
+    assert "giving up after 1 attempts" in str(error.value)
+    assert len(calls) == 1
+    assert asyncio.get_running_loop().time() - started < 1.0
+    await upstream.close()
+
+
+async def test_concurrent_calls_retry_independently():
+    attempts = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        key = request.url.params["id"]
+        attempts[key] = attempts.get(key, 0) + 1
+        # Every request's first attempt is throttled
+        if attempts[key] == 1:
+            return httpx.Response(429)
+        return httpx.Response(200, json={"id": key})
+
+    upstream = make_upstream(handler)
+    results = await asyncio.gather(*[upstream.get_json("/data", params={"id": str(i)}) for i in range(20)])
+
+    assert [r["id"] for r in results] == [str(i) for i in range(20)]
+    assert all(count == 2 for count in attempts.values())
+    await upstream.close()
@@ -0,0 +1,22 @@
+from app.services.market_data import HotPairTracker, pair_key
+
+
+def test_tracker_keeps_labels_bounded_with_its_entries():
+    tracker = HotPairTracker(half_life=3600, max_pairs=10)
+    for i in range(100):
+        state, commodity = " Telangana ", f"Crop{i}"
+        tracker.hit(pair_key(state, commodity), (state.strip(), commodity))
+
+    assert len(tracker.scores) <= 10
+    key = pair_key("Telangana", "Crop99")
+    assert tracker.label(key) == ("Telangana", "Crop99")
+    assert tracker.label(pair_key("Telangana", "Crop0")) is None
+
+
+def test_tracker_keeps_first_label_spelling():
+    tracker = HotPairTracker(half_life=3600, max_pairs=10)
+    key = pair_key("telangana", "chilli")
+    tracker.hit(key, ("Telangana", "Chilli"))
+    tracker.hit(key, ("telangana", "chilli"))
+    assert tracker.label(key) == ("Telangana", "Chilli")
+    assert tracker.top(1) == [key]
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import app.database as database
+from scripts import migrate_comments
+
+pytestmark = pytest.mark.anyio
+
+
+def legacy_post() -> dict:
+    return {
+        "_id": "post-1",
+        "createdAt": datetime(2024, 6, 1, 9, 0),
+        "comments": [
+            {"author": "Ravi", "content": "Use neem oil", "createdAt": datetime(2024, 6, 1, 10, 0), "isAnswer": True},
+            {"author": "Sita", "content": "Same problem here"},
+            {"id": "kept-id", "author": "Anil", "content": "Try trichoderma", "createdAt": datetime(2024, 6, 2)},
+        ],
+    }
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    db = AsyncMongoMockClient()["wikikisan"]
+    monkeypatch.setattr(database.db, "db", db)
+    return db
+
+
+def test_comments_without_an_id_get_the_same_id_every_run():
+    first = [c["_id"] for c in migrate_comments.thread_documents(legacy_post())]
+    second = [c["_id"] for c in migrate_comments.thread_documents(legacy_post())]
+
+    assert first == second
+    assert len(set(first)) == 3
+    assert first[2] == "kept-id"
+
+
+async def test_rerun_after_an_interrupted_batch_does_not_duplicate_comments(mongo):
+    await mongo["posts"].insert_one(legacy_post())
+    # The first run inserted the comments but died before updating the post
+    await mongo["comments"].insert_many(migrate_comments.thread_documents(legacy_post()))
+
+    post = await mongo["posts"].find_one({"_id": "post-1"})
+    assert await migrate_comments._migrate_batch([post]) == 3
+
+    assert await mongo["comments"].count_documents({"post_id": "post-1"}) == 3
+    migrated = await mongo["posts"].find_one({"_id": "post-1"})
+    assert "comments" not in migrated
+    assert migrated["commentCount"] == 3
+    assert [c["content"] for c in migrated["commentPreview"]] == ["Use neem oil"]
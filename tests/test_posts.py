@@ -0,0 +1,48 @@
+import base64
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+from app.services.posts import InvalidCursor, decode_cursor, encode_cursor
+
+
+def forged(millis) -> str:
+    return base64.urlsafe_b64encode(json.dumps([millis, "post-1"]).encode()).decode().rstrip("=")
+
+
+@pytest.fixture(params=["UTC", "Asia/Kolkata", "America/New_York"])
+def server_timezone(request, monkeypatch):
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2024, 3, 10, 2, 30, 0, 123000),   # inside the US spring-forward gap
+    datetime(2024, 11, 3, 1, 30, 0, 999000),   # inside the US fall-back overlap
+    datetime(1970, 1, 1),
+    datetime(2026, 10, 18, 9, 5, 11, 1000),
+])
+def test_cursors_round_trip_whatever_the_server_timezone(server_timezone, created_at):
+    cursor = encode_cursor({"createdAt": created_at, "_id": "post-1"})
+    assert decode_cursor(cursor) == (created_at, "post-1")
+
+
+def test_cursor_counts_milliseconds_since_the_utc_epoch(server_timezone):
+    assert decode_cursor(forged(1_700_000_000_123)) == (datetime(2023, 11, 14, 22, 13, 20, 123000), "post-1")
+
+
+@pytest.mark.parametrize("millis", [10 ** 20, -10 ** 20, 1e308, "soon", None])
+def test_forged_timestamps_are_invalid_cursors(millis):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(forged(millis))
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", base64.urlsafe_b64encode(b"[1]").decode()])
+def test_malformed_cursors_are_invalid(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import app.services.search_index as search_module
+from app.services.search_index import SearchIndex
+
+pytestmark = pytest.mark.anyio
+
+
+def post(post_id: str, title: str, content: str, translations=None) -> dict:
+    return {"_id": post_id, "title": title, "content": content, "language": "en",
+            "tags": ["chilli"], "translations": translations or {}}
+
+
+def postings(index: SearchIndex, term: str) -> list:
+    return list(index.postings[index.term_ids[term]].docs)
+
+
+def test_reindexing_a_post_replaces_its_postings():
+    index = SearchIndex()
+    index.add_post(post("1", "Chilli leaf curl", "white spots on chilli leaves"))
+    index.add_post(post("2", "Paddy blast", "brown lesions"))
+    for _ in range(5):
+        # e.g. pre-translation finishing and re-adding the post
+        index.add_post(post("1", "Chilli leaf curl", "thrips on leaves",
+                            {"hi": {"title": "मिर्च", "content": "पत्ती"}}))
+
+    assert len(index.doc_keys) == 2
+    assert postings(index, "spots") == []
+    assert postings(index, "thrips") == [0]
+    assert postings(index, "@type:post") == [0, 1]
+    assert index.live_docs == 2
+    hits, total = index.search("thrips")
+    assert total == 1 and hits[0].id == "1"
+    assert index.search("spots") == ([], 0)
+
+
+def test_reindexing_keeps_posting_lists_sorted():
+    index = SearchIndex()
+    for i in range(5):
+        index.add_post(post(str(i), "Neem oil", f"dose {i}"))
+    index.add_post(post("2", "Neem oil spray", "dose"))
+
+    assert postings(index, "neem") == [0, 1, 2, 3, 4]
+    assert postings(index, "spray") == [2]
+
+
+def test_removed_documents_leave_document_frequency():
+    index = SearchIndex()
+    index.add_post(post("1", "Urea dose", "paddy"))
+    index.add_post(post("2", "Urea timing", "maize"))
+    index.remove("post:1")
+
+    assert postings(index, "urea") == [1]
+    assert index.total_length == index.doc_length[1]
+    assert [h.id for h in index.search("urea")[0]] == ["2"]
+
+
+async def test_build_yields_to_the_event_loop_often(monkeypatch):
+    client = AsyncMongoMockClient()
+    database = client["wikikisan"]
+    await database["posts"].insert_many([post(str(i), f"Post {i}", "chilli paddy neem") for i in range(500)])
+    monkeypatch.setattr(search_module, "get_db", lambda: database)
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(ticker())
+    index = SearchIndex()
+    await index.build(yield_every=100)
+    task.cancel()
+
+    assert index.ready and index.live_docs == 500
+    assert ticks >= 5
+
+
+async def test_failed_build_is_retried_until_mongo_answers(monkeypatch):
+    client = AsyncMongoMockClient()
+    database = client["wikikisan"]
+    await database["posts"].insert_many([post(str(i), f"Post {i}", "chilli neem") for i in range(3)])
+    attempts = []
+
+    def flaky_db():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("No servers found yet")
+        return database
+
+    monkeypatch.setattr(search_module, "get_db", flaky_db)
+    index = SearchIndex()
+    await asyncio.wait_for(index.build_with_retry(delay=0.01, max_delay=0.02), timeout=5)
+
+    assert len(attempts) == 3
+    assert index.ready and index.live_docs == 3
@@ -0,0 +1,122 @@
+import heapq
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.services.trending import COLLECTION, SpaceSaving, TrendingService
+
+
+def exact_top(sketch: SpaceSaving, k: int):
+    return heapq.nlargest(k, ((t, c[0]) for t, c in sketch.counters.items()), key=lambda x: x[1])
+
+
+def test_incremental_top_matches_a_full_scan():
+    rng = random.Random(7)
+    sketch = SpaceSaving(capacity=50, top_size=10)
+    for _ in range(20_000):
+        # Zipf-ish stream with a long tail that keeps forcing evictions
+        tag = f"t{min(int(rng.paretovariate(1.1)), 500)}"
+        sketch.add(tag, rng.choice([1.0, 0.25]))
+        assert len(sketch.counters) <= 50
+    assert [c for _, c in sketch.top(10)] == [c for _, c in exact_top(sketch, 10)]
+    assert sketch.top(20) == exact_top(sketch, 20)
+
+
+def test_evicts_the_smallest_counter_and_carries_its_count():
+    sketch = SpaceSaving(capacity=3)
+    for tag, weight in [("a", 5), ("b", 1), ("c", 4)]:
+        sketch.add(tag, weight)
+    sketch.add("b", 1)
+    sketch.add("d", 1)
+
+    assert "b" not in sketch.counters
+    assert sketch.counters["d"] == [3, 2]
+    assert sketch.top(3) == [("a", 5), ("c", 4), ("d", 3)]
+
+
+def test_scale_keeps_order_and_eviction_working():
+    sketch = SpaceSaving(capacity=2)
+    sketch.add("a", 4)
+    sketch.add("b", 2)
+    sketch.scale(0.5)
+    sketch.add("c", 0.5)
+
+    assert sketch.top(2) == [("a", 2.0), ("c", 1.5)]
+
+
+def test_service_top_reads_decayed_counts():
+    service = TrendingService(half_life=3600, capacity=16, snapshot_interval=60)
+    for _ in range(3):
+        service.record(["#Chilli", "paddy"], "crops", "te")
+    service.record(["paddy"], "crops", "hi")
+
+    top = service.top("crops", None, 2)
+    assert [t["_id"] for t in top] == ["paddy", "chilli"]
+    assert service.top(None, "te", 1)[0]["_id"] in {"chilli", "paddy"}
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    database = AsyncMongoMockClient()["wikikisan"]
+    monkeypatch.setattr("app.services.trending.get_db", lambda: database)
+    return database
+
+
+def worker() -> TrendingService:
+    return TrendingService(half_life=3600, capacity=16, snapshot_interval=60)
+
+
+@pytest.mark.anyio
+async def test_restore_merges_with_tags_recorded_since_startup(mongo):
+    service = worker()
+    # Served before the restore finished
+    service.record(["drip"], "crops", "en")
+    await mongo[COLLECTION].insert_one({
+        "_id": "sketches:old-worker",
+        "landmark": service.landmark - 3600,
+        "savedAt": datetime.now(),
+        "sketches": [{"category": "all", "language": "all", "counters": [["chilli", 8.0, 0.0], ["drip", 2.0, 0.0]]}],
+    })
+    await service.load()
+
+    top = {t["_id"]: t["count"] for t in service.top(None, None, 5)}
+    # Saved counts lose one half-life to the landmark shift; live ones are kept
+    assert top == {"chilli": 4.0, "drip": 2.0}
+    assert [t["_id"] for t in service.top("crops", "en", 5)] == ["drip"]
+
+
+@pytest.mark.anyio
+async def test_workers_snapshots_are_merged_not_overwritten(mongo):
+    first, second = worker(), worker()
+    for _ in range(3):
+        first.record(["chilli"], "crops", "en")
+    second.record(["paddy"], "crops", "en")
+    await first.save()
+    await second.save()
+
+    restarted = worker()
+    await restarted.load()
+    counts = {t["_id"]: round(t["count"]) for t in restarted.top(None, None, 5)}
+    assert counts == {"chilli": 3, "paddy": 1}
+
+    # The restarted worker saves only its own counts, so a later restore
+    # does not count the merged snapshots twice
+    restarted.record(["chilli"], "crops", "en")
+    await restarted.save()
+    later = worker()
+    await later.load()
+    counts = {t["_id"]: round(t["count"]) for t in later.top(None, None, 5)}
+    assert counts == {"chilli": 4, "paddy": 1}
+    assert await mongo[COLLECTION].count_documents({}) == 3
+
+
+@pytest.mark.anyio
+async def test_stale_snapshots_are_deleted_on_load(mongo):
+    service = worker()
+    await mongo[COLLECTION].insert_one({
+        "_id": "sketches", "landmark": service.landmark, "savedAt": datetime.now() - timedelta(days=2), "sketches": [],
+    })
+    await service.load()
+    assert await mongo[COLLECTION].count_documents({}) == 0
@@ -0,0 +1,123 @@
+import asyncio
+
+import httpx
+import pytest
+
+import app.services.weather_data as weather_module
+from app.core.http_client import Upstream, UpstreamError
+from app.services.weather_data import CityNotFound, WeatherDataService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def service():
+    return WeatherDataService(bucket_degrees=0.2, ttl=600, batch_window=0.01, forecast_ttl=600)
+
+
+def use_upstream(monkeypatch, handler):
+    upstream = Upstream("openweather", "http://openweather.test", timeout=1.0, max_retries=0,
+                        transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(weather_module, "get_upstream", lambda name: upstream)
+    return upstream
+
+
+async def test_buckets_sharing_a_station_all_get_its_observation(service, monkeypatch):
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        ids = request.url.params["id"].split(",")
+        requested.append(ids)
+        return httpx.Response(200, json={"list": [{"id": int(i), "main": {"temp": 30}} for i in ids]})
+
+    use_upstream(monkeypatch, handler)
+    # Two neighbouring buckets resolve to the same nearest city
+    service.station_ids[(81, 389)] = 1269743
+    service.station_ids[(81, 390)] = 1269743
+    service.station_ids[(82, 390)] = 1275004
+
+    results = await service.get_many([(81, 389), (81, 390), (82, 390)])
+
+    assert [sorted(ids) for ids in requested] == [["1269743", "1275004"]]
+    assert results[(81, 389)]["id"] == results[(81, 390)]["id"] == 1269743
+    assert results[(82, 390)]["id"] == 1275004
+
+
+async def test_failed_call_only_fails_its_own_buckets(service, monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/data/2.5/group":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"id": 555, "main": {"temp": 28}})
+
+    use_upstream(monkeypatch, handler)
+    service.station_ids[(91, 391)] = 1269743
+
+    grouped = service._enqueue((91, 391))
+    by_point = service._enqueue((92, 392))
+    results = await asyncio.gather(grouped, by_point, return_exceptions=True)
+
+    assert isinstance(results[0], UpstreamError)
+    assert results[1]["id"] == 555
+    assert service.station_ids[(92, 392)] == 555
+
+
+async def test_station_missing_from_group_response_is_not_found(service, monkeypatch):
+    use_upstream(monkeypatch, lambda request: httpx.Response(200, json={"list": []}))
+    service.station_ids[(93, 393)] = 1
+
+    with pytest.raises(CityNotFound):
+        await service._enqueue((93, 393))
+
+
+async def test_missing_station_is_not_blamed_on_another_calls_error(service, monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/data/2.5/group":
+            return httpx.Response(200, json={"list": []})
+        return httpx.Response(404)
+
+    use_upstream(monkeypatch, handler)
+    service.station_ids[(94, 394)] = 2
+
+    results = await asyncio.gather(service._enqueue((94, 394)), service._enqueue((95, 395)), return_exceptions=True)
+
+    assert isinstance(results[0], CityNotFound)
+    assert isinstance(results[1], UpstreamError)
+
+
+async def test_fresh_worker_uses_station_ids_learned_by_another(monkeypatch):
+    import fakeredis
+
+    from app.core.cache import TieredCache
+
+    server = fakeredis.FakeServer()
+
+    def worker() -> WeatherDataService:
+        # Each worker has its own L1 and sees the others only through Redis
+        shared = TieredCache(redis_url=None, prefix="test", timeout=0.25, compress_min_bytes=1024,
+                             client=fakeredis.FakeAsyncRedis(server=server))
+        monkeypatch.setattr(weather_module, "cache", shared)
+        return WeatherDataService(bucket_degrees=0.2, ttl=0.05, batch_window=0.01, forecast_ttl=600)
+
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        if request.url.path == "/data/2.5/group":
+            ids = request.url.params["id"].split(",")
+            return httpx.Response(200, json={"list": [{"id": int(i), "main": {"temp": 30}} for i in ids]})
+        station = 1000 + int(float(request.url.params["lat"]) * 10)
+        return httpx.Response(200, json={"id": station, "main": {"temp": 30}})
+
+    use_upstream(monkeypatch, handler)
+    buckets = [(81, 389), (82, 390), (83, 391)]
+    await worker().get_many(buckets)
+    assert paths == ["/data/2.5/weather"] * 3
+
+    # Observations expired; the new worker only knows the shared station ids
+    await asyncio.sleep(0.06)
+    paths.clear()
+    fresh = worker()
+    results = await fresh.get_many(buckets)
+
+    assert paths == ["/data/2.5/group"]
+    assert sorted(r["id"] for r in results.values()) == [1162, 1164, 1166]